@@ -0,0 +1,132 @@
+"""Add shift definitions and structured shift intervals on schedules
+
+Existing free-text turno values such as "Mañana (08:00-16:00)" are parsed into
+shift_definitions rows and each schedule gets shift_definition_id, start_at and end_at.
+
+Revision ID: 0001_shift_definitions
+Revises:
+Create Date: 2025-11-20 09:00:00
+
+"""
+import re
+from datetime import datetime, time, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_shift_definitions"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SHIFT_LABEL_PATTERN = re.compile(r"^\s*(?P<nombre>[^(]*?)\s*\(?\s*(?P<start>\d{1,2}:\d{2})\s*-\s*(?P<end>\d{1,2}:\d{2})\s*\)?\s*$")
+
+
+def _parse_time(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours) % 24, int(minutes))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Tables may already exist when the app created them with create_all
+    if "shift_definitions" not in inspector.get_table_names():
+        op.create_table(
+            "shift_definitions",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("nombre", sa.String(), nullable=False),
+            sa.Column("start_time", sa.Time(), nullable=False),
+            sa.Column("end_time", sa.Time(), nullable=False),
+            sa.Column("orden", sa.Integer(), default=0),
+            sa.Column("activo", sa.Boolean(), default=True),
+            sa.UniqueConstraint("nombre", "start_time", "end_time", name="unique_shift_definition"),
+        )
+
+    schedule_columns = {column["name"] for column in inspector.get_columns("schedules")}
+    with op.batch_alter_table("schedules") as batch_op:
+        if "shift_definition_id" not in schedule_columns:
+            batch_op.add_column(sa.Column("shift_definition_id", sa.Integer(), nullable=True))
+            batch_op.create_foreign_key("fk_schedules_shift_definition_id", "shift_definitions", ["shift_definition_id"], ["id"])
+        if "start_at" not in schedule_columns:
+            batch_op.add_column(sa.Column("start_at", sa.DateTime(), nullable=True))
+        if "end_at" not in schedule_columns:
+            batch_op.add_column(sa.Column("end_at", sa.DateTime(), nullable=True))
+
+    schedule_indexes = {index["name"] for index in inspector.get_indexes("schedules")}
+    if "ix_schedules_start_at_end_at" not in schedule_indexes:
+        op.create_index("ix_schedules_start_at_end_at", "schedules", ["start_at", "end_at"])
+    if "ix_schedules_empleado_id_start_at" not in schedule_indexes:
+        op.create_index("ix_schedules_empleado_id_start_at", "schedules", ["empleado_id", "start_at"])
+
+    # Parse existing turno strings into shift definitions and concrete intervals
+    shift_definitions = sa.Table(
+        "shift_definitions",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("nombre", sa.String),
+        sa.Column("start_time", sa.Time),
+        sa.Column("end_time", sa.Time),
+        sa.Column("orden", sa.Integer),
+        sa.Column("activo", sa.Boolean),
+    )
+    schedules = sa.table(
+        "schedules",
+        sa.column("id", sa.Integer),
+        sa.column("fecha", sa.String),
+        sa.column("turno", sa.String),
+        sa.column("shift_definition_id", sa.Integer),
+        sa.column("start_at", sa.DateTime),
+        sa.column("end_at", sa.DateTime),
+    )
+
+    known = {
+        (row.nombre, row.start_time, row.end_time): row.id
+        for row in bind.execute(sa.select(shift_definitions.c.id, shift_definitions.c.nombre, shift_definitions.c.start_time, shift_definitions.c.end_time))
+    }
+
+    rows = bind.execute(
+        sa.select(schedules.c.id, schedules.c.fecha, schedules.c.turno).where(schedules.c.shift_definition_id.is_(None))
+    ).all()
+    for schedule_id, fecha, turno in rows:
+        match = SHIFT_LABEL_PATTERN.match(turno or "")
+        if not match:
+            continue
+        nombre = match.group("nombre") or f"{match.group('start')}-{match.group('end')}"
+        start_time, end_time = _parse_time(match.group("start")), _parse_time(match.group("end"))
+
+        key = (nombre, start_time, end_time)
+        if key not in known:
+            result = bind.execute(shift_definitions.insert().values(
+                nombre=nombre, start_time=start_time, end_time=end_time, orden=len(known) + 1, activo=True
+            ))
+            known[key] = result.inserted_primary_key[0]
+
+        try:
+            day = datetime.strptime(fecha, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            continue
+        start_at = datetime.combine(day, start_time)
+        end_at = datetime.combine(day, end_time)
+        if end_at <= start_at:
+            end_at += timedelta(days=1)
+
+        bind.execute(schedules.update().where(schedules.c.id == schedule_id).values(
+            shift_definition_id=known[key], start_at=start_at, end_at=end_at
+        ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_schedules_empleado_id_start_at", table_name="schedules")
+    op.drop_index("ix_schedules_start_at_end_at", table_name="schedules")
+    with op.batch_alter_table("schedules") as batch_op:
+        batch_op.drop_column("end_at")
+        batch_op.drop_column("start_at")
+        batch_op.drop_column("shift_definition_id")
+    op.drop_table("shift_definitions")
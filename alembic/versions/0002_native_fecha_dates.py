@@ -0,0 +1,82 @@
+"""Convert schedules, tasks and task_assignments fecha columns from strings to DATE
+
+Rows whose fecha is not a valid ISO date or datetime (parsed whole by app.dates.parse_fecha)
+abort the migration so they can be fixed first.
+
+Revision ID: 0002_native_fecha_dates
+Revises: 0001_shift_definitions
+Create Date: 2025-11-24 09:00:00
+
+"""
+from typing import Dict, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.dates import parse_fecha
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_native_fecha_dates"
+down_revision: Union[str, Sequence[str], None] = "0001_shift_definitions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["schedules", "tasks", "task_assignments"]
+
+
+def _is_date_column(inspector, table: str) -> bool:
+    column = next(column for column in inspector.get_columns(table) if column["name"] == "fecha")
+    return isinstance(column["type"], sa.Date)
+
+
+def _check_values(bind, table: str) -> Dict[int, str]:
+    """Fail loudly instead of silently truncating or dropping unparseable dates; returns {id: YYYY-MM-DD} for valid values in another form"""
+    invalid = []
+    normalized = {}
+    for row_id, fecha in bind.execute(sa.text(f"SELECT id, fecha FROM {table}")):
+        try:
+            value = parse_fecha(str(fecha)).isoformat()
+        except ValueError:
+            invalid.append((row_id, fecha))
+            continue
+        if value != fecha:
+            normalized[row_id] = value
+    if invalid:
+        raise RuntimeError(
+            f"{table} has {len(invalid)} rows with invalid fecha values, fix them first: "
+            f"ids {[row_id for row_id, _ in invalid]}; first values {invalid[:20]}"
+        )
+    return normalized
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table in TABLES:
+        if not _is_date_column(inspector, table):
+            # Datetime strings become their date as parse_fecha reads them, so every value is YYYY-MM-DD
+            normalized = _check_values(bind, table)
+            if normalized:
+                bind.execute(
+                    sa.text(f"UPDATE {table} SET fecha = :fecha WHERE id = :id"),
+                    [{"id": row_id, "fecha": value} for row_id, value in normalized.items()]
+                )
+            if bind.dialect.name == "postgresql":
+                op.alter_column(table, "fecha", type_=sa.Date(), existing_nullable=False, postgresql_using="fecha::date")
+            # SQLite has no real DATE type (a batch copy would CAST the values to numbers);
+            # SQLAlchemy's Date type stores and reads ISO strings, so normalizing them is enough
+
+        if f"ix_{table}_fecha" not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(f"ix_{table}_fecha", table, ["fecha"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_fecha", table_name=table)
+        if bind.dialect.name == "postgresql":
+            op.alter_column(table, "fecha", type_=sa.String(), existing_nullable=False, postgresql_using="to_char(fecha, 'YYYY-MM-DD')")
@@ -0,0 +1,81 @@
+"""Add delta sync versions to tasks, task_assignments, schedules and registers
+
+Each synced table gets version and updated_at columns; sync_clock hands out versions
+and sync_tombstones records deleted rows. Existing rows keep version 0 and reach
+devices through their first full sync.
+
+Revision ID: 0003_sync_versions
+Revises: 0002_native_fecha_dates
+Create Date: 2025-12-01 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_sync_versions"
+down_revision: Union[str, Sequence[str], None] = "0002_native_fecha_dates"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Table -> columns of its version index
+TABLES = {
+    "tasks": ["empleado_id", "version"],
+    "task_assignments": ["empleado_id", "version"],
+    "schedules": ["version"],
+    "registers": ["version"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, index_columns in TABLES.items():
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        with op.batch_alter_table(table) as batch_op:
+            if "version" not in columns:
+                batch_op.add_column(sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"))
+            if "updated_at" not in columns:
+                batch_op.add_column(sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()))
+
+        index_name = f"ix_{table}_{'_'.join(index_columns)}"
+        if index_name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(index_name, table, index_columns)
+
+    # Tables may already exist when the app created them with create_all
+    existing_tables = inspector.get_table_names()
+    if "sync_clock" not in existing_tables:
+        op.create_table(
+            "sync_clock",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("version", sa.BigInteger(), nullable=False),
+            sa.Column("pruned_version", sa.BigInteger(), nullable=False),
+        )
+        op.execute("INSERT INTO sync_clock (id, version, pruned_version) VALUES (1, 0, 0)")
+    if "sync_tombstones" not in existing_tables:
+        op.create_table(
+            "sync_tombstones",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("entity", sa.String(), nullable=False),
+            sa.Column("row_id", sa.Integer(), nullable=False),
+            sa.Column("empleado_id", sa.Integer(), nullable=True),
+            sa.Column("version", sa.BigInteger(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_sync_tombstones_entity_version", "sync_tombstones", ["entity", "version"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("sync_tombstones")
+    op.drop_table("sync_clock")
+    for table, index_columns in TABLES.items():
+        op.drop_index(f"ix_{table}_{'_'.join(index_columns)}", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("updated_at")
+            batch_op.drop_column("version")
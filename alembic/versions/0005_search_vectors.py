@@ -0,0 +1,55 @@
+"""Add Spanish full-text search vectors with GIN indexes (Postgres only)
+
+tasks, task_definitions, procedures and register_entries get a generated
+search_vector tsvector column maintained by the database. Other databases
+search through the in-process index in app/search.py, so nothing changes there.
+
+Revision ID: 0005_search_vectors
+Revises: 0004_idempotency_records
+Create Date: 2025-12-15 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_search_vectors"
+down_revision: Union[str, Sequence[str], None] = "0004_idempotency_records"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TITLE_AND_DESCRIPTION = (
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(titulo, '')), 'A') || "
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(descripcion, '')), 'B')"
+)
+
+# Table -> generated tsvector expression; weights A (title) > B (description) > C (procedure steps)
+SEARCH_VECTORS = {
+    "tasks": TITLE_AND_DESCRIPTION,
+    "task_definitions": TITLE_AND_DESCRIPTION,
+    "procedures": TITLE_AND_DESCRIPTION + " || "
+                  "setweight(to_tsvector('spanish'::regconfig, coalesce((contenido -> 'procedimiento')::text, '') || ' ' || "
+                  "coalesce((contenido -> 'precauciones')::text, '')), 'C')",
+    "register_entries": "setweight(to_tsvector('spanish'::regconfig, coalesce(observaciones, '')), 'B')",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, expression in SEARCH_VECTORS.items():
+        # IF NOT EXISTS: create_schema adds the same columns on fresh databases
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({expression}) STORED")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in SEARCH_VECTORS:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
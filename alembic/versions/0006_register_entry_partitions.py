@@ -0,0 +1,166 @@
+"""Partition register_entries by month and add the archive catalog
+
+On every database: an index on (register_id, fecha_completado) and the
+register_entry_archives table used by app/archive.py.
+
+On Postgres register_entries becomes a table partitioned by range of
+fecha_completado: one partition per month from the oldest entry up to two
+months ahead, plus a default partition for rows without a date. Rows are
+copied into the new table and the id sequence is kept. A partitioned table
+cannot have a primary key without the partition column, so the new table
+has indexes on id and (register_id, fecha_completado) instead.
+
+Revision ID: 0006_register_entry_partitions
+Revises: 0005_search_vectors
+Create Date: 2025-12-22 09:00:00
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_register_entry_partitions"
+down_revision: Union[str, Sequence[str], None] = "0005_search_vectors"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "ix_register_entries_register_id_fecha_completado"
+MONTHS_AHEAD = 2
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+def _is_partitioned(bind) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'register_entries'"
+    )).scalar())
+
+
+def _rename_out_of_the_way(bind, table: str, suffix: str):
+    """Rename a table and its constraints/indexes so the replacement can reuse the names"""
+    inspector = sa.inspect(bind)
+    primary_key = inspector.get_pk_constraint(table).get("name")
+    indexes = [index["name"] for index in inspector.get_indexes(table)]
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_{suffix}")
+    if primary_key:
+        op.execute(f"ALTER TABLE {table}_{suffix} RENAME CONSTRAINT {primary_key} TO {primary_key}_{suffix}")
+    for name in indexes:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_{suffix}")
+    return inspector.get_foreign_keys(f"{table}_{suffix}")
+
+
+def _copy_rows(bind, source: str):
+    columns = ", ".join(column["name"] for column in sa.inspect(bind).get_columns(source) if column["name"] != "search_vector")
+    op.execute(f"INSERT INTO register_entries ({columns}) SELECT {columns} FROM {source}")
+
+
+def _take_over_sequence(bind, source: str):
+    sequence = bind.execute(sa.text(f"SELECT pg_get_serial_sequence('{source}', 'id')")).scalar()
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY register_entries.id")
+
+
+def _add_foreign_keys(foreign_keys):
+    for foreign_key in foreign_keys:
+        columns = ", ".join(foreign_key["constrained_columns"])
+        referred = ", ".join(foreign_key["referred_columns"])
+        op.execute(
+            f"ALTER TABLE register_entries ADD FOREIGN KEY ({columns}) REFERENCES {foreign_key['referred_table']} ({referred})"
+        )
+
+
+def _search_index(bind):
+    # Added by 0005 on Postgres; recreated on the new parent table
+    if "search_vector" in {column["name"] for column in sa.inspect(bind).get_columns("register_entries")}:
+        op.execute("CREATE INDEX IF NOT EXISTS ix_register_entries_search_vector ON register_entries USING gin (search_vector)")
+
+
+def _partition_postgres(bind):
+    foreign_keys = _rename_out_of_the_way(bind, "register_entries", "unpartitioned")
+    op.execute(
+        "CREATE TABLE register_entries (LIKE register_entries_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED) "
+        "PARTITION BY RANGE (fecha_completado)"
+    )
+
+    oldest = bind.execute(sa.text("SELECT min(fecha_completado) FROM register_entries_unpartitioned")).scalar()
+    today = datetime.now(timezone.utc).date()
+    month = date(oldest.year, oldest.month, 1) if oldest else date(today.year, today.month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE register_entries_{month.year:04d}_{month.month:02d} PARTITION OF register_entries "
+            f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(_add_months(month, 1))}')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE register_entries_default PARTITION OF register_entries DEFAULT")
+
+    op.execute("CREATE INDEX ix_register_entries_id ON register_entries (id)")
+    op.execute(f"CREATE INDEX {INDEX} ON register_entries (register_id, fecha_completado)")
+    _search_index(bind)
+    _add_foreign_keys(foreign_keys)
+
+    _copy_rows(bind, "register_entries_unpartitioned")
+    _take_over_sequence(bind, "register_entries_unpartitioned")
+    op.execute("DROP TABLE register_entries_unpartitioned")
+
+
+def _unpartition_postgres(bind):
+    foreign_keys = _rename_out_of_the_way(bind, "register_entries", "partitioned")
+    op.execute("CREATE TABLE register_entries (LIKE register_entries_partitioned INCLUDING DEFAULTS INCLUDING GENERATED)")
+    op.execute("ALTER TABLE register_entries ADD PRIMARY KEY (id)")
+    op.execute("CREATE INDEX ix_register_entries_id ON register_entries (id)")
+    _search_index(bind)
+    _add_foreign_keys(foreign_keys)
+
+    _copy_rows(bind, "register_entries_partitioned")
+    _take_over_sequence(bind, "register_entries_partitioned")
+    op.execute("DROP TABLE register_entries_partitioned")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # The table may already exist when the app created it with create_all
+    if "register_entry_archives" not in inspector.get_table_names():
+        op.create_table(
+            "register_entry_archives",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("register_id", sa.Integer(), nullable=False),
+            sa.Column("month", sa.Date(), nullable=False),
+            sa.Column("path", sa.String(), nullable=False, unique=True),
+            sa.Column("row_count", sa.Integer(), nullable=False),
+            sa.Column("sha256", sa.String(length=64), nullable=False),
+            sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_register_entry_archives_register_id_month", "register_entry_archives", ["register_id", "month"])
+
+    if bind.dialect.name == "postgresql":
+        if not _is_partitioned(bind):
+            _partition_postgres(bind)
+    elif INDEX not in {index["name"] for index in inspector.get_indexes("register_entries")}:
+        op.create_index(INDEX, "register_entries", ["register_id", "fecha_completado"])
+
+
+def downgrade() -> None:
+    """Downgrade schema. Entries already moved to archive files are not brought back."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        if _is_partitioned(bind):
+            _unpartition_postgres(bind)
+    else:
+        op.drop_index(INDEX, table_name="register_entries")
+    op.drop_index("ix_register_entry_archives_register_id_month", table_name="register_entry_archives")
+    op.drop_table("register_entry_archives")
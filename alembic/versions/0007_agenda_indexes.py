@@ -0,0 +1,37 @@
+"""Add (empleado_id, fecha) indexes to tasks and task_assignments for the agenda
+
+Both arms of the /agenda UNION ALL filter by employee and date range.
+
+Revision ID: 0007_agenda_indexes
+Revises: 0006_register_entry_partitions
+Create Date: 2026-01-12 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_agenda_indexes"
+down_revision: Union[str, Sequence[str], None] = "0006_register_entry_partitions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["tasks", "task_assignments"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        # The index may already exist when the app created the table with create_all
+        if f"ix_{table}_empleado_id_fecha" not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(f"ix_{table}_empleado_id_fecha", table, ["empleado_id", "fecha"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_empleado_id_fecha", table_name=table)
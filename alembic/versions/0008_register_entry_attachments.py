@@ -0,0 +1,48 @@
+"""Add register_entry_attachments for photo evidence
+
+Photos and thumbnails are files in the blob store; this table links them to register entries.
+
+Revision ID: 0008_register_entry_attachments
+Revises: 0007_agenda_indexes
+Create Date: 2026-01-26 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_register_entry_attachments"
+down_revision: Union[str, Sequence[str], None] = "0007_agenda_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The table may already exist when the app created it with create_all
+    if "register_entry_attachments" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "register_entry_attachments",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("register_entry_id", sa.Integer(), nullable=False, index=True),
+        sa.Column("register_id", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=True),
+        sa.Column("content_type", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=True),
+        sa.Column("height", sa.Integer(), nullable=True),
+        sa.Column("thumbnail_status", sa.String(), nullable=False, server_default="pending"),
+        sa.Column("thumbnail_sha256", sa.String(length=64), nullable=True),
+        sa.Column("uploaded_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema. Files stay in the blob store."""
+    op.drop_table("register_entry_attachments")
@@ -0,0 +1,46 @@
+"""Add audit_events for the asynchronous audit log
+
+Revision ID: 0009_audit_events
+Revises: 0008_register_entry_attachments
+Create Date: 2026-02-09 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_audit_events"
+down_revision: Union[str, Sequence[str], None] = "0008_register_entry_attachments"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The table may already exist when the app created it with create_all
+    if "audit_events" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("actor_id", sa.Integer(), nullable=True),
+        sa.Column("actor_name", sa.String(), nullable=True),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("entity_type", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.String(length=64), nullable=True),
+        sa.Column("changes", sa.JSON(), nullable=True),
+        sa.Column("method", sa.String(length=10), nullable=True),
+        sa.Column("path", sa.String(), nullable=True),
+    )
+    op.create_index("ix_audit_events_entity", "audit_events", ["entity_type", "entity_id", "occurred_at"])
+    op.create_index("ix_audit_events_actor_id_occurred_at", "audit_events", ["actor_id", "occurred_at"])
+    op.create_index("ix_audit_events_occurred_at", "audit_events", ["occurred_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("audit_events")
@@ -0,0 +1,36 @@
+"""Add revoked_tokens so signed token logouts reach every worker
+
+Revision ID: 0010_revoked_tokens
+Revises: 0009_audit_events
+Create Date: 2026-02-16 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_revoked_tokens"
+down_revision: Union[str, Sequence[str], None] = "0009_audit_events"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The table may already exist when the app created it with create_all
+    if "revoked_tokens" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(length=32), primary_key=True),
+        sa.Column("exp", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_revoked_tokens_exp", "revoked_tokens", ["exp"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,234 @@
+"""
+Cold archival of register entries: closed months leave register_entries for compressed NDJSON files
+
+Entries whose fecha_completado falls in a month older than REGISTER_ARCHIVE_AFTER_MONTHS are
+written to one gzip NDJSON file per register and month under REGISTER_ARCHIVE_DIR, recorded in
+register_entry_archives, and removed from the hot table. On Postgres register_entries is
+partitioned by month (migration 0006), so removing a fully archived month drops its partition
+instead of deleting rows. Readers go through read_archived_entries, which only opens the files
+the catalog lists for the requested register and range.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.metrics import register_archive_job
+from app.models import RegisterEntry, RegisterEntryArchive
+from app.search import forget
+
+logger = logging.getLogger(__name__)
+
+REGISTER_ARCHIVE_DIR = os.environ.get("REGISTER_ARCHIVE_DIR", "archives")
+# Months kept in the hot table besides the current one
+REGISTER_ARCHIVE_AFTER_MONTHS = int(os.environ.get("REGISTER_ARCHIVE_AFTER_MONTHS", "6"))
+# Postgres partitions created ahead of the current month
+PARTITION_MONTHS_AHEAD = 2
+
+COLUMNS = [column.key for column in inspect(RegisterEntry).column_attrs]
+DATETIME_COLUMNS = {"fecha_completado", "created_at"}
+
+
+class ArchiveUnavailable(Exception):
+    """A catalogued archive file is missing or does not match its checksum"""
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _utc(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def archive_cutoff(today: Optional[date] = None) -> date:
+    """First month that stays in the hot table"""
+    return add_months(month_start(today or datetime.now(timezone.utc).date()), -REGISTER_ARCHIVE_AFTER_MONTHS)
+
+
+def partition_name(month: date) -> str:
+    return f"register_entries_{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(bind) -> bool:
+    if bind.dialect.name != "postgresql":
+        return False
+    return bool(bind.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'register_entries'"
+    )).scalar())
+
+
+def ensure_partitions(engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Create monthly partitions from the current month up to `months_ahead` ahead; returns the new ones"""
+    created = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return created
+        current = month_start(datetime.now(timezone.utc).date())
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+                continue
+            # Fails when the default partition already holds rows for this month; those stay there
+            savepoint = conn.begin_nested()
+            try:
+                conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF register_entries "
+                    f"FOR VALUES FROM ('{_utc(month).isoformat()}') TO ('{_utc(add_months(month, 1)).isoformat()}')"
+                ))
+                savepoint.commit()
+                created.append(name)
+            except Exception:
+                savepoint.rollback()
+                logger.warning("Could not create partition %s; its rows stay in the default partition", name, exc_info=True)
+    return created
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _archive_path(archive_dir: str, register_id: int, month: date) -> str:
+    """Relative path for a new archive file; later runs for the same month get a numbered part"""
+    base = os.path.join("register_entries", f"register_{register_id}", f"{month:%Y-%m}")
+    path, part = f"{base}.ndjson.gz", 1
+    while os.path.exists(os.path.join(archive_dir, path)):
+        path, part = f"{base}.{part}.ndjson.gz", part + 1
+    return path
+
+
+def _write_archive(archive_dir: str, register_id: int, month: date, rows: List[Dict[str, Any]]) -> RegisterEntryArchive:
+    path = _archive_path(archive_dir, register_id, month)
+    full_path = os.path.join(archive_dir, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+    # Write and fsync under a temporary name so a crash never leaves a truncated archive behind
+    temporary = f"{full_path}.tmp"
+    with open(temporary, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as compressed:
+            for row in rows:
+                compressed.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temporary, full_path)
+
+    with open(full_path, "rb") as handle:
+        digest = hashlib.sha256(handle.read()).hexdigest()
+    return RegisterEntryArchive(register_id=register_id, month=month, path=path, row_count=len(rows), sha256=digest)
+
+
+def _remove_hot_rows(db: Session, month: date, archived: int):
+    start, end = _utc(month), _utc(add_months(month, 1))
+    bind = db.connection()
+    name = partition_name(month)
+    if is_partitioned(bind) and bind.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        in_partition = bind.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        if in_partition == archived:
+            bind.execute(text(f"ALTER TABLE register_entries DETACH PARTITION {name}"))
+            bind.execute(text(f"DROP TABLE {name}"))
+            return
+    db.query(RegisterEntry).filter(
+        RegisterEntry.fecha_completado >= start, RegisterEntry.fecha_completado < end
+    ).delete(synchronize_session=False)
+
+
+def archive_month(db: Session, month: date, archive_dir: str = REGISTER_ARCHIVE_DIR) -> int:
+    """Move one month of entries to archive files; returns the number of rows archived"""
+    start, end = _utc(month), _utc(add_months(month, 1))
+    entries = db.query(RegisterEntry).filter(
+        RegisterEntry.fecha_completado >= start, RegisterEntry.fecha_completado < end
+    ).order_by(RegisterEntry.register_id, RegisterEntry.fecha_completado, RegisterEntry.id)
+
+    archives, rows, current_register = [], [], None
+    archived_ids = []
+    for entry in entries.yield_per(1000):
+        if entry.register_id != current_register and rows:
+            archives.append(_write_archive(archive_dir, current_register, month, rows))
+            rows = []
+        current_register = entry.register_id
+        rows.append({column: _json_value(getattr(entry, column)) for column in COLUMNS})
+        archived_ids.append(entry.id)
+    if rows:
+        archives.append(_write_archive(archive_dir, current_register, month, rows))
+    if not archived_ids:
+        return 0
+
+    # Files are durable before the rows go; a crash in between leaves uncatalogued files, never lost rows
+    db.add_all(archives)
+    _remove_hot_rows(db, month, len(archived_ids))
+    db.commit()
+
+    forget(db.get_bind(), "register_entry", archived_ids)
+    logger.info("Archived %d register entries for %s into %d files", len(archived_ids), f"{month:%Y-%m}", len(archives))
+    return len(archived_ids)
+
+
+@register_archive_job.timed
+def archive_closed_months(db: Session, archive_dir: str = REGISTER_ARCHIVE_DIR, before: Optional[date] = None) -> Dict[str, int]:
+    """Archive every month before `before` (default: archive_cutoff()) that still has hot rows"""
+    before = month_start(before or archive_cutoff())
+    oldest = db.query(func.min(RegisterEntry.fecha_completado)).filter(RegisterEntry.fecha_completado < _utc(before)).scalar()
+    archived = {}
+    if oldest is None:
+        return archived
+    month = month_start(oldest)
+    while month < before:
+        count = archive_month(db, month, archive_dir)
+        if count:
+            archived[f"{month:%Y-%m}"] = count
+        month = add_months(month, 1)
+    return archived
+
+
+def _parse_row(row: Dict[str, Any]) -> SimpleNamespace:
+    for column in DATETIME_COLUMNS:
+        if row.get(column):
+            row[column] = datetime.fromisoformat(row[column])
+    return SimpleNamespace(**row)
+
+
+def read_archived_entries(
+    db: Session,
+    register_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    archive_dir: str = REGISTER_ARCHIVE_DIR,
+) -> Iterator[SimpleNamespace]:
+    """Archived entries of a register within [start, end], newest month first, with RegisterEntry attributes"""
+    query = db.query(RegisterEntryArchive).filter(RegisterEntryArchive.register_id == register_id)
+    if start is not None:
+        query = query.filter(RegisterEntryArchive.month >= month_start(start))
+    if end is not None:
+        query = query.filter(RegisterEntryArchive.month <= end.date())
+
+    for archive in query.order_by(RegisterEntryArchive.month.desc(), RegisterEntryArchive.id.desc()).all():
+        try:
+            with open(os.path.join(archive_dir, archive.path), "rb") as handle:
+                data = handle.read()
+            if hashlib.sha256(data).hexdigest() != archive.sha256:
+                raise ArchiveUnavailable(f"Archive {archive.path} does not match its checksum")
+            rows = [_parse_row(json.loads(line)) for line in gzip.decompress(data).decode("utf-8").splitlines()]
+        except (OSError, ValueError) as error:
+            raise ArchiveUnavailable(f"Archive {archive.path} could not be read: {error}")
+
+        rows.sort(key=lambda row: row.fecha_completado, reverse=True)
+        for row in rows:
+            completed = row.fecha_completado
+            if completed.tzinfo is None:
+                completed = completed.replace(tzinfo=timezone.utc)
+            if (start is None or completed >= start) and (end is None or completed <= end):
+                yield row
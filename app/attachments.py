@@ -0,0 +1,133 @@
+"""
+Photo evidence for register entries: blob storage, attachment rows and background thumbnails
+
+Photos are streamed into the blob store by the upload endpoint, so a file is never held in
+memory, and identical photos (retried uploads) share one file. Thumbnails are rendered in
+the process pool of app/thumbnails.py after the upload has been answered; a thumbnail that
+is still missing when requested is rendered on demand.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.blobs import BLOB_STORE_DIR, BlobStore
+from app.models import RegisterEntryAttachment
+from app.thumbnails import UndecodableImage, render_thumbnail_async
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_MAX_BYTES = int(os.environ.get("ATTACHMENT_MAX_BYTES", str(20 * 1024 * 1024)))
+ATTACHMENT_MAX_FILES = int(os.environ.get("ATTACHMENT_MAX_FILES", "10"))
+
+photo_store = BlobStore(os.path.join(BLOB_STORE_DIR, "photos"))
+thumbnail_store = BlobStore(os.path.join(BLOB_STORE_DIR, "thumbnails"))
+
+# Running thumbnail tasks; asyncio keeps only weak references to tasks
+_background = set()
+
+
+def attachment_to_dict(attachment: RegisterEntryAttachment) -> Dict[str, Any]:
+    base = f"/registers/entries/{attachment.register_entry_id}/attachments/{attachment.id}"
+    return {
+        "id": attachment.id,
+        "register_entry_id": attachment.register_entry_id,
+        "register_id": attachment.register_id,
+        "filename": attachment.filename,
+        "content_type": attachment.content_type,
+        "size_bytes": attachment.size_bytes,
+        "sha256": attachment.sha256,
+        "width": attachment.width,
+        "height": attachment.height,
+        "thumbnail_status": attachment.thumbnail_status,
+        "url": base,
+        "thumbnail_url": f"{base}/thumbnail" if attachment.thumbnail_status != "failed" else None,
+        "created_at": attachment.created_at.isoformat() if attachment.created_at else None
+    }
+
+
+def reuse_thumbnails(db: Session, attachments: Iterable[RegisterEntryAttachment]) -> List[RegisterEntryAttachment]:
+    """Copy thumbnails from earlier uploads of the same photo; returns the attachments still needing one"""
+    attachments = list(attachments)
+    done = {
+        row.sha256: row for row in db.query(RegisterEntryAttachment).filter(
+            RegisterEntryAttachment.sha256.in_({attachment.sha256 for attachment in attachments}),
+            RegisterEntryAttachment.thumbnail_status == "ready"
+        )
+    }
+    pending = []
+    for attachment in attachments:
+        source = done.get(attachment.sha256)
+        if source is None:
+            pending.append(attachment)
+            continue
+        attachment.thumbnail_status = "ready"
+        attachment.thumbnail_sha256 = source.thumbnail_sha256
+        attachment.width, attachment.height = source.width, source.height
+    return pending
+
+
+def _record_thumbnail(session_factory, attachment_id: int, digest: Optional[str], width: Optional[int], height: Optional[int]):
+    db = session_factory()
+    try:
+        db.query(RegisterEntryAttachment).filter(RegisterEntryAttachment.id == attachment_id).update({
+            "thumbnail_status": "ready" if digest else "failed",
+            "thumbnail_sha256": digest,
+            "width": width,
+            "height": height,
+        })
+        db.commit()
+    finally:
+        db.close()
+
+
+async def create_thumbnail(session_factory, attachment_id: int, sha256: str) -> Optional[str]:
+    """Render in the process pool and record the result; returns the thumbnail digest, or None
+
+    Only a photo that cannot be decoded is marked failed. Pool or disk trouble leaves the
+    attachment pending, so the next thumbnail request renders it again.
+    """
+    try:
+        data, width, height = await render_thumbnail_async(photo_store.path(sha256))
+    except UndecodableImage as error:
+        logger.warning("Attachment %s cannot be decoded: %s", attachment_id, error)
+        await run_in_threadpool(_record_thumbnail, session_factory, attachment_id, None, None, None)
+        return None
+    except Exception:
+        logger.warning("Could not render the thumbnail of attachment %s, will retry on request", attachment_id, exc_info=True)
+        return None
+    try:
+        digest = await run_in_threadpool(thumbnail_store.put, data)
+    except Exception:
+        logger.warning("Could not store the thumbnail of attachment %s, will retry on request", attachment_id, exc_info=True)
+        return None
+    await run_in_threadpool(_record_thumbnail, session_factory, attachment_id, digest, width, height)
+    return digest
+
+
+def schedule_thumbnails(session_factory, attachments: Iterable[RegisterEntryAttachment]):
+    """Render thumbnails in the background, after the upload has been answered"""
+    for attachment in attachments:
+        task = asyncio.ensure_future(create_thumbnail(session_factory, attachment.id, attachment.sha256))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+
+def ready_thumbnail_paths(db: Session, entry_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """Thumbnail files per register entry, in upload order; attachments without a thumbnail yet are left out"""
+    paths: Dict[int, List[str]] = {}
+    entry_ids = list(entry_ids)
+    if not entry_ids:
+        return paths
+    attachments = db.query(RegisterEntryAttachment).filter(
+        RegisterEntryAttachment.register_entry_id.in_(entry_ids),
+        RegisterEntryAttachment.thumbnail_status == "ready"
+    ).order_by(RegisterEntryAttachment.id)
+    for attachment in attachments:
+        path = thumbnail_store.path(attachment.thumbnail_sha256)
+        if os.path.exists(path):
+            paths.setdefault(attachment.register_entry_id, []).append(path)
+    return paths
@@ -0,0 +1,461 @@
+"""
+Audit log: who changed what, written off the request path
+
+Every mutating request runs with an AuditContext whose caller is taken from its x-demo-token
+header, whether or not the route itself checks the token. ORM commits touching an audited model turn each changed row into an event (changed
+fields with old and new values) and hand them to the app's AuditLog, whose writer thread
+bulk-inserts them every AUDIT_BATCH_SIZE events or AUDIT_FLUSH_MS, so a request pays for a
+queue put instead of an extra INSERT and commit. Changes that do not go through the ORM (roles
+are kept in memory) call record_event; any other successful mutating request leaves one
+generic event so no endpoint goes unaudited.
+
+The queue is bounded. When the writer falls behind, producers wait up to
+AUDIT_ENQUEUE_TIMEOUT_MS for room and then write their own events, which slows requests down
+instead of growing memory or dropping records. That waiting never happens on the event loop:
+commits made there leave their overflow to AuditMiddleware, which waits in the threadpool.
+Events are visible to GET /audit/events once written, at most AUDIT_FLUSH_MS after the commit.
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.health import heartbeats
+from app.models import (
+    AuditEvent, Employee, Procedure, RecurringTask, Register, RegisterEntry, RegisterEntryAttachment, Role,
+    Schedule, ShiftDefinition, Task, TaskAssignment, TaskDefinition,
+)
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_MS = int(os.environ.get("AUDIT_FLUSH_MS", "500"))
+AUDIT_ENQUEUE_TIMEOUT_MS = int(os.environ.get("AUDIT_ENQUEUE_TIMEOUT_MS", "1000"))
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+AUDITED_MODELS = {
+    Employee, Schedule, ShiftDefinition, Task, TaskDefinition, TaskAssignment, RecurringTask,
+    Register, Procedure, RegisterEntry, RegisterEntryAttachment, Role,
+}
+# Bookkeeping columns that change on every write and say nothing about who changed what
+IGNORED_FIELDS = {"version", "updated_at"}
+REDACTED_FIELDS = {"password"}
+MAX_VALUE_CHARS = 500
+
+# Writer retries before a batch is given up (and logged in full)
+WRITE_ATTEMPTS = 3
+# The writer wakes at least this often, beating its heartbeat even when idle
+IDLE_WAKE_SECONDS = 30
+
+_PENDING = "audit_pending_events"
+_COMMITTED = "audit_committed_events"
+_STOP = object()
+
+
+class AuditContext:
+    """Method, path and caller of the current mutating request"""
+
+    def __init__(self, method: str, path: str, audit_log: "AuditLog"):
+        self.method = method
+        self.path = path
+        self.audit_log = audit_log
+        self.actor: Optional[Dict[str, Any]] = None
+        self.recorded = 0
+        # Events that found the queue full on the event loop; the middleware waits for room off the loop
+        self.overflow: List[Dict[str, Any]] = []
+
+
+_current_context: ContextVar[Optional[AuditContext]] = ContextVar("audit_context", default=None)
+
+
+def set_actor(user: Dict[str, Any]):
+    """Remember who is making the current request; called once the token is resolved"""
+    context = _current_context.get()
+    if context is not None:
+        # The context object is shared with the request, even from threadpool dependencies
+        context.actor = user
+
+
+class AuditLog:
+    """Bounded queue of audit events drained in batches by a writer thread"""
+
+    def __init__(self, session_factory, queue_size: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_ms: int = AUDIT_FLUSH_MS, enqueue_timeout_ms: int = AUDIT_ENQUEUE_TIMEOUT_MS):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.enqueue_timeout = enqueue_timeout_ms / 1000
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Set by stop(); events after that are written by their producers, off the event loop
+        self._closed = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.overflow_writes = 0
+        self.failed = 0
+
+    def start(self):
+        with self._lock:
+            self._closed = False
+            self._start_writer()
+
+    def _start_writer(self):
+        if self._thread is None and not self._closed:
+            heartbeats.register("audit_writer", max_age_seconds=IDLE_WAKE_SECONDS * 3)
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Write what is queued and stop the writer; later events are written by their producers"""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def offer(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Queue what fits without waiting; returns the events that did not fit"""
+        with self._lock:
+            # Events committed before the lifespan starts (startup seeding) start the writer early
+            self._start_writer()
+            if self._closed:
+                return events
+        for index, item in enumerate(events):
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                return events[index:]
+            self.enqueued += 1
+        return []
+
+    def put_blocking(self, events: List[Dict[str, Any]]):
+        """Wait for queue room, then write what still does not fit; blocks, so never call it on the event loop"""
+        if self._closed:
+            self._write(events)
+            return
+        for index, item in enumerate(events):
+            try:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+            except queue.Full:
+                # The writer is a whole queue behind; write here rather than drop compliance records
+                self.overflow_writes += 1
+                self._write(events[index:])
+                return
+            self.enqueued += 1
+
+    def submit(self, events: List[Dict[str, Any]], context: Optional[AuditContext] = None):
+        """Queue events from synchronous code (ORM hooks); never blocks the event loop"""
+        rest = self.offer(events)
+        if not rest:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # A threadpool or background thread: waiting here slows down just this producer
+            self.put_blocking(rest)
+            return
+        if context is not None:
+            context.overflow.extend(rest)
+        else:
+            loop.run_in_executor(None, self.put_blocking, rest)
+
+    async def enqueue(self, events: List[Dict[str, Any]]):
+        """Queue events from async code, waiting for room in the threadpool when the queue is full"""
+        rest = self.offer(events)
+        if rest:
+            await run_in_threadpool(self.put_blocking, rest)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None,
+            "queued": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "overflow_writes": self.overflow_writes,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=IDLE_WAKE_SECONDS)
+            except queue.Empty:
+                heartbeats.beat("audit_writer")
+                continue
+            if first is _STOP:
+                break
+            # Collect up to a batch, waiting no longer than the flush interval after the first event
+            batch = [first]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            heartbeats.beat("audit_writer")
+
+        # Events queued while stopping
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            self._write(leftover[start:start + self.batch_size])
+
+    def _write(self, events: List[Dict[str, Any]]):
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            db = self.session_factory()
+            try:
+                # Connection first, then the SQLite writer lock (taken by execute), in the order
+                # request sessions take them; the reverse order can deadlock with a full pool
+                db.connection()
+                # One executemany for the whole batch
+                db.execute(insert(AuditEvent), events)
+                db.commit()
+                self.written += len(events)
+                self.batches += 1
+                return
+            except Exception:
+                db.rollback()
+                if attempt == WRITE_ATTEMPTS:
+                    self.failed += len(events)
+                    logger.exception(
+                        "Could not write %d audit events: %s", len(events), json.dumps(events, default=str)[:100000]
+                    )
+                    return
+                logger.warning("Writing %d audit events failed, retrying", len(events), exc_info=True)
+            finally:
+                db.close()
+            time.sleep(0.5 * 2 ** (attempt - 1))
+
+
+_logs: "weakref.WeakKeyDictionary[Engine, AuditLog]" = weakref.WeakKeyDictionary()
+
+
+def register_audit_log(engine: Engine, audit_log: AuditLog):
+    """Route ORM changes made through this engine to this log"""
+    _logs[engine] = audit_log
+
+
+def _plain(value: Any) -> Any:
+    """JSON-friendly, bounded copy of a column value"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str) and len(value) > MAX_VALUE_CHARS:
+        return value[:MAX_VALUE_CHARS] + "…"
+    if isinstance(value, (list, dict)):
+        text = json.dumps(value, default=str)
+        return value if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS] + "…"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _field_value(key: str, value: Any) -> Any:
+    return "***" if key in REDACTED_FIELDS and value is not None else _plain(value)
+
+
+def _entity_id(obj) -> Optional[str]:
+    key = inspect(obj).mapper.primary_key_from_instance(obj)
+    return ",".join(str(part) for part in key) if all(part is not None for part in key) else None
+
+
+def _row_values(obj) -> Dict[str, Any]:
+    # Only loaded attributes: the flush hook must not emit queries
+    state = inspect(obj)
+    return {
+        attr.key: _field_value(attr.key, state.dict[attr.key])
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict and attr.key not in IGNORED_FIELDS
+    }
+
+
+def _row_changes(obj) -> Dict[str, List[Any]]:
+    state = inspect(obj)
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in IGNORED_FIELDS:
+            continue
+        history = state.attrs[attr.key].history
+        if not history.has_changes():
+            continue
+        old = history.deleted[0] if history.deleted else None
+        new = history.added[0] if history.added else None
+        if old != new:
+            changes[attr.key] = [_field_value(attr.key, old), _field_value(attr.key, new)]
+    return changes
+
+
+def _collect_events(session: Session, flush_context):
+    if session.get_bind() not in _logs:
+        return
+    events = []
+    for action, objects in (("create", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            if type(obj) not in AUDITED_MODELS:
+                continue
+            if action == "update":
+                changes = _row_changes(obj)
+                if not changes:
+                    continue
+            else:
+                changes = _row_values(obj)
+            events.append({
+                "action": action,
+                "entity_type": obj.__tablename__,
+                "entity_id": _entity_id(obj),
+                "changes": changes,
+            })
+    if events:
+        session.info.setdefault(_PENDING, []).extend(events)
+
+
+def _stamp(events: List[Dict[str, Any]], context: Optional[AuditContext]) -> List[Dict[str, Any]]:
+    occurred_at = datetime.now(timezone.utc)
+    actor = context.actor if context is not None else None
+    for item in events:
+        item.update({
+            "occurred_at": occurred_at,
+            "actor_id": actor.get("id") if actor else None,
+            "actor_name": (actor.get("nombre") or actor.get("email")) if actor else None,
+            "method": context.method if context is not None else None,
+            "path": context.path if context is not None else None,
+        })
+    if context is not None:
+        context.recorded += len(events)
+    return events
+
+
+def _commit_events(session: Session):
+    events = session.info.pop(_PENDING, None)
+    if events:
+        session.info[_COMMITTED] = _stamp(events, _current_context.get())
+
+
+def _discard_events(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+def _hand_over_events(session: Session, transaction):
+    # After the transaction has ended, so a producer waiting for queue room holds no writer lock
+    if transaction.parent is not None:
+        return
+    events = session.info.pop(_COMMITTED, None)
+    if events:
+        audit_log = _logs.get(session.get_bind())
+        if audit_log is not None:
+            audit_log.submit(events, _current_context.get())
+
+
+def install_audit_hooks():
+    """Queue audit events for ORM commits on engines with a registered AuditLog; safe to call more than once"""
+    if not event.contains(Session, "after_flush", _collect_events):
+        event.listen(Session, "after_flush", _collect_events)
+        event.listen(Session, "after_commit", _commit_events)
+        event.listen(Session, "after_rollback", _discard_events)
+        # Registered after the SQLite writer queue's listener, which releases the writer lock first
+        event.listen(Session, "after_transaction_end", _hand_over_events)
+
+
+def record_event(action: str, entity_type: str, entity_id: Any = None, changes: Optional[Dict[str, Any]] = None):
+    """Audit a change that does not go through the ORM; only inside a mutating request"""
+    context = _current_context.get()
+    if context is None:
+        return
+    context.audit_log.submit(_stamp([{
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": str(entity_id) if entity_id is not None else None,
+        "changes": {key: _plain(value) for key, value in (changes or {}).items()},
+    }], context), context)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for header_name, value in scope.get("headers", []):
+        if header_name == name:
+            return value.decode("latin-1")
+    return None
+
+
+class AuditMiddleware:
+    """ASGI middleware: gives mutating requests an AuditContext and audits those that recorded nothing else"""
+
+    def __init__(self, app, audit_log: AuditLog, resolve_actor: Callable[[Optional[str]], Optional[Dict[str, Any]]]):
+        self.app = app
+        self.audit_log = audit_log
+        # app.auth.resolve_token, passed in because app.auth imports set_actor from here
+        self.resolve_actor = resolve_actor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        context = AuditContext(scope["method"], scope["path"], self.audit_log)
+        # Many routes take x-demo-token without resolving it; their changes still need an actor
+        context.actor = self.resolve_actor(_header(scope, b"x-demo-token"))
+        token = _current_context.set(context)
+        status = {}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_context.reset(token)
+
+        # Backpressure: a request whose events found the queue full waits for room off the event loop
+        if context.overflow:
+            await run_in_threadpool(self.audit_log.put_blocking, context.overflow)
+
+        # Authenticated, successful, and nothing audited: keep at least the request itself
+        if context.actor is not None and context.recorded == 0 and status.get("code", 500) < 400:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or scope["path"]
+            path_params = scope.get("path_params") or {}
+            await self.audit_log.enqueue(_stamp([{
+                "action": "request",
+                "entity_type": route_path.strip("/").split("/")[0] or "root",
+                "entity_id": str(next(iter(path_params.values()))) if path_params else None,
+                "changes": {"route": route_path},
+            }], context))
@@ -0,0 +1,153 @@
+"""
+Authentication and permission checks shared by the routers: session store, token resolution, permission catalog
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+
+from app.audit import set_actor
+from app.database import get_db
+from app.models import Role
+from app.tokens import decode_token, user_from_claims
+
+# Permission system
+permissions_db = [
+    # Schedule Management
+    {"id": "schedules.view", "name": "Ver Horarios", "description": "Puede ver los horarios de trabajo", "category": "schedules"},
+    {"id": "schedules.create", "name": "Crear Horarios", "description": "Puede crear nuevos horarios", "category": "schedules"},
+    {"id": "schedules.edit", "name": "Editar Horarios", "description": "Puede modificar horarios existentes", "category": "schedules"},
+    {"id": "schedules.delete", "name": "Eliminar Horarios", "description": "Puede eliminar horarios", "category": "schedules"},
+    
+    # Task Management
+    {"id": "tasks.view", "name": "Ver Tareas", "description": "Puede ver las tareas asignadas", "category": "tasks"},
+    {"id": "tasks.view_all", "name": "Ver Todas las Tareas", "description": "Puede ver tareas de todos los empleados", "category": "tasks"},
+    {"id": "tasks.create", "name": "Crear Tareas", "description": "Puede crear nuevas tareas", "category": "tasks"},
+    {"id": "tasks.edit", "name": "Editar Tareas", "description": "Puede modificar tareas", "category": "tasks"},
+    {"id": "tasks.delete", "name": "Eliminar Tareas", "description": "Puede eliminar tareas", "category": "tasks"},
+    {"id": "tasks.assign", "name": "Asignar Tareas", "description": "Puede asignar tareas a empleados", "category": "tasks"},
+    
+    # Employee Management
+    {"id": "employees.view", "name": "Ver Empleados", "description": "Puede ver la lista de empleados", "category": "employees"},
+    {"id": "employees.create", "name": "Crear Empleados", "description": "Puede crear nuevos empleados", "category": "employees"},
+    {"id": "employees.edit", "name": "Editar Empleados", "description": "Puede modificar información de empleados", "category": "employees"},
+    {"id": "employees.deactivate", "name": "Desactivar Empleados", "description": "Puede desactivar empleados", "category": "employees"},
+    
+    # Register Management
+    {"id": "registers.view", "name": "Ver Registros", "description": "Puede ver los registros", "category": "registers"},
+    {"id": "registers.create", "name": "Crear Registros", "description": "Puede crear nuevos registros", "category": "registers"},
+    {"id": "registers.edit", "name": "Editar Registros", "description": "Puede modificar registros", "category": "registers"},
+    {"id": "registers.delete", "name": "Eliminar Registros", "description": "Puede eliminar registros", "category": "registers"},
+    {"id": "registers.fill", "name": "Llenar Registros", "description": "Puede completar entradas de registros", "category": "registers"},
+    
+    # System Administration
+    {"id": "system.manage_roles", "name": "Gestionar Roles", "description": "Puede crear y modificar roles", "category": "system"},
+    {"id": "system.manage_permissions", "name": "Gestionar Permisos", "description": "Puede asignar permisos a roles", "category": "system"},
+    {"id": "system.view_reports", "name": "Ver Reportes", "description": "Puede acceder a reportes del sistema", "category": "system"},
+    {"id": "system.export_data", "name": "Exportar Datos", "description": "Puede exportar datos en PDF y otros formatos", "category": "system"},
+]
+
+# Role-Permission mappings
+role_permissions_db = {
+    "admin": [
+        # Full system access
+        "schedules.view", "schedules.create", "schedules.edit", "schedules.delete",
+        "tasks.view", "tasks.view_all", "tasks.create", "tasks.edit", "tasks.delete", "tasks.assign",
+        "employees.view", "employees.create", "employees.edit", "employees.deactivate",
+        "registers.view", "registers.create", "registers.edit", "registers.delete", "registers.fill",
+        "system.manage_roles", "system.manage_permissions", "system.view_reports", "system.export_data"
+    ],
+    "encargado": [
+        # Management level access
+        "schedules.view", "schedules.create", "schedules.edit",
+        "tasks.view", "tasks.view_all", "tasks.create", "tasks.edit", "tasks.assign",
+        "employees.view", "employees.create", "employees.edit",
+        "registers.view", "registers.create", "registers.edit", "registers.fill",
+        "system.view_reports", "system.export_data"
+    ],
+    "trabajador": [
+        # Basic worker access
+        "schedules.view",
+        "tasks.view", "tasks.edit",  # Only edit their own tasks
+        "registers.view", "registers.fill"
+    ]
+}
+
+# Session store for user contexts (in-memory for demo)
+session_store = {}
+
+def resolve_token(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Look up the user for a session token or a signed token; None if neither is valid"""
+    if not token:
+        return None
+    if token in session_store:
+        return session_store[token]
+    
+    # Signed tokens carry the user context themselves, so any worker can verify them
+    claims = decode_token(token)
+    return user_from_claims(claims) if claims else None
+
+# Permission checking utilities
+def get_user_from_token(x_demo_token: Optional[str] = Header(None), db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """Extract user information from token"""
+    if not x_demo_token:
+        raise HTTPException(status_code=401, detail="Authentication token required")
+    
+    # Check if user session exists for this token
+    user = resolve_token(x_demo_token)
+    if user:
+        set_actor(user)
+        return user
+    
+    # If no session, token is invalid or expired
+    raise HTTPException(status_code=401, detail="Invalid token or session expired. Please login again.")
+
+def has_permission(user: Dict[str, Any], permission: str, db: Session = None) -> bool:
+    """Check if user has a specific permission"""
+    if db is None:
+        # Create a new session if none provided
+        from app.database import SessionLocal
+        db = SessionLocal()
+        should_close = True
+    else:
+        should_close = False
+    
+    try:
+        user_role = user.get("role", "")
+        
+        # Query the role from database
+        role = db.query(Role).filter(Role.id == user_role).first()
+        if role:
+            # Check if permission is in the role's permissions list
+            role_permissions = role.permissions or []
+            return permission in role_permissions
+        
+        # Fallback to in-memory role_permissions_db if role not found in database
+        role_permissions = role_permissions_db.get(user_role, [])
+        return permission in role_permissions
+        
+    finally:
+        if should_close:
+            db.close()
+
+def require_permission(permission: str):
+    """Dependency to require a specific permission"""
+    def permission_checker(user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+        if not has_permission(user, permission, db):
+            raise HTTPException(
+                status_code=403, 
+                detail=f"Insufficient permissions. Required: {permission}"
+            )
+        return user
+    return permission_checker
+
+def require_any_permission(permissions: List[str]):
+    """Dependency to require any of the specified permissions"""
+    def permission_checker(user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+        if not any(has_permission(user, perm, db) for perm in permissions):
+            raise HTTPException(
+                status_code=403, 
+                detail=f"Insufficient permissions. Required one of: {', '.join(permissions)}"
+            )
+        return user
+    return permission_checker
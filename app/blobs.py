@@ -0,0 +1,197 @@
+"""
+Content-addressed blob store on local disk, used for drawn signature images and entry photos
+
+A blob is stored once under its SHA-256 (BLOB_STORE_DIR/ab/cd/abcd...) and never changes, so
+identical uploads share one file and readers can cache it forever. Register entries keep a
+"sha256:<hex>" reference in firma_empleado/firma_supervisor instead of the inline image;
+plain text signatures such as "Firmado digitalmente" are stored as before.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import uuid
+from typing import Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models import RegisterEntry
+
+BLOB_STORE_DIR = os.environ.get("BLOB_STORE_DIR", "blobs")
+SIGNATURE_MAX_BYTES = int(os.environ.get("SIGNATURE_MAX_BYTES", str(512 * 1024)))
+
+REFERENCE_PREFIX = "sha256:"
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL = re.compile(r"^data:image/[A-Za-z0-9.+-]+;base64,", re.IGNORECASE)
+# Raster formats only: an SVG signature could carry script
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+class InvalidBlob(ValueError):
+    """Data that cannot be stored: not a supported image, too large, or a malformed data URL"""
+
+
+def is_digest(value: str) -> bool:
+    return bool(value) and bool(_DIGEST.match(value))
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Media type from the file signature; None for anything but PNG, JPEG and WebP"""
+    for magic, media_type in _SIGNATURES:
+        if data.startswith(magic):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class BlobWriter:
+    """Streams one blob to a temporary file, hashing as it goes; commit() moves it to its digest path
+
+    Every method does blocking file I/O; async callers run them in the threadpool.
+    """
+
+    def __init__(self, store: "BlobStore"):
+        self.store = store
+        self.size = 0
+        # First bytes, for sniffing the file type
+        self.head = b""
+        self._hash = hashlib.sha256()
+        os.makedirs(store.root, exist_ok=True)
+        self._temporary = os.path.join(store.root, f".{uuid.uuid4().hex}.tmp")
+        self._handle = open(self._temporary, "wb")
+
+    def write(self, chunk: bytes):
+        if len(self.head) < 16:
+            self.head = (self.head + chunk)[:16]
+        self._hash.update(chunk)
+        self._handle.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> str:
+        """Make the blob durable and return its digest; blocking, so run it off the event loop"""
+        digest = self._hash.hexdigest()
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        path = self.store.path(digest)
+        if os.path.exists(path):
+            os.unlink(self._temporary)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(self._temporary, 0o444)
+            os.replace(self._temporary, path)
+        return digest
+
+    def abort(self):
+        if not self._handle.closed:
+            self._handle.close()
+        if os.path.exists(self._temporary):
+            os.unlink(self._temporary)
+
+
+class BlobStore:
+    """Immutable files keyed by the SHA-256 of their content"""
+
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        if not is_digest(digest):
+            raise InvalidBlob(f"Not a SHA-256 digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return is_digest(digest) and os.path.exists(self.path(digest))
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its digest; storing the same bytes again is a no-op"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temporary name: two workers may store the same blob at once, and either copy is correct
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(temporary, 0o444)
+        os.replace(temporary, path)
+        return digest
+
+    def writer(self) -> BlobWriter:
+        """Writer for content too large to hold in memory"""
+        return BlobWriter(self)
+
+    def get(self, digest: str) -> bytes:
+        with open(self.path(digest), "rb") as handle:
+            return handle.read()
+
+
+signature_store = BlobStore(os.path.join(BLOB_STORE_DIR, "signatures"))
+
+
+def store_signature_image(data: bytes, store: BlobStore = signature_store) -> str:
+    """Validate an uploaded signature image and return its digest"""
+    if len(data) > SIGNATURE_MAX_BYTES:
+        raise InvalidBlob(f"Signature images are limited to {SIGNATURE_MAX_BYTES} bytes")
+    if sniff_image_type(data) is None:
+        raise InvalidBlob("Signature images must be PNG, JPEG or WebP")
+    return store.put(data)
+
+
+def externalize_signature(value: Optional[str], store: BlobStore = signature_store) -> Optional[str]:
+    """Column value for a submitted signature: data URLs become a sha256: reference, which must exist"""
+    if not value:
+        return value
+    if value.startswith(REFERENCE_PREFIX):
+        if not store.exists(value[len(REFERENCE_PREFIX):]):
+            raise InvalidBlob("Unknown signature reference")
+        return value
+    if not _DATA_URL.match(value):
+        return value
+    try:
+        data = base64.b64decode(value.split(",", 1)[1], validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidBlob("Signature data URL is not valid base64")
+    return REFERENCE_PREFIX + store_signature_image(data, store)
+
+
+def signature_url(value: Optional[str]) -> Optional[str]:
+    """Fetch URL for a sha256: reference; None for text signatures"""
+    if value and value.startswith(REFERENCE_PREFIX):
+        return f"/signatures/{value[len(REFERENCE_PREFIX):]}"
+    return None
+
+
+def externalize_inline_signatures(db: Session, batch_size: int = 200, store: BlobStore = signature_store) -> int:
+    """Move data URL signatures already stored in register_entries into the blob store; returns signatures moved"""
+    changed, last_id = 0, 0
+    while True:
+        entries = db.query(RegisterEntry).filter(
+            RegisterEntry.id > last_id,
+            or_(RegisterEntry.firma_empleado.like("data:image%"), RegisterEntry.firma_supervisor.like("data:image%"))
+        ).order_by(RegisterEntry.id).limit(batch_size).all()
+        if not entries:
+            return changed
+        for entry in entries:
+            for column in ("firma_empleado", "firma_supervisor"):
+                value = getattr(entry, column)
+                try:
+                    reference = externalize_signature(value, store)
+                except InvalidBlob:
+                    # Leave unreadable images inline rather than lose them
+                    continue
+                if reference != value:
+                    setattr(entry, column, reference)
+                    changed += 1
+        last_id = entries[-1].id
+        db.commit()
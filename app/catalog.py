@@ -0,0 +1,258 @@
+"""
+Caches behind GET /me/today: register/procedure definitions and each worker's day
+
+Definitions change rarely and every worker's first screen needs them, so they are kept per
+engine as ready-to-serve dicts. The employee part of the bundle (schedules, tasks,
+assignments) is kept for TODAY_CACHE_SECONDS and warmed right after login. Both are dropped
+when an ORM commit in this process touches what they hold; the expiry bounds how long edits
+made by other workers or outside the ORM take to show up.
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
+
+from app.models import Employee, Procedure, Register, Schedule, Task, TaskAssignment, TaskDefinition
+
+CATALOG_CACHE_SECONDS = float(os.environ.get("CATALOG_CACHE_SECONDS", "300"))
+TODAY_CACHE_SECONDS = float(os.environ.get("TODAY_CACHE_SECONDS", "60"))
+# Day bundles kept per process; expired ones are pruned once this is exceeded
+TODAY_CACHE_MAX_ENTRIES = int(os.environ.get("TODAY_CACHE_MAX_ENTRIES", "5000"))
+
+
+def register_to_dict(reg: Register) -> Dict[str, Any]:
+    """List representation of a register, shared with /sync and /me/today"""
+    return {
+        "id": reg.id,
+        "nombre": reg.nombre,
+        "descripcion": reg.descripcion,
+        "activo": reg.activo,
+        "campos_personalizados": reg.campos_personalizados or []
+    }
+
+
+def procedure_to_dict(proc: Procedure) -> Dict[str, Any]:
+    """Representation of a procedure with its contenido fields flattened"""
+    contenido = proc.contenido or {}
+    return {
+        "id": proc.id,
+        "register_id": proc.register_id,
+        "nombre": proc.titulo,
+        "descripcion": proc.descripcion,
+        "receta": contenido.get("receta", {}),
+        "procedimiento": contenido.get("procedimiento", []),
+        "precauciones": contenido.get("precauciones", []),
+        "tiempo_estimado": contenido.get("tiempo_estimado", "1 hora")
+    }
+
+
+class CatalogCache:
+    """Register and procedure dicts by id; callers must treat the returned dicts as read-only"""
+
+    def __init__(self, ttl_seconds: float = CATALOG_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        # id -> (loaded_at, register dict, ids of its procedures)
+        self._registers: Dict[int, Tuple[float, Dict[str, Any], Tuple[int, ...]]] = {}
+        # id -> (loaded_at, procedure dict)
+        self._procedures: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl_seconds
+
+    def _load_registers(self, db: Session, ids: Set[int]):
+        # One query per batch of misses; the registers' procedures come along in a second one
+        registers = db.query(Register).options(selectinload(Register.procedures)).filter(Register.id.in_(ids)).all()
+        loaded_at = time.monotonic()
+        with self._lock:
+            for reg in registers:
+                procedures = sorted(reg.procedures, key=lambda proc: (proc.orden or 0, proc.id))
+                self._registers[reg.id] = (loaded_at, register_to_dict(reg), tuple(proc.id for proc in procedures))
+                for proc in procedures:
+                    self._procedures[proc.id] = (loaded_at, procedure_to_dict(proc))
+
+    def _load_procedures(self, db: Session, ids: Set[int]):
+        procedures = db.query(Procedure).filter(Procedure.id.in_(ids)).all()
+        loaded_at = time.monotonic()
+        with self._lock:
+            for proc in procedures:
+                self._procedures[proc.id] = (loaded_at, procedure_to_dict(proc))
+
+    def registers(self, db: Session, ids: Iterable[int]) -> Dict[int, Tuple[Dict[str, Any], Tuple[int, ...]]]:
+        """Register dicts and their procedure ids; unknown ids are left out"""
+        ids = set(ids)
+        missing = {register_id for register_id in ids if not (register_id in self._registers and self._fresh(self._registers[register_id][0]))}
+        if missing:
+            self._load_registers(db, missing)
+        found = {}
+        for register_id in ids:
+            entry = self._registers.get(register_id)
+            if entry:
+                found[register_id] = (entry[1], entry[2])
+        return found
+
+    def procedures(self, db: Session, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        ids = set(ids)
+        missing = {procedure_id for procedure_id in ids if not (procedure_id in self._procedures and self._fresh(self._procedures[procedure_id][0]))}
+        if missing:
+            self._load_procedures(db, missing)
+        return {procedure_id: self._procedures[procedure_id][1] for procedure_id in ids if procedure_id in self._procedures}
+
+    def definitions(self, db: Session, register_ids: Iterable[int], procedure_ids: Iterable[int]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Referenced registers (plus those of the referenced procedures) and every procedure of them"""
+        procedures = self.procedures(db, procedure_ids)
+        registers = self.registers(db, set(register_ids) | {proc["register_id"] for proc in procedures.values()})
+        all_procedure_ids = set(procedures)
+        for _, register_procedure_ids in registers.values():
+            all_procedure_ids.update(register_procedure_ids)
+        procedures = self.procedures(db, all_procedure_ids)
+        return (
+            [registers[register_id][0] for register_id in sorted(registers)],
+            [procedures[procedure_id] for procedure_id in sorted(procedures)],
+        )
+
+    def invalidate(self, register_ids: Iterable[int] = (), procedure_ids: Iterable[int] = ()):
+        with self._lock:
+            for register_id in register_ids:
+                self._registers.pop(register_id, None)
+            for procedure_id in procedure_ids:
+                self._procedures.pop(procedure_id, None)
+
+
+class DayCache:
+    """Per (employee, fecha) bundles; concurrent requests for the same key share one build"""
+
+    def __init__(self, ttl_seconds: float = TODAY_CACHE_SECONDS, max_entries: int = TODAY_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[int, Any], Tuple[float, Dict[str, Any]]] = {}
+        self._building: Dict[Tuple[int, Any], Awaitable] = {}
+        # Bumped on invalidation so a build that started before a commit is not stored afterwards
+        self._generations: Dict[int, int] = {}
+
+    def cached(self, key: Tuple[int, Any]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+        return None
+
+    async def get(self, key: Tuple[int, Any], build: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """The cached bundle for key, or one built in the threadpool; the flag tells whether it was cached"""
+        value = self.cached(key)
+        if value is not None:
+            return value, True
+        building = self._building.get(key)
+        if building is None:
+            building = self._building[key] = asyncio.ensure_future(self._build(key, build))
+        # shield: a client that disconnects must not cancel the build others are waiting on
+        return await asyncio.shield(building), False
+
+    async def _build(self, key: Tuple[int, Any], build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        generation = self._generations.get(key[0], 0)
+        try:
+            value = await run_in_threadpool(build)
+            if self._generations.get(key[0], 0) == generation:
+                self._store(key, value)
+            return value
+        finally:
+            self._building.pop(key, None)
+
+    def _store(self, key: Tuple[int, Any], value: Dict[str, Any]):
+        self._entries[key] = (time.monotonic(), value)
+        if len(self._entries) > self.max_entries:
+            expired_before = time.monotonic() - self.ttl_seconds
+            for old_key, (stored_at, _) in list(self._entries.items()):
+                if stored_at < expired_before:
+                    self._entries.pop(old_key, None)
+
+    def invalidate(self, empleado_ids: Iterable[int]):
+        empleado_ids = set(empleado_ids)
+        for empleado_id in empleado_ids:
+            self._generations[empleado_id] = self._generations.get(empleado_id, 0) + 1
+        for key in list(self._entries):
+            if key[0] in empleado_ids:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        for empleado_id, _ in list(self._entries):
+            self._generations[empleado_id] = self._generations.get(empleado_id, 0) + 1
+        self._entries.clear()
+
+
+# Engine -> caches; one set per database in this process
+_catalogs: "weakref.WeakKeyDictionary[Engine, CatalogCache]" = weakref.WeakKeyDictionary()
+_days: "weakref.WeakKeyDictionary[Engine, DayCache]" = weakref.WeakKeyDictionary()
+_PENDING = "catalog_changes"
+
+
+def catalog_for(engine: Engine) -> CatalogCache:
+    catalog = _catalogs.get(engine)
+    if catalog is None:
+        catalog = _catalogs.setdefault(engine, CatalogCache())
+    return catalog
+
+
+def days_for(engine: Engine) -> DayCache:
+    days = _days.get(engine)
+    if days is None:
+        days = _days.setdefault(engine, DayCache())
+    return days
+
+
+def _empleado_ids(obj) -> Set[int]:
+    """Current and previous employee of a row, so a reassignment refreshes both days"""
+    history = inspect(obj).attrs.empleado_id.history
+    return {value for value in (obj.empleado_id, *history.deleted) if value is not None}
+
+
+def _collect_changes(session: Session, flush_context):
+    changes = session.info.setdefault(_PENDING, {"registers": set(), "procedures": set(), "employees": set(), "all_days": False})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Register):
+            changes["registers"].add(obj.id)
+        elif isinstance(obj, Procedure):
+            # The register entry lists its procedure ids
+            changes["procedures"].add(obj.id)
+            changes["registers"].add(obj.register_id)
+        elif isinstance(obj, (Task, TaskAssignment, Schedule)):
+            changes["employees"].update(_empleado_ids(obj))
+        elif isinstance(obj, Employee):
+            changes["employees"].add(obj.id)
+        elif isinstance(obj, TaskDefinition):
+            # Assignment titles and priorities come from the definition, for any employee
+            changes["all_days"] = True
+
+
+def _apply_changes(session: Session):
+    changes = session.info.pop(_PENDING, None)
+    if not changes:
+        return
+    engine = session.get_bind()
+    catalog = _catalogs.get(engine)
+    if catalog is not None:
+        catalog.invalidate(changes["registers"], changes["procedures"])
+    days = _days.get(engine)
+    if days is not None:
+        if changes["all_days"]:
+            days.clear()
+        elif changes["employees"]:
+            days.invalidate(changes["employees"])
+
+
+def _discard_changes(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+def install_catalog_hooks():
+    """Drop cached definitions and day bundles on ORM commits that touch them; safe to call more than once"""
+    if not event.contains(Session, "after_flush", _collect_changes):
+        event.listen(Session, "after_flush", _collect_changes)
+        event.listen(Session, "after_commit", _apply_changes)
+        event.listen(Session, "after_rollback", _discard_changes)
@@ -0,0 +1,105 @@
+"""
+Operational commands, kept out of application startup:
+
+    python -m app.cli init-db      # create missing tables and default data
+    python -m app.cli migrate      # alembic upgrade head
+    python -m app.cli prune-tombstones --days 30
+    python -m app.cli archive-entries [--before 2025-06]
+    python -m app.cli externalize-signatures
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import List
+
+
+def init_db(args: argparse.Namespace):
+    from app.seed import create_schema, init_database
+    from app.sync import install_sync_versioning
+
+    install_sync_versioning()
+    create_schema()
+    if not args.skip_seed:
+        init_database()
+    print("Database initialized")
+
+
+def migrate(args: argparse.Namespace):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini"))
+    command.upgrade(config, args.revision)
+
+
+def prune_tombstones(args: argparse.Namespace):
+    from app.database import SessionLocal
+    from app.sync import prune_tombstones as prune
+
+    db = SessionLocal()
+    try:
+        print(f"Pruned {prune(db, args.days)} sync tombstones")
+    finally:
+        db.close()
+
+
+def archive_entries(args: argparse.Namespace):
+    from app.archive import archive_closed_months, ensure_partitions
+    from app.database import SessionLocal, engine
+
+    for name in ensure_partitions(engine):
+        print(f"Created partition {name}")
+    before = datetime.strptime(args.before, "%Y-%m").date() if args.before else None
+    db = SessionLocal()
+    try:
+        archived = archive_closed_months(db, before=before)
+    finally:
+        db.close()
+    for month, count in archived.items():
+        print(f"Archived {count} register entries from {month}")
+    if not archived:
+        print("Nothing to archive")
+
+
+def externalize_signatures(args: argparse.Namespace):
+    from app.blobs import externalize_inline_signatures
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Moved {externalize_inline_signatures(db)} signatures to the blob store")
+    finally:
+        db.close()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="GADIApp maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = commands.add_parser("init-db", help="Create missing tables and default data")
+    init_parser.add_argument("--skip-seed", action="store_true", help="Only create tables")
+    init_parser.set_defaults(handler=init_db)
+
+    migrate_parser = commands.add_parser("migrate", help="Apply Alembic migrations")
+    migrate_parser.add_argument("revision", nargs="?", default="head")
+    migrate_parser.set_defaults(handler=migrate)
+
+    prune_parser = commands.add_parser("prune-tombstones", help="Delete old delta sync tombstones")
+    prune_parser.add_argument("--days", type=int, default=30, help="Keep tombstones newer than this many days")
+    prune_parser.set_defaults(handler=prune_tombstones)
+
+    archive_parser = commands.add_parser("archive-entries", help="Move closed months of register entries to archive files")
+    archive_parser.add_argument("--before", help="Archive months before this one (YYYY-MM; default: REGISTER_ARCHIVE_AFTER_MONTHS ago)")
+    archive_parser.set_defaults(handler=archive_entries)
+
+    signatures_parser = commands.add_parser("externalize-signatures", help="Move inline data URL signatures to the blob store")
+    signatures_parser.set_defaults(handler=externalize_signatures)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Shift coverage, overlap and rest-period checks over a date range of schedules
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.dates import date_range
+from app.models import Employee, Schedule, ShiftDefinition
+
+DEFAULT_MIN_REST_HOURS = 12
+
+
+def schedule_interval(schedule: Schedule, empleado_name: str = None) -> Dict[str, Any]:
+    return {
+        "schedule_id": schedule.id,
+        "empleado_id": schedule.empleado_id,
+        "empleado": empleado_name,
+        "fecha": schedule.fecha,
+        "turno": schedule.turno,
+        "shift_definition_id": schedule.shift_definition_id,
+        "start_at": schedule.start_at,
+        "end_at": schedule.end_at,
+    }
+
+
+def load_intervals(db: Session, fecha_inicio: date, fecha_fin: date) -> List[Dict[str, Any]]:
+    """Load every schedule touching the range in one query, one day of margin on each side for rest checks"""
+    start = fecha_inicio - timedelta(days=1)
+    end = fecha_fin + timedelta(days=1)
+
+    rows = db.query(Schedule, Employee.nombre).join(Employee, Employee.id == Schedule.empleado_id).filter(
+        Employee.activo == True,
+        Schedule.fecha >= start,
+        Schedule.fecha <= end
+    ).all()
+    return [schedule_interval(schedule, nombre) for schedule, nombre in rows]
+
+
+def check_schedules(
+    intervals: List[Dict[str, Any]],
+    shifts: List[ShiftDefinition],
+    fecha_inicio: date,
+    fecha_fin: date,
+    min_staff: int = 1,
+    min_rest_hours: float = DEFAULT_MIN_REST_HOURS
+) -> Dict[str, Any]:
+    """Report uncovered shift slots, double bookings and short rest periods in a single pass"""
+    min_rest = timedelta(hours=min_rest_hours)
+
+    def in_range(fecha: date) -> bool:
+        return fecha_inicio <= fecha <= fecha_fin
+
+    staffed = defaultdict(int)  # (fecha, shift_definition_id) -> scheduled employees
+    by_employee = defaultdict(list)
+    for interval in intervals:
+        if interval["start_at"] is None or interval["end_at"] is None:
+            continue
+        by_employee[interval["empleado_id"]].append(interval)
+        if in_range(interval["fecha"]):
+            staffed[(interval["fecha"], interval["shift_definition_id"])] += 1
+
+    overlaps = []
+    rest_violations = []
+    for empleado_id, employee_intervals in by_employee.items():
+        employee_intervals.sort(key=lambda interval: interval["start_at"])
+        previous = None
+        for current in employee_intervals:
+            if previous is not None and (in_range(previous["fecha"]) or in_range(current["fecha"])):
+                if current["start_at"] < previous["end_at"]:
+                    overlaps.append({
+                        "empleado_id": empleado_id,
+                        "empleado": current["empleado"],
+                        "first": _describe(previous),
+                        "second": _describe(current)
+                    })
+                elif current["start_at"] - previous["end_at"] < min_rest:
+                    rest_violations.append({
+                        "empleado_id": empleado_id,
+                        "empleado": current["empleado"],
+                        "rest_hours": round((current["start_at"] - previous["end_at"]).total_seconds() / 3600, 2),
+                        "first": _describe(previous),
+                        "second": _describe(current)
+                    })
+            # Keep the interval that ends last so nested overlaps are still caught
+            if previous is None or current["end_at"] > previous["end_at"]:
+                previous = current
+
+    gaps = []
+    for fecha in date_range(fecha_inicio, fecha_fin):
+        for shift in shifts:
+            count = staffed.get((fecha, shift.id), 0)
+            if count < min_staff:
+                gaps.append({
+                    "fecha": fecha,
+                    "shift_definition_id": shift.id,
+                    "turno": shift.nombre,
+                    "scheduled": count,
+                    "required": min_staff
+                })
+
+    return {
+        "gaps": gaps,
+        "overlaps": overlaps,
+        "rest_violations": rest_violations,
+        "summary": {
+            "gaps": len(gaps),
+            "overlaps": len(overlaps),
+            "rest_violations": len(rest_violations)
+        }
+    }
+
+
+def _describe(interval: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "schedule_id": interval["schedule_id"],
+        "fecha": interval["fecha"].isoformat(),
+        "turno": interval["turno"],
+        "start_at": interval["start_at"].isoformat(),
+        "end_at": interval["end_at"].isoformat()
+    }
@@ -1,35 +1,62 @@
 """
 Database configuration and connection for FastAPI
 """
-import os
+from typing import Any, Dict
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# Get database URL from environment variable
-DATABASE_URL = os.environ.get("DATABASE_URL")
+# Create Base class for models
+Base = declarative_base()
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is required")
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_recycle=300,
-    pool_pre_ping=True,
-    echo=True  # Set to False in production
-)
+def create_db_engine(url: str, echo: bool = True) -> Engine:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # Embedded mode for single-node sites (WAL, tuned pragmas, single-writer queue)
+        from app.sqlite import create_sqlite_engine
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        return create_sqlite_engine(parsed, echo)
+    return create_engine(
+        url,
+        pool_recycle=300,
+        pool_pre_ping=True,
+        echo=echo
+    )
+
+
+def create_session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+_default: Dict[str, Any] = {}
+
+
+def __getattr__(name: str):
+    """Module-level `engine` and `SessionLocal`, created from the environment on first use
+
+    Used by the CLI, seeding and background helpers; each app from create_app has its own
+    engine on app.state, so importing this module no longer requires DATABASE_URL.
+    """
+    if name not in ("engine", "SessionLocal"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if not _default:
+        from app.settings import Settings
+
+        settings = Settings.from_env()
+        _default["engine"] = create_db_engine(settings.database_url, settings.sql_echo)
+        _default["SessionLocal"] = create_session_factory(_default["engine"])
+    return _default[name]
 
-# Create Base class for models
-Base = declarative_base()
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+# Dependency to get DB session from the engine of the app serving the request
+def get_db(request: Request):
+    db = request.app.state.session_factory()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,42 @@
+"""
+Helpers for the calendar date (fecha) columns
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+
+def parse_fecha(value) -> date:
+    """Accept a date, a datetime or an ISO "YYYY-MM-DD" or datetime string; raise ValueError otherwise"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        # The whole string must parse, so trailing garbage is not silently cut off
+        try:
+            return date.fromisoformat(value.strip())
+        except ValueError:
+            return datetime.fromisoformat(value.strip()).date()
+    raise ValueError(f"Invalid date: {value!r}")
+
+
+def require_fecha(value, field: str = "fecha") -> date:
+    """Parse an ISO date from request data, rejecting invalid values with a 400"""
+    try:
+        return parse_fecha(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid date for {field}: expected YYYY-MM-DD")
+
+
+def parse_fecha_or_none(value) -> Optional[date]:
+    try:
+        return parse_fecha(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def date_range(fecha_inicio: date, fecha_fin: date) -> List[date]:
+    """Every date from fecha_inicio to fecha_fin, both included"""
+    return [fecha_inicio + timedelta(days=offset) for offset in range((fecha_fin - fecha_inicio).days + 1)]
@@ -0,0 +1,194 @@
+"""
+Application factory: builds a FastAPI app with its own engine, session factory and route statistics
+"""
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import FileResponse
+
+from app.audit import AuditLog, AuditMiddleware, install_audit_hooks, register_audit_log
+from app.auth import resolve_token
+from app.catalog import install_catalog_hooks
+from app.database import create_db_engine, create_session_factory
+from app.health import DatabaseProbe, run_periodic_job
+from app.idempotency import IdempotencyMiddleware
+from app.inbox_events import inbox_hub
+from app.query_stats import QueryStatsMiddleware, RouteStats, install_query_hooks
+from app.search import install_search_index_hooks
+from app.settings import Settings
+from app.sync import install_sync_versioning
+from app.thumbnails import shutdown_thumbnail_pool
+from app.tokens import AUTH_REVOCATION_SYNC_SECONDS, signing_enabled, sync_revocations
+
+# Router modules in registration order; each exposes `router`. Imported only when registered.
+ROUTER_MODULES = {
+    "health": "app.routers.health",
+    "auth": "app.routers.auth",
+    "schedules": "app.routers.schedules",
+    "tasks": "app.routers.tasks",
+    "task_definitions": "app.routers.task_definitions",
+    "task_assignments": "app.routers.task_assignments",
+    "agenda": "app.routers.agenda",
+    "me": "app.routers.me",
+    "inbox": "app.routers.inbox",
+    "registers": "app.routers.registers",
+    "attachments": "app.routers.attachments",
+    "employees": "app.routers.employees",
+    "permissions": "app.routers.permissions",
+    "roles": "app.routers.roles",
+    "shifts": "app.routers.shifts",
+    "sync": "app.routers.sync",
+    "search": "app.routers.search",
+    "signatures": "app.routers.signatures",
+    "system": "app.routers.system",
+    "audit": "app.routers.audit",
+}
+
+
+def generate_recurring_tasks_with(session_factory):
+    """Run recurring task generation in a session from this app's engine"""
+    from app.scheduling import generate_recurring_tasks
+
+    db = session_factory()
+    try:
+        generate_recurring_tasks(db)
+    finally:
+        db.close()
+
+
+def archive_register_entries_with(session_factory):
+    """Create upcoming partitions and archive closed months with this app's engine"""
+    from app.archive import archive_closed_months, ensure_partitions
+
+    db = session_factory()
+    try:
+        ensure_partitions(db.get_bind())
+        archive_closed_months(db)
+    finally:
+        db.close()
+
+
+def create_lifespan(settings: Settings):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        state = app.state
+        # Production replicas skip schema creation and seeding; run `python -m app.cli init-db` once instead
+        if settings.db_auto_init:
+            from app.seed import create_schema, init_database
+
+            create_schema(state.engine)
+            init_database(state.session_factory)
+
+        # Batched audit writes run off the request path
+        state.audit_log.start()
+
+        # Relay inbox events between workers through Postgres LISTEN/NOTIFY when enabled
+        if settings.inbox_pg_bridge:
+            inbox_hub.start_postgres_bridge(state.engine)
+
+        # Enable on a single worker only; every worker running it would generate duplicates
+        scheduler: Optional[asyncio.Task] = None
+        if settings.recurring_generation_interval > 0:
+            scheduler = asyncio.get_running_loop().create_task(run_periodic_job(
+                "recurring_scheduler",
+                lambda: generate_recurring_tasks_with(state.session_factory),
+                settings.recurring_generation_interval
+            ))
+
+        # Like the scheduler, run it on one worker only
+        archiver: Optional[asyncio.Task] = None
+        if settings.register_archive_interval > 0:
+            archiver = asyncio.get_running_loop().create_task(run_periodic_job(
+                "register_archiver",
+                lambda: archive_register_entries_with(state.session_factory),
+                settings.register_archive_interval
+            ))
+
+        # Unlike those jobs, every worker runs this one: each needs the logouts seen by the others
+        revocations: Optional[asyncio.Task] = None
+        if signing_enabled():
+            revocations = asyncio.get_running_loop().create_task(run_periodic_job(
+                "token_revocations",
+                lambda: sync_revocations(state.session_factory),
+                AUTH_REVOCATION_SYNC_SECONDS
+            ))
+
+        try:
+            yield
+        finally:
+            for job in (scheduler, archiver, revocations):
+                if job is not None:
+                    job.cancel()
+            shutdown_thumbnail_pool()
+            # Writes the events still queued
+            state.audit_log.stop()
+            state.engine.dispose()
+
+    return lifespan
+
+
+def mount_frontend(app: FastAPI, frontend_dir: str):
+    """Serve the React build; the API still starts when the frontend has not been built"""
+    app.mount("/static", StaticFiles(directory=f"{frontend_dir}/static", check_dir=False), name="static")
+
+    # SPA fallback route - serve React app for all other routes (registered after every API router)
+    @app.get("/{full_path:path}")
+    async def serve_spa(full_path: str):
+        """Serve React SPA for all non-API routes"""
+        return FileResponse(f"{frontend_dir}/index.html")
+
+
+def create_app(settings: Settings) -> FastAPI:
+    """Build an app for these settings; several apps with different databases can coexist in one process"""
+    unknown = set(settings.routers or ()) - set(ROUTER_MODULES)
+    if unknown:
+        raise ValueError(f"Unknown routers: {', '.join(sorted(unknown))}")
+
+    app = FastAPI(lifespan=create_lifespan(settings))
+    app.state.settings = settings
+    app.state.engine = create_db_engine(settings.database_url, settings.sql_echo)
+    app.state.session_factory = create_session_factory(app.state.engine)
+    app.state.database_probe = DatabaseProbe(app.state.engine)
+    app.state.route_stats = RouteStats()
+    app.state.audit_log = AuditLog(app.state.session_factory)
+    register_audit_log(app.state.engine, app.state.audit_log)
+
+    # Innermost, so replayed responses still get CORS and Server-Timing headers
+    app.add_middleware(IdempotencyMiddleware, session_factory=app.state.session_factory)
+    # Who is making each mutating request, for the audit events its commits produce
+    app.add_middleware(AuditMiddleware, audit_log=app.state.audit_log, resolve_actor=resolve_token)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Count and time SQL statements per request (Server-Timing header, /system/query-stats)
+    install_query_hooks(app.state.engine)
+    app.add_middleware(QueryStatsMiddleware, stats=app.state.route_stats)
+
+    # Version stamps and tombstones for GET /sync
+    install_sync_versioning()
+    # Keeps the in-process search index current where Postgres full-text search is not available
+    install_search_index_hooks()
+    # Drops cached definitions and day bundles behind /me/today when a commit changes them
+    install_catalog_hooks()
+    # Audit events for committed changes, written in batches by app.state.audit_log
+    install_audit_hooks()
+
+    for name, module_path in ROUTER_MODULES.items():
+        if settings.routers is None or name in settings.routers:
+            app.include_router(importlib.import_module(module_path).router)
+
+    if settings.frontend_dir:
+        mount_frontend(app, settings.frontend_dir)
+
+    return app
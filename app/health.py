@@ -0,0 +1,109 @@
+"""
+Readiness checks: cached database ping, pool saturation and background worker heartbeats
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+DB_CHECK_CACHE_SECONDS = float(os.environ.get("HEALTH_DB_CACHE_SECONDS", "5"))
+DB_CHECK_TIMEOUT_SECONDS = float(os.environ.get("HEALTH_DB_TIMEOUT_SECONDS", "2"))
+POOL_SATURATION_THRESHOLD = float(os.environ.get("HEALTH_POOL_SATURATION", "0.9"))
+
+
+class Heartbeats:
+    """Last-seen times for background workers; a worker is stale once it misses max_age_seconds"""
+
+    def __init__(self):
+        self._workers: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def register(self, name: str, max_age_seconds: float):
+        # Registration counts as a beat so a worker is not stale before its first run
+        self._workers[name] = {"max_age": max_age_seconds, "last_beat": time.monotonic()}
+
+    def beat(self, name: str):
+        if name in self._workers:
+            self._workers[name]["last_beat"] = time.monotonic()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        result = {}
+        for name, worker in self._workers.items():
+            age = now - worker["last_beat"]
+            result[name] = {"ok": age <= worker["max_age"], "age_seconds": round(age, 1), "max_age_seconds": worker["max_age"]}
+        return result
+
+
+heartbeats = Heartbeats()
+
+
+class DatabaseProbe:
+    """SELECT 1 with a cached result; concurrent probes share a single in-flight check"""
+
+    def __init__(self, engine, cache_seconds: float = DB_CHECK_CACHE_SECONDS, timeout_seconds: float = DB_CHECK_TIMEOUT_SECONDS):
+        self.engine = engine
+        self.cache_seconds = cache_seconds
+        self.timeout_seconds = timeout_seconds
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _ping(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < self.cache_seconds
+
+    async def check(self) -> Dict[str, Any]:
+        if self._fresh():
+            return {**self._result, "cached": True}
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._fresh():
+                return {**self._result, "cached": True}
+
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(run_in_threadpool(self._ping), self.timeout_seconds)
+                result = {"ok": True}
+            except asyncio.TimeoutError:
+                result = {"ok": False, "error": f"no connection within {self.timeout_seconds:g}s"}
+            except Exception as e:
+                result = {"ok": False, "error": str(e).splitlines()[0][:200]}
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+            self._result, self._checked_at = result, time.monotonic()
+            return {**result, "cached": False}
+
+
+def pool_status(engine, threshold: float = POOL_SATURATION_THRESHOLD) -> Dict[str, Any]:
+    """Checked-out connections against pool_size + max_overflow"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return {"ok": True, "detail": f"{type(pool).__name__} does not report usage"}
+
+    capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+    checked_out = pool.checkedout()
+    ratio = checked_out / capacity if capacity else 0.0
+    return {"ok": ratio < threshold, "checked_out": checked_out, "capacity": capacity, "utilization": round(ratio, 2)}
+
+
+async def run_periodic_job(name: str, func: Callable[[], Any], interval_seconds: float):
+    """Run a blocking job in the thread pool every interval, beating the named heartbeat after each run"""
+    heartbeats.register(name, max_age_seconds=interval_seconds * 3)
+    while True:
+        try:
+            await run_in_threadpool(func)
+        except Exception:
+            logger.exception("Background job %s failed", name)
+        heartbeats.beat(name)
+        await asyncio.sleep(interval_seconds)
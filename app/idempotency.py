@@ -0,0 +1,264 @@
+"""
+Idempotency-Key support for writes: a retried request gets the stored response instead of running again
+
+A write (POST, PUT, PATCH, DELETE) that carries an Idempotency-Key header first reserves the
+key in idempotency_records, keyed by sha256(caller + key). A retry with the same key is answered
+from that row with one primary key lookup:
+
+    same request, finished       -> stored status and body, with Idempotent-Replayed: true
+    same request, still running  -> 409 with Retry-After
+    different method/path/body   -> 422
+    body over the request cap    -> 413
+
+Server errors and 429s are not stored, so those can be retried with the same key.
+"""
+import hashlib
+import logging
+import os
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+
+from app.auth import resolve_token
+from app.models import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+# How long a finished response is replayed
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+# A reservation older than this is treated as abandoned (worker died mid-request) and can be taken over
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# Larger responses are passed through without being stored
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.environ.get("IDEMPOTENCY_MAX_BODY_BYTES", str(256 * 1024)))
+# Request bodies are held in memory for the fingerprint; larger writes with a key are refused with 413
+IDEMPOTENCY_MAX_REQUEST_BYTES = int(os.environ.get("IDEMPOTENCY_MAX_REQUEST_BYTES", str(1024 * 1024)))
+# Expired rows are deleted at most this often per worker
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = int(os.environ.get("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "300"))
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _expired(record: IdempotencyRecord, now: datetime) -> bool:
+    # SQLite hands back naive datetimes; every value here was written in UTC
+    expires_at = record.expires_at if record.expires_at.tzinfo else record.expires_at.replace(tzinfo=timezone.utc)
+    return expires_at <= now
+
+
+def record_id(caller: str, key: str) -> str:
+    return hashlib.sha256(f"{caller}\n{key}".encode("utf-8")).hexdigest()
+
+
+def request_fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    digest = hashlib.sha256(f"{method} {path}?".encode("utf-8") + query_string + b"\n")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """Reserve, complete and release keys in the idempotency_records table"""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+        self._last_purge = 0.0
+
+    def reserve(self, key_id: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        """Claim the key for a new request; returns the live record instead when the key is taken"""
+        db = self.session_factory()
+        try:
+            now = _now()
+            record = db.get(IdempotencyRecord, key_id)
+            if record is not None:
+                if not _expired(record, now):
+                    db.expunge(record)
+                    return record
+                db.delete(record)
+                db.flush()
+
+            db.add(IdempotencyRecord(id=key_id, fingerprint=fingerprint, expires_at=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker reserved the same key between our lookup and insert
+                db.rollback()
+                record = db.get(IdempotencyRecord, key_id)
+                if record is not None:
+                    db.expunge(record)
+                return record
+            return None
+        finally:
+            db.close()
+            self._maybe_purge()
+
+    def complete(self, key_id: str, status_code: int, content_type: Optional[str], body: bytes):
+        """Store the response of a reserved key for IDEMPOTENCY_TTL_SECONDS"""
+        db = self.session_factory()
+        try:
+            db.query(IdempotencyRecord).filter(IdempotencyRecord.id == key_id).update({
+                "status_code": status_code,
+                "content_type": content_type,
+                "body": zlib.compress(body),
+                "expires_at": _now() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def release(self, key_id: str):
+        """Drop a reservation whose response should not be replayed"""
+        db = self.session_factory()
+        try:
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.id == key_id, IdempotencyRecord.status_code.is_(None)
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        db = self.session_factory()
+        try:
+            count = db.query(IdempotencyRecord).filter(IdempotencyRecord.expires_at <= _now()).delete(synchronize_session=False)
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < IDEMPOTENCY_PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        try:
+            self.purge_expired()
+        except Exception:
+            logger.exception("Failed to purge expired idempotency records")
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for header_name, value in scope.get("headers", []):
+        if header_name == name:
+            return value.decode("latin-1")
+    return None
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware: replays stored responses for writes retried with the same Idempotency-Key"""
+
+    def __init__(self, app, session_factory: Callable[[], Session]):
+        self.app = app
+        self.store = IdempotencyStore(session_factory)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        key = _header(scope, HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"}, status_code=400)(scope, receive, send)
+            return
+
+        too_large = JSONResponse(
+            {"detail": f"Writes with an Idempotency-Key are limited to {IDEMPOTENCY_MAX_REQUEST_BYTES} bytes"},
+            status_code=413,
+        )
+        content_length = _header(scope, b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > IDEMPOTENCY_MAX_REQUEST_BYTES:
+            await too_large(scope, receive, send)
+            return
+
+        # The body is part of the fingerprint, so read it up front and hand it to the app afterwards
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # Client disconnected before sending the whole body
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > IDEMPOTENCY_MAX_REQUEST_BYTES:
+                # Chunked bodies have no Content-Length to check up front
+                await too_large(scope, receive, send)
+                return
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        # Keys are per caller; unauthenticated writes share one namespace
+        user = resolve_token(_header(scope, b"x-demo-token"))
+        key_id = record_id(user["email"] if user else "anonymous", key)
+        fingerprint = request_fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+
+        existing = await run_in_threadpool(self.store.reserve, key_id, fingerprint)
+        if existing is not None:
+            await self._answer_from(existing, fingerprint)(scope, receive, send)
+            return
+
+        replayed_body = False
+
+        async def receive_body():
+            nonlocal replayed_body
+            if not replayed_body:
+                replayed_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code = None
+        content_type = None
+        response_chunks = []
+        response_size = 0
+
+        async def capture(message):
+            nonlocal status_code, content_type, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for header_name, value in message.get("headers", []):
+                    if header_name.lower() == b"content-type":
+                        content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body" and response_size <= IDEMPOTENCY_MAX_BODY_BYTES:
+                response_chunks.append(message.get("body", b""))
+                response_size += len(response_chunks[-1])
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, capture)
+        except BaseException:
+            await run_in_threadpool(self.store.release, key_id)
+            raise
+
+        if status_code is None or status_code >= 500 or status_code == 429 or response_size > IDEMPOTENCY_MAX_BODY_BYTES:
+            await run_in_threadpool(self.store.release, key_id)
+        else:
+            await run_in_threadpool(self.store.complete, key_id, status_code, content_type, b"".join(response_chunks))
+
+    @staticmethod
+    def _answer_from(record: IdempotencyRecord, fingerprint: str) -> Response:
+        if record.fingerprint != fingerprint:
+            return JSONResponse({"detail": "Idempotency-Key was already used with a different request"}, status_code=422)
+        if record.status_code is None:
+            return JSONResponse(
+                {"detail": "A request with this Idempotency-Key is still being processed"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+        return Response(
+            content=zlib.decompress(record.body),
+            status_code=record.status_code,
+            media_type=record.content_type,
+            headers={"Idempotent-Replayed": "true"},
+        )
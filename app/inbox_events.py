@@ -0,0 +1,154 @@
+"""
+In-process pub/sub hub for manager inbox events, streamed to clients via Server-Sent Events
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import text
+
+from app.health import heartbeats
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel used to fan out events between worker processes
+INBOX_CHANNEL = "manager_inbox"
+
+# pg_notify payloads are limited to 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7900
+
+# The listener wakes at least this often, beating its heartbeat even when no events arrive
+LISTEN_TIMEOUT_SECONDS = 30
+
+
+class InboxEventHub:
+    """Fan out inbox events to every connected SSE subscriber in this process"""
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self.instance_id = uuid.uuid4().hex
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._bridge_engine = None
+        self._bridge_thread: Optional[threading.Thread] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new subscriber queue (must be called from the event loop)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber queue"""
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, payload: Dict[str, Any]):
+        """Publish an event locally and, if the bridge is running, to other workers"""
+        event = {"event": event_type, "data": payload}
+        self._dispatch(event)
+
+        if self._bridge_engine is not None:
+            self._notify_other_workers(event)
+
+    def _dispatch(self, event: Dict[str, Any]):
+        """Hand the event to every local subscriber (safe to call from any thread)"""
+        with self._lock:
+            loop = self._loop
+            subscribers = list(self._subscribers)
+
+        if loop is None or loop.is_closed():
+            return
+
+        for queue in subscribers:
+            loop.call_soon_threadsafe(self._enqueue, queue, event)
+
+    @staticmethod
+    def _enqueue(queue: asyncio.Queue, event: Dict[str, Any]):
+        # Slow clients lose their oldest events instead of blocking publishers
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    def _notify_other_workers(self, event: Dict[str, Any]):
+        message = {"origin": self.instance_id, **event}
+        payload = json.dumps(message, default=str)
+
+        # Oversized payloads are sent without data; clients re-fetch /inbox
+        if len(payload.encode("utf-8")) > MAX_NOTIFY_PAYLOAD:
+            message["data"] = {"id": event["data"].get("id"), "truncated": True}
+            payload = json.dumps(message, default=str)
+
+        try:
+            with self._bridge_engine.connect() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": INBOX_CHANNEL, "payload": payload})
+                conn.commit()
+        except Exception:
+            logger.exception("Failed to forward inbox event to other workers")
+
+    def start_postgres_bridge(self, engine):
+        """LISTEN on the inbox channel so events published by other workers reach local subscribers"""
+        if engine.dialect.name != "postgresql":
+            logger.warning("Inbox event bridge requires PostgreSQL, running in single-process mode")
+            return
+        if self._bridge_thread is not None:
+            return
+
+        self._bridge_engine = engine
+        heartbeats.register("inbox_event_bridge", max_age_seconds=LISTEN_TIMEOUT_SECONDS * 3)
+        self._bridge_thread = threading.Thread(target=self._listen, name="inbox-event-bridge", daemon=True)
+        self._bridge_thread.start()
+
+    def _listen(self):
+        while True:
+            raw_conn = None
+            try:
+                raw_conn = self._bridge_engine.raw_connection()
+                dbapi_conn = raw_conn.driver_connection
+                dbapi_conn.autocommit = True
+                cursor = dbapi_conn.cursor()
+                cursor.execute(f"LISTEN {INBOX_CHANNEL}")
+
+                while True:
+                    heartbeats.beat("inbox_event_bridge")
+                    if select.select([dbapi_conn], [], [], LISTEN_TIMEOUT_SECONDS) == ([], [], []):
+                        continue
+                    dbapi_conn.poll()
+                    while dbapi_conn.notifies:
+                        notify = dbapi_conn.notifies.pop(0)
+                        message = json.loads(notify.payload)
+                        if message.pop("origin", None) == self.instance_id:
+                            continue
+                        self._dispatch(message)
+            except Exception:
+                logger.exception("Inbox event bridge lost its connection, reconnecting")
+            finally:
+                if raw_conn is not None:
+                    try:
+                        raw_conn.invalidate()
+                    except Exception:
+                        pass
+            threading.Event().wait(5)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Serialize an event in text/event-stream format"""
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+inbox_hub = InboxEventHub(max_queue_size=int(os.environ.get("INBOX_EVENTS_QUEUE_SIZE", "100")))
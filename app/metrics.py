@@ -0,0 +1,160 @@
+"""
+Prometheus text-format metrics: request latency, DB pool, sessions and background jobs
+"""
+import asyncio
+import functools
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.query_stats import Histogram, RouteStats, route_stats
+
+JOB_DURATION_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class JobMetrics:
+    """In-progress gauge, duration histogram, failure count and last success time for one kind of job"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.in_progress = 0
+        self.failures = 0
+        self.last_success: Optional[float] = None
+        self.duration = Histogram(JOB_DURATION_SECONDS_BUCKETS)
+
+    def _finished(self, started: float, failed: bool):
+        self.in_progress -= 1
+        if failed:
+            self.failures += 1
+        else:
+            self.duration.observe(time.perf_counter() - started)
+            self.last_success = time.time()
+
+    def timed(self, func):
+        """Decorator for sync or async functions; keeps the signature visible to FastAPI"""
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                self.in_progress += 1
+                started, failed = time.perf_counter(), True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self._finished(started, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.in_progress += 1
+            started, failed = time.perf_counter(), True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self._finished(started, failed)
+        return wrapper
+
+
+recurring_generation_job = JobMetrics("recurring_generation", "Recurring task generation runs")
+pdf_export_job = JobMetrics("pdf_export", "Register PDF exports")
+register_archive_job = JobMetrics("register_archive", "Register entry archival runs")
+JOBS = (recurring_generation_job, pdf_export_job, register_archive_job)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def header(self, name: str, kind: str, description: str):
+        self.lines.append(f"# HELP {name} {description}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, labels: Dict[str, Any] = None):
+        self.lines.append(f"{name}{_labels(labels or {})} {_format(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, labels: Dict[str, Any] = None, scale: float = 1.0):
+        """Write _bucket/_sum/_count series; scale converts the histogram's unit (e.g. ms to seconds)"""
+        cumulative = 0
+        for bound, count in zip(list(histogram.buckets) + [None], histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound is None else _format(bound * scale)
+            self.sample(f"{name}_bucket", cumulative, {**(labels or {}), "le": le})
+        self.sample(f"{name}_sum", histogram.sum * scale, labels)
+        self.sample(f"{name}_count", histogram.count, labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(engine, session_store_size: int, revoked_token_count: int, stats: RouteStats = route_stats, jobs: Iterable[JobMetrics] = JOBS) -> str:
+    writer = _Writer()
+    routes: List[Tuple[Tuple[str, str], Dict[str, Histogram]]] = sorted(stats.items())
+
+    writer.header("gadi_http_request_duration_seconds", "histogram", "Request latency by route template")
+    for (method, route), histograms in routes:
+        writer.histogram("gadi_http_request_duration_seconds", histograms["total_ms"], {"method": method, "route": route}, scale=0.001)
+
+    writer.header("gadi_http_request_db_duration_seconds", "histogram", "Time spent in SQL statements per request")
+    for (method, route), histograms in routes:
+        writer.histogram("gadi_http_request_db_duration_seconds", histograms["db_ms"], {"method": method, "route": route}, scale=0.001)
+
+    writer.header("gadi_http_request_queries", "histogram", "SQL statements executed per request")
+    for (method, route), histograms in routes:
+        writer.histogram("gadi_http_request_queries", histograms["queries"], {"method": method, "route": route})
+
+    writer.header("gadi_http_requests_in_flight", "gauge", "Requests currently being handled, including open event streams")
+    writer.sample("gadi_http_requests_in_flight", stats.in_flight)
+
+    writer.header("gadi_http_responses_total", "counter", "Responses sent by status code")
+    for status, count in sorted(stats.responses.items()):
+        writer.sample("gadi_http_responses_total", count, {"status": status})
+
+    pool = engine.pool
+    for name, method, description in (
+        ("gadi_db_pool_size", "size", "Configured pool size"),
+        ("gadi_db_pool_checked_out", "checkedout", "Connections currently checked out"),
+        ("gadi_db_pool_checked_in", "checkedin", "Idle connections in the pool"),
+        ("gadi_db_pool_overflow", "overflow", "Connections opened beyond the pool size"),
+    ):
+        # Not every pool class (e.g. StaticPool, NullPool) reports every figure
+        if hasattr(pool, method):
+            writer.header(name, "gauge", description)
+            # QueuePool.overflow() is negative while fewer than pool_size connections exist
+            writer.sample(name, max(0, getattr(pool, method)()))
+
+    writer.header("gadi_sessions", "gauge", "Sessions in the in-memory session store")
+    writer.sample("gadi_sessions", session_store_size)
+    writer.header("gadi_revoked_tokens", "gauge", "Signed tokens on the revocation list")
+    writer.sample("gadi_revoked_tokens", revoked_token_count)
+
+    for job in jobs:
+        prefix = f"gadi_job_{job.name}"
+        writer.header(f"{prefix}_in_progress", "gauge", f"{job.description} currently running")
+        writer.sample(f"{prefix}_in_progress", job.in_progress)
+        writer.header(f"{prefix}_failures_total", "counter", f"{job.description} that raised")
+        writer.sample(f"{prefix}_failures_total", job.failures)
+        writer.header(f"{prefix}_duration_seconds", "histogram", f"{job.description} duration")
+        writer.histogram(f"{prefix}_duration_seconds", job.duration)
+        if job.last_success is not None:
+            writer.header(f"{prefix}_last_success_timestamp_seconds", "gauge", f"Unix time of the last successful {job.name}")
+            writer.sample(f"{prefix}_last_success_timestamp_seconds", job.last_success)
+
+    return writer.render()
@@ -1,7 +1,7 @@
 """
 Database models for GADIApp
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, Date, DateTime, Time, Text, ForeignKey, JSON, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -24,17 +24,46 @@ class Employee(Base):
     task_assignments = relationship("TaskAssignment", foreign_keys="TaskAssignment.empleado_id")
     register_entries = relationship("RegisterEntry", back_populates="employee")
 
+class ShiftDefinition(Base):
+    """Named shift with its time window; end_time <= start_time means the shift ends the next day"""
+    __tablename__ = "shift_definitions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    orden = Column(Integer, default=0)
+    activo = Column(Boolean, default=True)
+    
+    # Relationships
+    schedules = relationship("Schedule", back_populates="shift")
+    
+    __table_args__ = (UniqueConstraint('nombre', 'start_time', 'end_time', name='unique_shift_definition'),)
+
 class Schedule(Base):
     __tablename__ = "schedules"
     
     id = Column(Integer, primary_key=True, index=True)
-    fecha = Column(String, nullable=False)
-    turno = Column(String, nullable=False)
+    fecha = Column(Date, nullable=False, index=True)
+    turno = Column(String, nullable=False)  # Display label, kept for backward compatibility
     empleado_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    shift_definition_id = Column(Integer, ForeignKey("shift_definitions.id"), nullable=True)
+    start_at = Column(DateTime, nullable=True)  # Concrete shift interval in local farm time
+    end_at = Column(DateTime, nullable=True)
+    # Delta sync: version is stamped from sync_clock on every ORM insert/update (see app/sync.py)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     employee = relationship("Employee", back_populates="schedules")
+    shift = relationship("ShiftDefinition", back_populates="schedules")
     task_assignments = relationship("TaskAssignment", back_populates="schedule")
+    
+    __table_args__ = (
+        Index('ix_schedules_start_at_end_at', 'start_at', 'end_at'),
+        Index('ix_schedules_empleado_id_start_at', 'empleado_id', 'start_at'),
+        Index('ix_schedules_version', 'version'),
+    )
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -43,7 +72,7 @@ class Task(Base):
     titulo = Column(String, nullable=False)
     descripcion = Column(Text, nullable=True)
     empleado_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
-    fecha = Column(String, nullable=False)
+    fecha = Column(Date, nullable=False, index=True)
     estado = Column(String, default="pendiente")
     prioridad = Column(String, default="media")
     is_recurring = Column(Boolean, default=False)
@@ -54,9 +83,18 @@ class Task(Base):
     register_id = Column(Integer, ForeignKey("registers.id"), nullable=True)
     procedure_id = Column(Integer, ForeignKey("procedures.id"), nullable=True)
     requires_signature = Column(Boolean, default=False)
+    # Delta sync: version is stamped from sync_clock on every ORM insert/update (see app/sync.py)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     employee = relationship("Employee", back_populates="tasks")
+    
+    __table_args__ = (
+        Index('ix_tasks_empleado_id_version', 'empleado_id', 'version'),
+        # Agenda: per-employee date ranges, same shape as task_assignments
+        Index('ix_tasks_empleado_id_fecha', 'empleado_id', 'fecha'),
+    )
 
 class Permission(Base):
     __tablename__ = "permissions"
@@ -84,10 +122,17 @@ class Register(Base):
     requiere_firma = Column(Boolean, default=False)
     campos_personalizados = Column(JSON, default=list)  # Custom field definitions
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Delta sync: version is stamped from sync_clock on every ORM insert/update (see app/sync.py)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     entries = relationship("RegisterEntry", back_populates="register")
     procedures = relationship("Procedure", back_populates="register")
+    
+    __table_args__ = (
+        Index('ix_registers_version', 'version'),
+    )
 
 class Procedure(Base):
     __tablename__ = "procedures"
@@ -127,6 +172,47 @@ class RegisterEntry(Base):
     employee = relationship("Employee", back_populates="register_entries")
     task = relationship("Task", foreign_keys=[task_id])
     procedure = relationship("Procedure", foreign_keys=[procedure_id])
+    
+    # On Postgres the table is partitioned by month of fecha_completado (migration 0006); closed
+    # months are moved to archive files by app/archive.py
+    __table_args__ = (
+        Index('ix_register_entries_register_id_fecha_completado', 'register_id', 'fecha_completado'),
+    )
+
+class RegisterEntryArchive(Base):
+    """One compressed NDJSON file holding a register's entries for one archived month"""
+    __tablename__ = "register_entry_archives"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    register_id = Column(Integer, nullable=False)  # No foreign key: archives outlive deleted registers
+    month = Column(Date, nullable=False)  # First day of the archived month (UTC)
+    path = Column(String, nullable=False, unique=True)  # Relative to REGISTER_ARCHIVE_DIR
+    row_count = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index('ix_register_entry_archives_register_id_month', 'register_id', 'month'),
+    )
+
+class RegisterEntryAttachment(Base):
+    """Photo attached to a register entry; the file lives in the blob store under its SHA-256"""
+    __tablename__ = "register_entry_attachments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: on Postgres register_entries is partitioned and has no unique id, and entries may be archived
+    register_entry_id = Column(Integer, nullable=False, index=True)
+    register_id = Column(Integer, nullable=False)
+    filename = Column(String, nullable=True)
+    content_type = Column(String, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    thumbnail_status = Column(String, nullable=False, default="pending")  # pending, ready, failed
+    thumbnail_sha256 = Column(String(64), nullable=True)
+    uploaded_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class ManagerInboxNotification(Base):
     __tablename__ = "manager_inbox_notifications"
@@ -170,7 +256,7 @@ class TaskAssignment(Base):
     id = Column(Integer, primary_key=True, index=True)
     task_definition_id = Column(Integer, ForeignKey("task_definitions.id"), nullable=False)
     empleado_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
-    fecha = Column(String, nullable=False)
+    fecha = Column(Date, nullable=False, index=True)
     schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=True)
     estado = Column(String, default="pendiente")  # pendiente, en_progreso, completada
     priority_override = Column(String, nullable=True)  # Override default priority
@@ -181,6 +267,9 @@ class TaskAssignment(Base):
     notes = Column(Text, nullable=True)
     created_by = Column(Integer, ForeignKey("employees.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Delta sync: version is stamped from sync_clock on every ORM insert/update (see app/sync.py)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     task_definition = relationship("TaskDefinition", back_populates="assignments")
@@ -189,7 +278,11 @@ class TaskAssignment(Base):
     created_by_employee = relationship("Employee", foreign_keys=[created_by])
     
     # Unique constraint to prevent duplicate assignments
-    __table_args__ = (UniqueConstraint('task_definition_id', 'empleado_id', 'fecha', name='unique_task_assignment'),)
+    __table_args__ = (
+        UniqueConstraint('task_definition_id', 'empleado_id', 'fecha', name='unique_task_assignment'),
+        Index('ix_task_assignments_empleado_id_version', 'empleado_id', 'version'),
+        Index('ix_task_assignments_empleado_id_fecha', 'empleado_id', 'fecha'),
+    )
 
 class RecurringTask(Base):
     __tablename__ = "recurring_tasks"
@@ -204,4 +297,66 @@ class RecurringTask(Base):
     last_generated = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
-    employee = relationship("Employee")
\ No newline at end of file
+    employee = relationship("Employee")
+
+class SyncClock(Base):
+    """Single-row counter that hands out delta sync versions"""
+    __tablename__ = "sync_clock"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    pruned_version = Column(BigInteger, nullable=False, default=0)  # Tombstones up to here were pruned
+
+class SyncTombstone(Base):
+    """A synced row that was deleted, or moved away from an employee, at a given version"""
+    __tablename__ = "sync_tombstones"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entity = Column(String, nullable=False)  # Table name of the deleted row
+    row_id = Column(Integer, nullable=False)
+    empleado_id = Column(Integer, nullable=True)  # Owner at deletion time; None for shared rows
+    version = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index('ix_sync_tombstones_entity_version', 'entity', 'version'),
+    )
+
+class IdempotencyRecord(Base):
+    """Stored response of a write sent with an Idempotency-Key header (see app/idempotency.py)"""
+    __tablename__ = "idempotency_records"
+    
+    id = Column(String(64), primary_key=True)  # sha256 of caller + key, so a replay is one primary key lookup
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path and body
+    status_code = Column(Integer, nullable=True)  # None while the first request is still running
+    content_type = Column(String, nullable=True)
+    body = Column(LargeBinary, nullable=True)  # zlib-compressed response body
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class RevokedToken(Base):
+    """A signed token revoked by logout, shared so every worker rejects it (see app/tokens.py)"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(32), primary_key=True)
+    exp = Column(Integer, nullable=False, index=True)  # The token's own expiry (epoch seconds); the row is useless after it
+
+class AuditEvent(Base):
+    """Who changed what: one row per changed entity, written in batches by app/audit.py"""
+    __tablename__ = "audit_events"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)  # Commit time, not insert time
+    actor_id = Column(Integer, nullable=True)  # None for background jobs
+    actor_name = Column(String, nullable=True)  # As it was at the time; names can change later
+    action = Column(String, nullable=False)  # create, update, delete, or a specific action such as permissions.update
+    entity_type = Column(String, nullable=False)  # Table name, or router name for non-database state
+    entity_id = Column(String(64), nullable=True)
+    changes = Column(JSON, nullable=True)  # create/delete: field values; update: {field: [old, new]}
+    method = Column(String(10), nullable=True)
+    path = Column(String, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_audit_events_entity', 'entity_type', 'entity_id', 'occurred_at'),
+        Index('ix_audit_events_actor_id_occurred_at', 'actor_id', 'occurred_at'),
+        Index('ix_audit_events_occurred_at', 'occurred_at'),
+    )
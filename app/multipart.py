@@ -0,0 +1,111 @@
+"""
+Streaming multipart/form-data reader for file uploads
+
+Starlette's form parser needs python-multipart, which is not a dependency, and the uploads it
+serves (photos of several MB from many phones at once) should not be held in memory. This
+reads the request stream once and reports parts as events, keeping at most one chunk plus a
+partial delimiter buffered.
+"""
+import re
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+MAX_HEADER_BYTES = 16 * 1024
+
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+_PARAMETER = re.compile(r';\s*([A-Za-z*]+)="?([^";]*)"?')
+
+
+class MultipartError(ValueError):
+    """Malformed multipart body"""
+
+
+def parse_boundary(content_type: Optional[str]) -> bytes:
+    """Boundary from a multipart/form-data Content-Type header"""
+    if not content_type or not content_type.lower().startswith("multipart/form-data"):
+        raise MultipartError("Expected a multipart/form-data body")
+    match = _BOUNDARY.search(content_type)
+    if not match or len(match.group(1)) > 70:
+        raise MultipartError("Missing or invalid multipart boundary")
+    return match.group(1).encode("latin-1")
+
+
+def _parse_headers(block: bytes) -> Dict[str, str]:
+    headers = {}
+    for line in block.decode("utf-8", "replace").split("\r\n"):
+        name, separator, value = line.partition(":")
+        if not separator:
+            raise MultipartError("Malformed part header")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def content_disposition(headers: Dict[str, str]) -> Tuple[Optional[str], Optional[str]]:
+    """Field name and file name (None for plain fields) of a part"""
+    parameters = {key.lower(): value for key, value in _PARAMETER.findall(headers.get("content-disposition", ""))}
+    return parameters.get("name"), parameters.get("filename")
+
+
+async def multipart_events(stream: AsyncIterator[bytes], boundary: bytes) -> AsyncIterator[Tuple[str, object]]:
+    """Yield ("part", headers), then ("data", bytes) zero or more times, then ("end", None), for every part"""
+    delimiter = b"\r\n--" + boundary
+    # Leading CRLF so the first boundary line matches the same delimiter as the others
+    buffer = bytearray(b"\r\n")
+    state = "preamble"
+
+    async for chunk in stream:
+        buffer.extend(chunk)
+        while True:
+            if state == "preamble":
+                index = buffer.find(delimiter)
+                if index < 0:
+                    del buffer[:max(0, len(buffer) - len(delimiter) + 1)]
+                    break
+                del buffer[:index + len(delimiter)]
+                state = "boundary"
+
+            elif state == "boundary":
+                if buffer[:2] == b"--":
+                    state = "done"
+                    break
+                line_end = buffer.find(b"\r\n")
+                if line_end < 0:
+                    if len(buffer) > 1024:
+                        raise MultipartError("Malformed boundary line")
+                    break
+                del buffer[:line_end + 2]
+                state = "headers"
+
+            elif state == "headers":
+                if buffer[:2] == b"\r\n":
+                    headers_end, headers = 0, {}
+                else:
+                    headers_end = buffer.find(b"\r\n\r\n")
+                    if headers_end < 0:
+                        if len(buffer) > MAX_HEADER_BYTES:
+                            raise MultipartError("Part headers too large")
+                        break
+                    headers = _parse_headers(bytes(buffer[:headers_end]))
+                del buffer[:headers_end + (4 if headers_end else 2)]
+                yield "part", headers
+                state = "body"
+
+            elif state == "body":
+                index = buffer.find(delimiter)
+                if index < 0:
+                    # Everything except what could be the start of a split delimiter
+                    keep = len(delimiter) - 1
+                    if len(buffer) > keep:
+                        yield "data", bytes(buffer[:-keep])
+                        del buffer[:-keep]
+                    break
+                if index:
+                    yield "data", bytes(buffer[:index])
+                del buffer[:index + len(delimiter)]
+                yield "end", None
+                state = "boundary"
+
+            else:
+                break
+
+    if state != "done":
+        raise MultipartError("Incomplete multipart body")
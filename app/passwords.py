@@ -0,0 +1,125 @@
+"""
+Password hashing with scrypt and a bounded, non-blocking verify path
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from typing import Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+SCHEME = "scrypt"
+SCRYPT_N = int(os.environ.get("PASSWORD_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.environ.get("PASSWORD_SCRYPT_R", "8"))
+SCRYPT_P = int(os.environ.get("PASSWORD_SCRYPT_P", "1"))
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# Each scrypt call holds ~128 * N * r bytes; capping concurrent hashes keeps memory
+# flat and login latency predictable when a whole shift logs in at once
+HASH_CONCURRENCY = int(os.environ.get("PASSWORD_HASH_CONCURRENCY", str(os.cpu_count() or 2)))
+# Longest a login may wait for a slot before it is shed instead of queued
+HASH_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+_hash_slots = None
+
+
+class HashingBusy(Exception):
+    """Raised when no hashing slot frees up within HASH_QUEUE_TIMEOUT_SECONDS"""
+
+
+def _derive(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r, dklen=KEY_BYTES
+    )
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def hash_password(password: str) -> str:
+    """Hash a password as scrypt$n$r$p$salt$key"""
+    salt = os.urandom(SALT_BYTES)
+    key = _derive(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{SCHEME}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}"
+
+
+def is_hashed(stored: str) -> bool:
+    return bool(stored) and stored.startswith(f"{SCHEME}$")
+
+
+def _parse(stored: str) -> Tuple[int, int, int, bytes, bytes]:
+    _, n, r, p, salt, key = stored.split("$")
+    return int(n), int(r), int(p), _unb64(salt), _unb64(key)
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against a stored hash; legacy rows still hold the plaintext"""
+    if not stored:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    try:
+        n, r, p, salt, key = _parse(stored)
+    except ValueError:
+        return False
+    return hmac.compare_digest(_derive(password, salt, n, r, p), key)
+
+
+def needs_rehash(stored: str) -> bool:
+    """True for plaintext rows and hashes made with older cost parameters"""
+    if not is_hashed(stored):
+        return True
+    try:
+        n, r, p, _, _ = _parse(stored)
+    except ValueError:
+        return True
+    return (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+# Verified when the email is unknown so response time does not reveal which accounts exist
+_DUMMY_HASH = None
+
+
+def _dummy_hash() -> str:
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_password(base64.b64encode(os.urandom(12)).decode("ascii"))
+    return _DUMMY_HASH
+
+
+def _verify_dummy(password: str) -> bool:
+    verify_password(password, _dummy_hash())
+    return False
+
+
+async def _run_hashing(func, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(HASH_CONCURRENCY)
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HashingBusy()
+    try:
+        return await run_in_threadpool(func, *args)
+    finally:
+        _hash_slots.release()
+
+
+async def verify_password_async(password: str, stored: str) -> bool:
+    """verify_password in the thread pool, at most HASH_CONCURRENCY at a time"""
+    if stored is None:
+        return await _run_hashing(_verify_dummy, password)
+    return await _run_hashing(verify_password, password, stored)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
@@ -0,0 +1,239 @@
+"""
+Workload balancing planner for task assignments
+"""
+import re
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.dates import date_range
+from app.models import Employee, Schedule, TaskAssignment, TaskDefinition
+
+# Matches the time window inside shift labels such as "Mañana (08:00-16:00)"
+SHIFT_WINDOW_PATTERN = re.compile(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})")
+
+DEFAULT_SHIFT_WINDOW = (8 * 60, 16 * 60)
+DEFAULT_TASK_DURATION_MINUTES = 60
+PRIORITY_ORDER = {"alta": 0, "media": 1, "baja": 2}
+
+
+def parse_shift_window(turno: str) -> Tuple[int, int]:
+    """Return (start, end) in minutes from midnight; end > start even for overnight shifts"""
+    match = SHIFT_WINDOW_PATTERN.search(turno or "")
+    if not match:
+        return DEFAULT_SHIFT_WINDOW
+
+    start_hour, start_minute, end_hour, end_minute = (int(part) for part in match.groups())
+    start = start_hour * 60 + start_minute
+    end = end_hour * 60 + end_minute
+    if end <= start:
+        # Overnight shift, e.g. 16:00-00:00 or 22:00-06:00
+        end += 24 * 60
+    return start, end
+
+
+def required_dates(definition: TaskDefinition, fechas: List[date]) -> Optional[List[date]]:
+    """Dates a definition must be planned on; None means once, on any date in the range"""
+    if not definition.is_recurring or definition.frequency == "daily":
+        return fechas if definition.is_recurring else None
+    if definition.frequency == "weekly":
+        return fechas[::7]
+    if definition.frequency == "monthly":
+        return [fecha for fecha in fechas if fecha.day == fechas[0].day]
+    return fechas
+
+
+class WorkloadPlanner:
+    """Greedy longest-job-first placement followed by a local search that evens out employee load"""
+
+    def __init__(self, db: Session, definitions: List[TaskDefinition], fecha_inicio: date, fecha_fin: date, max_moves: int = 5000):
+        self.definitions = {definition.id: definition for definition in definitions}
+        self.fechas = date_range(fecha_inicio, fecha_fin)
+        self.max_moves = max_moves
+
+        # shift id -> shift state; employee id -> total planned minutes in range
+        self.shifts: Dict[int, Dict[str, Any]] = {}
+        self.shifts_by_day: Dict[date, List[int]] = defaultdict(list)
+        self.employee_load: Dict[int, int] = defaultdict(int)
+        self.taken = set()  # (definition id, employee id, fecha) already assigned
+        self.covered = set()  # (definition id, fecha) with an existing assignment
+
+        self.placements: List[Dict[str, Any]] = []
+        self.unassigned: List[Dict[str, Any]] = []
+
+        self._load(db)
+
+    def _load(self, db: Session):
+        rows = db.query(Schedule.id, Schedule.empleado_id, Schedule.fecha, Schedule.turno, Schedule.start_at, Schedule.end_at).join(
+            Employee, Employee.id == Schedule.empleado_id
+        ).filter(
+            Employee.activo == True,
+            Schedule.fecha >= self.fechas[0],
+            Schedule.fecha <= self.fechas[-1]
+        ).all()
+        for schedule_id, empleado_id, fecha, turno, start_at, end_at in rows:
+            if start_at and end_at:
+                start = start_at.hour * 60 + start_at.minute
+                end = start + int((end_at - start_at).total_seconds() // 60)
+            else:
+                start, end = parse_shift_window(turno)
+            self.shifts[schedule_id] = {
+                "schedule_id": schedule_id,
+                "empleado_id": empleado_id,
+                "fecha": fecha,
+                "start": start,
+                "capacity": end - start,
+                "used": 0
+            }
+            self.shifts_by_day[fecha].append(schedule_id)
+            self.employee_load[empleado_id] += 0
+
+        # Existing assignments consume capacity and count towards balance
+        existing = db.query(
+            TaskAssignment.task_definition_id, TaskAssignment.empleado_id, TaskAssignment.fecha,
+            TaskAssignment.schedule_id, TaskAssignment.planned_duration_minutes, TaskDefinition.default_duration_minutes
+        ).join(TaskDefinition, TaskDefinition.id == TaskAssignment.task_definition_id).filter(
+            TaskAssignment.fecha >= self.fechas[0],
+            TaskAssignment.fecha <= self.fechas[-1]
+        ).all()
+        for definition_id, empleado_id, fecha, schedule_id, planned, default in existing:
+            minutes = planned or default or DEFAULT_TASK_DURATION_MINUTES
+            self.taken.add((definition_id, empleado_id, fecha))
+            self.covered.add((definition_id, fecha))
+            self.employee_load[empleado_id] += minutes
+            if schedule_id in self.shifts:
+                self.shifts[schedule_id]["used"] += minutes
+
+    def _jobs(self) -> List[Dict[str, Any]]:
+        jobs = []
+        for definition in self.definitions.values():
+            duration = definition.default_duration_minutes or DEFAULT_TASK_DURATION_MINUTES
+            dates = required_dates(definition, self.fechas)
+            if dates is None:
+                # One-off definitions are planned once unless already assigned in the range
+                covered = any((definition.id, fecha) in self.covered for fecha in self.fechas)
+                dates = [] if covered else [None]
+            for fecha in dates:
+                if fecha is not None and (definition.id, fecha) in self.covered:
+                    continue
+                jobs.append({"definition_id": definition.id, "fecha": fecha, "duration": duration})
+        # Longest jobs first leaves the small ones to fill the gaps
+        jobs.sort(key=lambda job: -job["duration"])
+        return jobs
+
+    def _fits(self, shift: Dict[str, Any], definition_id: int, duration: int) -> bool:
+        return (
+            shift["capacity"] - shift["used"] >= duration
+            and (definition_id, shift["empleado_id"], shift["fecha"]) not in self.taken
+        )
+
+    def _best_shift(self, job: Dict[str, Any]) -> Optional[int]:
+        fechas = [job["fecha"]] if job["fecha"] else self.fechas
+        best_id, best_key = None, None
+        for fecha in fechas:
+            for shift_id in self.shifts_by_day.get(fecha, []):
+                shift = self.shifts[shift_id]
+                if not self._fits(shift, job["definition_id"], job["duration"]):
+                    continue
+                key = (self.employee_load[shift["empleado_id"]], shift["used"])
+                if best_key is None or key < best_key:
+                    best_id, best_key = shift_id, key
+        return best_id
+
+    def _place(self, placement: Dict[str, Any], shift_id: int):
+        shift = self.shifts[shift_id]
+        placement["shift_id"] = shift_id
+        shift["used"] += placement["duration"]
+        self.employee_load[shift["empleado_id"]] += placement["duration"]
+        self.taken.add((placement["definition_id"], shift["empleado_id"], shift["fecha"]))
+
+    def _unplace(self, placement: Dict[str, Any]):
+        shift = self.shifts[placement["shift_id"]]
+        shift["used"] -= placement["duration"]
+        self.employee_load[shift["empleado_id"]] -= placement["duration"]
+        self.taken.discard((placement["definition_id"], shift["empleado_id"], shift["fecha"]))
+
+    def _greedy(self):
+        for job in self._jobs():
+            shift_id = self._best_shift(job)
+            if shift_id is None:
+                self.unassigned.append({
+                    "task_definition_id": job["definition_id"],
+                    "fecha": job["fecha"],
+                    "reason": "no_capacity"
+                })
+                continue
+            placement = {"definition_id": job["definition_id"], "duration": job["duration"]}
+            self._place(placement, shift_id)
+            self.placements.append(placement)
+
+    def _local_search(self):
+        """Move jobs off the busiest employees while that strictly narrows the load gap"""
+        by_employee: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for placement in self.placements:
+            by_employee[self.shifts[placement["shift_id"]]["empleado_id"]].append(placement)
+
+        for _ in range(self.max_moves):
+            if not by_employee:
+                return
+            busiest = max(by_employee, key=lambda empleado_id: self.employee_load[empleado_id])
+            busiest_load = self.employee_load[busiest]
+
+            best = None
+            for placement in by_employee[busiest]:
+                fecha = self.shifts[placement["shift_id"]]["fecha"]
+                for shift_id in self.shifts_by_day[fecha]:
+                    shift = self.shifts[shift_id]
+                    target_load = self.employee_load[shift["empleado_id"]]
+                    # Only moves that leave both employees below the current maximum help
+                    if target_load + placement["duration"] >= busiest_load:
+                        continue
+                    if not self._fits(shift, placement["definition_id"], placement["duration"]):
+                        continue
+                    if best is None or target_load < best[2]:
+                        best = (placement, shift_id, target_load)
+
+            if best is None:
+                return
+
+            placement, shift_id, _ = best
+            by_employee[busiest].remove(placement)
+            self._unplace(placement)
+            self._place(placement, shift_id)
+            by_employee[self.shifts[shift_id]["empleado_id"]].append(placement)
+
+    def solve(self) -> List[Dict[str, Any]]:
+        """Build the plan and return one entry per assignment, with sequential start times per shift"""
+        self._greedy()
+        self._local_search()
+
+        by_shift: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for placement in self.placements:
+            by_shift[placement["shift_id"]].append(placement)
+
+        plan = []
+        for shift_id, placements in by_shift.items():
+            shift = self.shifts[shift_id]
+            # Start after whatever was already booked on this shift
+            offset = shift["used"] - sum(placement["duration"] for placement in placements)
+            day = datetime.combine(shift["fecha"], time())
+            placements.sort(key=lambda placement: PRIORITY_ORDER.get(self.definitions[placement["definition_id"]].prioridad, 1))
+            for placement in placements:
+                plan.append({
+                    "task_definition_id": placement["definition_id"],
+                    "titulo": self.definitions[placement["definition_id"]].titulo,
+                    "empleado_id": shift["empleado_id"],
+                    "fecha": shift["fecha"],
+                    "schedule_id": shift_id,
+                    "planned_start": day + timedelta(minutes=shift["start"] + offset),
+                    "planned_duration_minutes": placement["duration"]
+                })
+                offset += placement["duration"]
+
+        plan.sort(key=lambda item: (item["fecha"], item["empleado_id"], item["planned_start"]))
+        return plan
+
+    def employee_loads(self) -> Dict[int, int]:
+        return dict(self.employee_load)
@@ -0,0 +1,179 @@
+"""
+Per-request SQL statement counting and timing, Server-Timing headers and per-route histograms
+"""
+import bisect
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+APP_ENV = os.environ.get("APP_ENV", "development").lower()
+# Same statement executed more than this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("QUERY_N_PLUS_ONE_THRESHOLD", "10"))
+N_PLUS_ONE_DETECTION = os.environ.get("QUERY_N_PLUS_ONE_DETECTION", "1" if APP_ENV == "development" else "0").lower() in ("1", "true", "yes")
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+DURATION_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Literal lists such as IN (?, ?, ?) vary in length; collapse them so the statement shape repeats
+_PARAM_LIST_PATTERN = re.compile(r"\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*,?)+\)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class RequestQueryStats:
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.db_seconds += seconds
+        if N_PLUS_ONE_DETECTION:
+            self.statements[normalize_statement(statement)] += 1
+
+    def repeated_statements(self, threshold: int = None) -> List[Tuple[str, int]]:
+        limit = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return [(statement, count) for statement, count in self.statements.most_common() if count > limit]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    return _PARAM_LIST_PATTERN.sub("(...)", _WHITESPACE_PATTERN.sub(" ", statement).strip())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install_query_hooks(engine: Engine):
+    """Attach the timing listeners once per engine"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style: counts per upper bound, plus sum and count"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"buckets": buckets, "sum": round(self.sum, 3), "count": self.count}
+
+
+class RouteStats:
+    """Query count, DB time and total time histograms keyed by (method, route template)
+
+    Only the middleware writes here, always from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], Dict[str, Histogram]] = {}
+        self.in_flight = 0
+        self.responses: Counter = Counter()  # status code -> responses sent
+
+    def observe(self, method: str, route: str, stats: RequestQueryStats, total_ms: float):
+        histograms = self._routes.get((method, route))
+        if histograms is None:
+            histograms = self._routes[(method, route)] = {
+                "queries": Histogram(QUERY_COUNT_BUCKETS),
+                "db_ms": Histogram(DURATION_MS_BUCKETS),
+                "total_ms": Histogram(DURATION_MS_BUCKETS),
+            }
+        histograms["queries"].observe(stats.count)
+        histograms["db_ms"].observe(stats.db_seconds * 1000)
+        histograms["total_ms"].observe(total_ms)
+
+    def items(self) -> List[Tuple[Tuple[str, str], Dict[str, Histogram]]]:
+        return list(self._routes.items())
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{
+            "method": method,
+            "route": route,
+            **{name: histogram.snapshot() for name, histogram in histograms.items()}
+        } for (method, route), histograms in sorted(self.items())]
+
+    def reset(self):
+        self._routes.clear()
+        self.responses.clear()
+
+
+route_stats = RouteStats()
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware: collects statement stats for each HTTP request and reports them in Server-Timing"""
+
+    def __init__(self, app, stats: RouteStats = route_stats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        self.stats.in_flight += 1
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                self.stats.responses[message["status"]] += 1
+                total_ms = (time.perf_counter() - started) * 1000
+                header = (
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.stats.in_flight -= 1
+            _current_stats.reset(token)
+            # The router stores the matched route in the scope; unmatched paths share one bucket
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            self.stats.observe(scope["method"], route_path, stats, (time.perf_counter() - started) * 1000)
+            for statement, count in stats.repeated_statements():
+                logger.warning(
+                    "Possible N+1 in %s %s: statement executed %d times: %s",
+                    scope["method"], route_path, count, statement[:300]
+                )
@@ -0,0 +1,63 @@
+"""
+In-memory token-bucket rate limiting
+"""
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucketLimiter:
+    """One bucket per key: `capacity` requests in a burst, refilled at `refill_per_second`"""
+
+    def __init__(self, capacity: int, refill_per_second: float, max_keys: int = 100000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, last refill)
+        self._lock = threading.Lock()
+
+    def _refill(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+    def acquire(self, key: str) -> Optional[float]:
+        """Take one token; returns None when allowed, otherwise seconds until the next token"""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self.refill_per_second
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return None
+
+    def reset(self, key: str):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _prune(self, now: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        full_after = self.capacity / self.refill_per_second
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[key]
+
+
+def retry_after_header(wait_seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(wait_seconds)))}
+
+
+# Per-IP buckets are generous because a whole farm can log in from one NAT address at
+# shift start; per-email buckets are tight to slow down guessing a single account
+login_ip_limiter = TokenBucketLimiter(
+    capacity=int(os.environ.get("LOGIN_RATE_IP_BURST", "300")),
+    refill_per_second=float(os.environ.get("LOGIN_RATE_IP_PER_SECOND", "5"))
+)
+login_email_limiter = TokenBucketLimiter(
+    capacity=int(os.environ.get("LOGIN_RATE_EMAIL_BURST", "5")),
+    refill_per_second=float(os.environ.get("LOGIN_RATE_EMAIL_PER_SECOND", "0.1"))
+)
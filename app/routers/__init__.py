@@ -0,0 +1,3 @@
+"""
+Per-domain API routers; registered by app.factory.create_app
+"""
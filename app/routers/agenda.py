@@ -0,0 +1,146 @@
+"""
+Agenda: ad hoc tasks and task assignments of employees as one sorted, paginated list
+"""
+from datetime import date
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import DateTime, Integer, case, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app.auth import has_permission, require_any_permission
+from app.database import get_db
+from app.models import Employee, Task, TaskAssignment, TaskDefinition
+
+router = APIRouter(prefix="/agenda", tags=["agenda"])
+
+MAX_LIMIT = 200
+PRIORITY_ORDER = {"alta": 0, "media": 1, "baja": 2}
+
+def _filtered(query, model, empleado_id: Optional[int], desde: Optional[date], hasta: Optional[date], estado: Optional[str]):
+    if empleado_id is not None:
+        query = query.where(model.empleado_id == empleado_id)
+    if desde is not None:
+        query = query.where(model.fecha >= desde)
+    if hasta is not None:
+        query = query.where(model.fecha <= hasta)
+    if estado:
+        query = query.where(model.estado == estado)
+    return query
+
+def _agenda_query(empleado_id: Optional[int], desde: Optional[date], hasta: Optional[date], estado: Optional[str]):
+    """UNION ALL of both work models in one row shape; each arm is served by its (empleado_id, fecha) index"""
+    tasks = (
+        select(
+            literal("task").label("type"),
+            Task.id.label("id"),
+            Task.titulo.label("titulo"),
+            Task.descripcion.label("descripcion"),
+            Task.empleado_id.label("empleado_id"),
+            Employee.nombre.label("empleado"),
+            Task.fecha.label("fecha"),
+            Task.estado.label("estado"),
+            Task.prioridad.label("prioridad"),
+            cast(null(), DateTime(timezone=True)).label("planned_start"),
+            cast(null(), Integer).label("planned_duration_minutes"),
+            cast(null(), Integer).label("task_definition_id"),
+            Task.register_id.label("register_id"),
+            Task.procedure_id.label("procedure_id"),
+        )
+        .join(Employee, Employee.id == Task.empleado_id)
+        .where(Employee.activo == True)
+    )
+    assignments = (
+        select(
+            literal("task_assignment"),
+            TaskAssignment.id,
+            TaskDefinition.titulo,
+            TaskDefinition.descripcion,
+            TaskAssignment.empleado_id,
+            Employee.nombre,
+            TaskAssignment.fecha,
+            TaskAssignment.estado,
+            func.coalesce(TaskAssignment.priority_override, TaskDefinition.prioridad),
+            TaskAssignment.planned_start,
+            func.coalesce(TaskAssignment.planned_duration_minutes, TaskDefinition.default_duration_minutes),
+            TaskAssignment.task_definition_id,
+            TaskDefinition.register_id,
+            TaskDefinition.procedure_id,
+        )
+        .join(TaskDefinition, TaskDefinition.id == TaskAssignment.task_definition_id)
+        .join(Employee, Employee.id == TaskAssignment.empleado_id)
+        .where(Employee.activo == True)
+    )
+
+    # Filters go into both arms so each one can use its index before the rows are merged
+    tasks = _filtered(tasks, Task, empleado_id, desde, hasta, estado)
+    assignments = _filtered(assignments, TaskAssignment, empleado_id, desde, hasta, estado)
+    return union_all(tasks, assignments).subquery("agenda")
+
+@router.get("")
+async def get_agenda(
+    empleado_id: int = None,
+    desde: date = None,
+    hasta: date = None,
+    estado: str = None,
+    limit: int = 50,
+    offset: int = 0,
+    user: Dict[str, Any] = Depends(require_any_permission(["tasks.view", "tasks.view_all"])),
+    db: Session = Depends(get_db)
+):
+    """Tasks and task assignments sorted by fecha, priority and planned start, in a single query"""
+    if not 1 <= limit <= MAX_LIMIT or offset < 0:
+        raise HTTPException(status_code=400, detail=f"limit must be 1-{MAX_LIMIT} and offset 0 or more")
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="desde must not be after hasta")
+
+    # Same visibility as /tasks: own agenda only without tasks.view_all
+    if not has_permission(user, "tasks.view_all", db):
+        if empleado_id and empleado_id != user.get("id"):
+            raise HTTPException(status_code=403, detail="Can only view your own agenda")
+        empleado_id = user.get("id")
+
+    agenda = _agenda_query(empleado_id, desde, hasta, estado)
+    priority = case(PRIORITY_ORDER, value=agenda.c.prioridad, else_=len(PRIORITY_ORDER))
+    rows = db.execute(
+        select(agenda, func.count().over().label("total"))
+        .order_by(
+            agenda.c.fecha,
+            priority,
+            agenda.c.planned_start.is_(None),
+            agenda.c.planned_start,
+            agenda.c.type,
+            agenda.c.id,
+        )
+        .limit(limit)
+        .offset(offset)
+    ).mappings().all()
+
+    # The window count rides along with the page; only a page past the end needs its own count
+    if rows:
+        total = rows[0]["total"]
+    elif offset:
+        total = db.execute(select(func.count()).select_from(agenda)).scalar()
+    else:
+        total = 0
+
+    items = [
+        {
+            "type": row["type"],
+            "id": row["id"],
+            "titulo": row["titulo"],
+            "descripcion": row["descripcion"],
+            "empleado_id": row["empleado_id"],
+            "empleado": row["empleado"],
+            "fecha": row["fecha"],
+            "estado": row["estado"],
+            "prioridad": row["prioridad"],
+            "planned_start": row["planned_start"].isoformat() if row["planned_start"] else None,
+            "planned_duration_minutes": row["planned_duration_minutes"],
+            "task_definition_id": row["task_definition_id"],
+            "register_id": row["register_id"],
+            "procedure_id": row["procedure_id"],
+        }
+        for row in rows
+    ]
+    return {"items": items, "total": total, "limit": limit, "offset": offset}
@@ -0,0 +1,155 @@
+"""
+Photo attachments of register entries: streaming multipart upload, range downloads and thumbnails
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse
+
+from app.attachments import (
+    ATTACHMENT_MAX_BYTES, ATTACHMENT_MAX_FILES, attachment_to_dict, create_thumbnail, photo_store,
+    reuse_thumbnails, schedule_thumbnails, thumbnail_store,
+)
+from app.auth import get_user_from_token, require_permission
+from app.blobs import sniff_image_type
+from app.database import get_db
+from app.models import RegisterEntry, RegisterEntryAttachment
+from app.multipart import MultipartError, content_disposition, multipart_events, parse_boundary
+
+router = APIRouter(prefix="/registers", tags=["attachments"])
+
+# Files are content-addressed, so a URL's content never changes
+IMMUTABLE = "private, max-age=31536000, immutable"
+# Request chunks are small; gather this much before each file write in the threadpool
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+def _get_attachment(db: Session, entry_id: int, attachment_id: int) -> RegisterEntryAttachment:
+    attachment = db.query(RegisterEntryAttachment).filter(
+        RegisterEntryAttachment.id == attachment_id,
+        RegisterEntryAttachment.register_entry_id == entry_id
+    ).first()
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    return attachment
+
+@router.post("/entries/{entry_id}/attachments")
+async def upload_attachments(
+    entry_id: int,
+    request: Request,
+    user: Dict[str, Any] = Depends(require_permission("registers.fill")),
+    db: Session = Depends(get_db)
+):
+    """Attach photos (multipart/form-data, one or more file fields) to a register entry"""
+    entry = db.query(RegisterEntry).filter(RegisterEntry.id == entry_id).first()
+    if not entry:
+        raise HTTPException(status_code=404, detail="Register entry not found")
+    register_id = entry.register_id
+    # Uploads from phones can take a while; do not hold a pooled connection meanwhile
+    db.rollback()
+
+    try:
+        boundary = parse_boundary(request.headers.get("content-type"))
+    except MultipartError as error:
+        raise HTTPException(status_code=415, detail=str(error))
+
+    stored, writer, filename, pending = [], None, None, bytearray()
+    try:
+        # Each file goes straight from the request stream to a temporary file in the blob store;
+        # file I/O runs in the threadpool so concurrent uploads never stall the event loop
+        async for kind, value in multipart_events(request.stream(), boundary):
+            if kind == "part":
+                _, filename = content_disposition(value)
+                if filename is None:
+                    continue  # Plain form fields are ignored
+                if len(stored) >= ATTACHMENT_MAX_FILES:
+                    raise HTTPException(status_code=400, detail=f"At most {ATTACHMENT_MAX_FILES} photos per upload")
+                writer = await run_in_threadpool(photo_store.writer)
+            elif kind == "data" and writer is not None:
+                if writer.size + len(pending) + len(value) > ATTACHMENT_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Photos are limited to {ATTACHMENT_MAX_BYTES} bytes")
+                pending.extend(value)
+                if len(pending) >= WRITE_BUFFER_BYTES:
+                    await run_in_threadpool(writer.write, bytes(pending))
+                    pending.clear()
+            elif kind == "end" and writer is not None:
+                if pending:
+                    await run_in_threadpool(writer.write, bytes(pending))
+                    pending.clear()
+                content_type = sniff_image_type(writer.head)
+                if content_type is None:
+                    raise HTTPException(status_code=415, detail=f"{filename}: photos must be JPEG, PNG or WebP")
+                size = writer.size
+                digest = await run_in_threadpool(writer.commit)
+                writer = None
+                stored.append((digest, size, content_type, filename))
+    except MultipartError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    finally:
+        if writer is not None:
+            await run_in_threadpool(writer.abort)
+
+    if not stored:
+        raise HTTPException(status_code=400, detail="No photos in the upload")
+
+    attachments = [
+        RegisterEntryAttachment(
+            register_entry_id=entry_id,
+            register_id=register_id,
+            filename=filename[:255] if filename else None,
+            content_type=content_type,
+            size_bytes=size,
+            sha256=digest,
+            thumbnail_status="pending",
+            uploaded_by=user.get("id")
+        )
+        for digest, size, content_type, filename in stored
+    ]
+    pending = reuse_thumbnails(db, attachments)
+    db.add_all(attachments)
+    db.commit()
+    for attachment in attachments:
+        db.refresh(attachment)
+
+    schedule_thumbnails(request.app.state.session_factory, pending)
+    return {"message": "Photos attached", "attachments": [attachment_to_dict(attachment) for attachment in attachments]}
+
+@router.get("/entries/{entry_id}/attachments")
+async def get_attachments(entry_id: int, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """Photos of a register entry, oldest first"""
+    attachments = db.query(RegisterEntryAttachment).filter(
+        RegisterEntryAttachment.register_entry_id == entry_id
+    ).order_by(RegisterEntryAttachment.id).all()
+    return {"attachments": [attachment_to_dict(attachment) for attachment in attachments]}
+
+@router.get("/entries/{entry_id}/attachments/{attachment_id}")
+async def download_attachment(entry_id: int, attachment_id: int, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """The photo itself; supports Range requests so interrupted downloads can resume"""
+    attachment = _get_attachment(db, entry_id, attachment_id)
+    return FileResponse(
+        photo_store.path(attachment.sha256),
+        media_type=attachment.content_type,
+        filename=attachment.filename or f"foto_{attachment.id}",
+        content_disposition_type="inline",
+        headers={"Cache-Control": IMMUTABLE, "ETag": f'"{attachment.sha256}"'}
+    )
+
+@router.get("/entries/{entry_id}/attachments/{attachment_id}/thumbnail")
+async def get_attachment_thumbnail(request: Request, entry_id: int, attachment_id: int, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """JPEG thumbnail; rendered now if the background job has not finished yet"""
+    attachment = _get_attachment(db, entry_id, attachment_id)
+    digest = attachment.thumbnail_sha256
+    if attachment.thumbnail_status == "pending" or (digest and not thumbnail_store.exists(digest)):
+        db.rollback()
+        digest = await create_thumbnail(request.app.state.session_factory, attachment.id, attachment.sha256)
+    if not digest:
+        # The rollback above expired the row, so this reads the status the render recorded
+        if attachment.thumbnail_status == "failed":
+            raise HTTPException(status_code=404, detail="Thumbnail not available")
+        raise HTTPException(status_code=503, detail="Thumbnail could not be rendered right now", headers={"Retry-After": "5"})
+    return FileResponse(
+        thumbnail_store.path(digest),
+        media_type="image/jpeg",
+        headers={"Cache-Control": IMMUTABLE, "ETag": f'"{digest}"'}
+    )
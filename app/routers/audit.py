@@ -0,0 +1,87 @@
+"""
+Audit log queries: who changed what, filtered by entity, actor and time
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.auth import require_permission
+from app.database import get_db
+from app.models import AuditEvent
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+MAX_LIMIT = 500
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Times without an offset are taken as UTC, like the stored occurred_at
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def audit_event_to_dict(audit_event: AuditEvent) -> Dict[str, Any]:
+    return {
+        "id": audit_event.id,
+        "occurred_at": audit_event.occurred_at.isoformat() if audit_event.occurred_at else None,
+        "actor_id": audit_event.actor_id,
+        "actor_name": audit_event.actor_name,
+        "action": audit_event.action,
+        "entity_type": audit_event.entity_type,
+        "entity_id": audit_event.entity_id,
+        "changes": audit_event.changes,
+        "method": audit_event.method,
+        "path": audit_event.path
+    }
+
+@router.get("/events")
+async def get_audit_events(
+    entity_type: str = None,
+    entity_id: str = None,
+    actor_id: int = None,
+    action: str = None,
+    desde: datetime = None,
+    hasta: datetime = None,
+    limit: int = 100,
+    offset: int = 0,
+    user: Dict[str, Any] = Depends(require_permission("system.view_reports")),
+    db: Session = Depends(get_db)
+):
+    """Audit events, newest first; events reach this list at most AUDIT_FLUSH_MS after their commit"""
+    if not 1 <= limit <= MAX_LIMIT or offset < 0:
+        raise HTTPException(status_code=400, detail=f"limit must be 1-{MAX_LIMIT} and offset 0 or more")
+    # entity_id alone would not use the (entity_type, entity_id, occurred_at) index
+    if entity_id is not None and entity_type is None:
+        raise HTTPException(status_code=400, detail="entity_id requires entity_type")
+    desde, hasta = _utc(desde), _utc(hasta)
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="desde must not be after hasta")
+
+    query = db.query(AuditEvent)
+    if entity_type is not None:
+        query = query.filter(AuditEvent.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(AuditEvent.entity_id == entity_id)
+    if actor_id is not None:
+        query = query.filter(AuditEvent.actor_id == actor_id)
+    if action is not None:
+        query = query.filter(AuditEvent.action == action)
+    if desde is not None:
+        query = query.filter(AuditEvent.occurred_at >= desde)
+    if hasta is not None:
+        query = query.filter(AuditEvent.occurred_at <= hasta)
+
+    # One extra row tells whether another page exists without counting a large table
+    rows = query.order_by(AuditEvent.occurred_at.desc(), AuditEvent.id.desc()).limit(limit + 1).offset(offset).all()
+    return {
+        "events": [audit_event_to_dict(row) for row in rows[:limit]],
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(rows) > limit
+    }
+
+@router.get("/status")
+async def get_audit_status(request: Request, user: Dict[str, Any] = Depends(require_permission("system.view_reports"))):
+    """Writer queue depth and counters of this worker"""
+    return request.app.state.audit_log.status()
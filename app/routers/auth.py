@@ -0,0 +1,139 @@
+"""
+Login, logout and the current user's permissions
+"""
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.auth import get_user_from_token, role_permissions_db, session_store
+from app.database import get_db
+from app.models import Employee, Role
+from app.passwords import HashingBusy, hash_password_async, needs_rehash, verify_password_async
+from app.rate_limit import login_email_limiter, login_ip_limiter, retry_after_header
+from app.routers.me import warm_today
+from app.tokens import AUTH_TOKEN_MODE, decode_token, issue_token, revoked_tokens, store_revocation
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+@router.post("/login")
+async def login_user(request: dict, http_request: Request, db: Session = Depends(get_db)):
+    email = request.get("email", "")
+    password = request.get("password", "")
+    
+    # Throttle by client address and by account before doing any hashing work
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    for limiter, key in ((login_ip_limiter, client_ip), (login_email_limiter, email.strip().lower())):
+        wait_seconds = limiter.acquire(key)
+        if wait_seconds is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many login attempts. Please try again later.",
+                headers=retry_after_header(wait_seconds)
+            )
+    
+    # Check hardcoded admin users first
+    hardcoded_users = {
+        "admin@example.com": {"id": 1, "email": "admin@example.com", "role": "admin", "nombre": "Administrador"},
+        "encargado@example.com": {"id": 2, "email": "encargado@example.com", "role": "encargado", "nombre": "Encargado"},
+        "trabajador@example.com": {"id": 3, "email": "trabajador@example.com", "role": "trabajador", "nombre": "Trabajador"}
+    }
+    
+    user_data = None
+    
+    # First check hardcoded users
+    if email in hardcoded_users and password == "1234":
+        user_data = hardcoded_users[email]
+    else:
+        # Check employees from database; hashing runs off the event loop
+        employee = db.query(Employee).filter(
+            Employee.email == email,
+            Employee.activo == True
+        ).first()
+        
+        stored_password = None
+        if employee:
+            stored_password = employee.password
+            user_data = {
+                "id": employee.id,
+                "email": employee.email,
+                "role": employee.role,
+                "nombre": employee.nombre
+            }
+        # Hand the connection back to the pool while queued for a hashing slot
+        db.rollback()
+        
+        try:
+            verified = await verify_password_async(password, stored_password)
+        except HashingBusy:
+            raise HTTPException(
+                status_code=503,
+                detail="Login service busy. Please try again in a few seconds.",
+                headers=retry_after_header(1)
+            )
+        
+        if not verified:
+            user_data = None
+        elif needs_rehash(stored_password):
+            # Upgrade legacy plaintext rows (and outdated hashes); under load the next login retries
+            try:
+                new_hash = await hash_password_async(password)
+            except HashingBusy:
+                new_hash = None
+            if new_hash:
+                db.query(Employee).filter(Employee.id == user_data["id"]).update({"password": new_hash})
+                db.commit()
+    
+    if not user_data:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    login_email_limiter.reset(email.strip().lower())
+    
+    # User data is now stored above with the generated token
+    
+    # Get user permissions from database
+    role = db.query(Role).filter(Role.id == user_data["role"]).first()
+    user_permissions = role.permissions if role else []
+    # Release the connection now rather than at session teardown, so a login
+    # stampede cannot pin the whole pool while responses are being sent
+    db.rollback()
+    
+    if AUTH_TOKEN_MODE == "signed":
+        # Self-contained token: nothing to store, any worker can verify it
+        token = issue_token(user_data)
+    else:
+        # Generate unique token for this session
+        import uuid
+        token = str(uuid.uuid4())
+        
+        # Store user context in session store using unique token
+        session_store[token] = user_data
+    
+    # Workers open /me/today next; have it ready by then
+    warm_today(http_request.app, user_data)
+    
+    return {
+        "access_token": token, 
+        "user": user_data,
+        "permissions": user_permissions
+    }
+
+# Get current user permissions
+@router.get("/me/permissions")
+async def get_current_user_permissions(user: Dict[str, Any] = Depends(get_user_from_token)):
+    """Get current user's permissions"""
+    user_permissions = role_permissions_db.get(user.get("role", ""), [])
+    return {"user": user, "permissions": user_permissions}
+
+@router.post("/logout")
+async def logout_user(x_demo_token: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Invalidate the current token"""
+    if x_demo_token in session_store:
+        del session_store[x_demo_token]
+    else:
+        claims = decode_token(x_demo_token)
+        if claims:
+            revoked_tokens.revoke(claims["jti"], claims["exp"])
+            # Other workers pick it up from the database
+            store_revocation(db, claims["jti"], claims["exp"])
+    return {"message": "Logged out"}
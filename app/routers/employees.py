@@ -0,0 +1,174 @@
+"""
+Employee management endpoints
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth import require_permission
+from app.database import get_db
+from app.models import Employee
+from app.passwords import hash_password_async
+
+router = APIRouter(prefix="/employees", tags=["employees"])
+
+@router.get("")
+async def get_employees(user: Dict[str, Any] = Depends(require_permission("employees.view")), db: Session = Depends(get_db)):
+    """Get all employees"""
+    employees = db.query(Employee).filter(Employee.activo == True).all()
+    
+    # Convert to dict format for API response
+    employees_data = [{
+        "id": emp.id,
+        "nombre": emp.nombre,
+        "email": emp.email,
+        "role": emp.role,
+        "telefono": emp.telefono,
+        "activo": emp.activo,
+        "created_at": emp.created_at.isoformat() if emp.created_at is not None else None
+    } for emp in employees]
+    
+    return {"employees": employees_data}
+
+@router.get("/{employee_id}")
+async def get_employee(employee_id: int, user: Dict[str, Any] = Depends(require_permission("employees.view")), db: Session = Depends(get_db)):
+    """Get specific employee"""
+    employee = db.query(Employee).filter(Employee.id == employee_id, Employee.activo == True).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    employee_data = {
+        "id": employee.id,
+        "nombre": employee.nombre,
+        "email": employee.email,
+        "role": employee.role,
+        "telefono": employee.telefono,
+        "activo": employee.activo,
+        "created_at": employee.created_at.isoformat() if employee.created_at is not None else None
+    }
+    
+    return {"employee": employee_data}
+
+@router.post("")
+async def create_employee(employee_data: dict, user: Dict[str, Any] = Depends(require_permission("employees.create")), db: Session = Depends(get_db)):
+    """Create a new employee"""
+    # Set default password if not provided
+    default_password = employee_data.get("password") or "1234"
+    
+    # Check if email already exists
+    existing_employee = db.query(Employee).filter(Employee.email == employee_data["email"]).first()
+    if existing_employee:
+        raise HTTPException(status_code=400, detail="Email already exists")
+    
+    # Create new employee instance
+    new_employee = Employee(
+        nombre=employee_data["nombre"],
+        email=employee_data["email"],
+        role=employee_data.get("role", "trabajador"),
+        telefono=employee_data.get("telefono", ""),
+        activo=employee_data.get("activo", True),
+        password=await hash_password_async(default_password)
+    )
+    
+    # Add to database
+    try:
+        db.add(new_employee)
+        db.commit()
+        db.refresh(new_employee)
+    except Exception as e:
+        db.rollback()
+        # Handle database constraint violations
+        if "duplicate key" in str(e).lower():
+            raise HTTPException(status_code=400, detail="Error creating employee: duplicate key constraint")
+        elif "unique constraint" in str(e).lower():
+            raise HTTPException(status_code=400, detail="Error creating employee: email or ID already exists") 
+        else:
+            raise HTTPException(status_code=500, detail=f"Error creating employee: {str(e)}")
+    
+    # Convert to dict format for response
+    employee_dict = {
+        "id": new_employee.id,
+        "nombre": new_employee.nombre,
+        "email": new_employee.email,
+        "role": new_employee.role,
+        "telefono": new_employee.telefono,
+        "activo": new_employee.activo,
+        "created_at": new_employee.created_at.isoformat() if new_employee.created_at else None
+    }
+    
+    return {"message": "Employee created", "employee": employee_dict}
+
+@router.put("/{employee_id}")
+async def update_employee(employee_id: int, employee_data: dict, user: Dict[str, Any] = Depends(require_permission("employees.edit")), db: Session = Depends(get_db)):
+    """Update employee information"""
+    # Get employee from database
+    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Check if email is being changed and if new email already exists
+    if "email" in employee_data and employee_data["email"] != employee.email:
+        existing_employee = db.query(Employee).filter(Employee.email == employee_data["email"]).first()
+        if existing_employee:
+            raise HTTPException(status_code=400, detail="Email already exists")
+    
+    # Update fields
+    if "nombre" in employee_data:
+        employee.nombre = employee_data["nombre"]
+    if "email" in employee_data:
+        employee.email = employee_data["email"]
+    if "role" in employee_data:
+        employee.role = employee_data["role"]
+    if "telefono" in employee_data:
+        employee.telefono = employee_data["telefono"]
+    if "activo" in employee_data:
+        employee.activo = employee_data["activo"]
+    # An empty password in the edit form means "keep the current one"
+    if employee_data.get("password"):
+        employee.password = await hash_password_async(employee_data["password"])
+    
+    # Save changes to database
+    db.commit()
+    db.refresh(employee)
+    
+    # Convert to dict format for response
+    employee_dict = {
+        "id": employee.id,
+        "nombre": employee.nombre,
+        "email": employee.email,
+        "role": employee.role,
+        "telefono": employee.telefono,
+        "activo": employee.activo,
+        "created_at": employee.created_at.isoformat() if employee.created_at else None
+    }
+    
+    return {"message": "Employee updated", "employee": employee_dict}
+
+@router.delete("/{employee_id}")
+async def delete_employee(employee_id: int, user: Dict[str, Any] = Depends(require_permission("employees.deactivate")), db: Session = Depends(get_db)):
+    """Delete/deactivate employee"""
+    # Get employee from database
+    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Deactivate instead of delete to maintain data integrity
+    employee.activo = False
+    
+    # Save changes to database
+    db.commit()
+    db.refresh(employee)
+    
+    # Convert to dict format for response
+    employee_dict = {
+        "id": employee.id,
+        "nombre": employee.nombre,
+        "email": employee.email,
+        "role": employee.role,
+        "telefono": employee.telefono,
+        "activo": employee.activo,
+        "created_at": employee.created_at.isoformat() if employee.created_at else None
+    }
+    
+    return {"message": "Employee deactivated", "employee": employee_dict}
@@ -0,0 +1,49 @@
+"""
+Health probes and Prometheus metrics
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from starlette.responses import JSONResponse, Response
+
+from app.auth import session_store
+from app.health import heartbeats, pool_status
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from app.tokens import revoked_tokens
+
+router = APIRouter()
+
+@router.get("/health")
+async def health_check():
+    return {"status": "ok"}
+
+@router.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and its event loop is answering"""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness_check(request: Request):
+    """Readiness probe: database reachable, connection pool not saturated, background workers beating"""
+    state = request.app.state
+    checks = {
+        "database": await state.database_probe.check(),
+        "pool": pool_status(state.engine),
+        "workers": heartbeats.status(),
+    }
+    ready = checks["database"]["ok"] and checks["pool"]["ok"] and all(worker["ok"] for worker in checks["workers"].values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks}
+    )
+
+@router.get("/metrics")
+async def get_metrics(request: Request, authorization: Optional[str] = Header(None)):
+    """Prometheus text-format metrics"""
+    # Scrapers are usually unauthenticated; set METRICS_TOKEN to require a bearer token
+    metrics_token = request.app.state.settings.metrics_token
+    if metrics_token and authorization != f"Bearer {metrics_token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    
+    body = render_metrics(request.app.state.engine, len(session_store), len(revoked_tokens), request.app.state.route_stats)
+    return Response(content=body, media_type=METRICS_CONTENT_TYPE)
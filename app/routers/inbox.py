@@ -0,0 +1,425 @@
+"""
+Manager inbox: scheduling conflicts, live event stream and batch resolution
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+from app.auth import has_permission, require_permission, resolve_token
+from app.database import get_db
+from app.dates import parse_fecha_or_none, require_fecha
+from app.inbox_events import format_sse, inbox_hub
+from app.models import Employee, ManagerInboxNotification, Schedule, Task
+from app.scheduling import is_employee_working
+from app.suggestions import suggest_for_notifications
+
+router = APIRouter(prefix="/inbox", tags=["inbox"])
+
+# Manager Inbox Routes
+@router.get("")
+async def get_inbox_notifications(include_suggestions: bool = True, x_demo_token: str = Header(None), db: Session = Depends(get_db)):
+    """Get all pending conflict notifications for managers"""
+    # Get all pending notifications from database
+    notifications = db.query(ManagerInboxNotification).filter(
+        ManagerInboxNotification.status == "pending"
+    ).order_by(ManagerInboxNotification.created_at.desc()).all()
+    
+    # Rank available employees for every conflict from a single availability index
+    suggestions = suggest_for_notifications(notifications, db) if include_suggestions else {}
+    
+    # Convert to dict format
+    notifications_data = [{
+        "id": notif.id,
+        "type": notif.type,
+        "title": notif.title,
+        "description": notif.description,
+        "status": notif.status,
+        "data": notif.data,
+        "created_at": notif.created_at.isoformat() if notif.created_at else None,
+        "suggestions": suggestions.get(notif.id, [])
+    } for notif in notifications]
+    
+    return {"notifications": notifications_data}
+
+def _can_manage_inbox(session_factory, user: Dict[str, Any]) -> bool:
+    db = session_factory()
+    try:
+        return has_permission(user, "tasks.assign", db)
+    finally:
+        db.close()
+
+@router.get("/stream")
+async def stream_inbox_notifications(request: Request, token: str = None, x_demo_token: str = Header(None)):
+    """Stream new and resolved notifications as Server-Sent Events"""
+    # EventSource cannot send custom headers, so the token may also come as a query parameter
+    session_token = x_demo_token or token
+    user = resolve_token(session_token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token or session expired. Please login again.")
+    # Same permission as the inbox actions; the check uses its own short session, not one held for the whole stream
+    if not await run_in_threadpool(_can_manage_inbox, request.app.state.session_factory, user):
+        raise HTTPException(status_code=403, detail="Insufficient permissions. Required: tasks.assign")
+    
+    queue = inbox_hub.subscribe()
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keep-alive comment so proxies do not close idle connections
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            inbox_hub.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def resolve_notifications_batch(items: List[dict], mode: str, db: Session) -> Dict[str, Any]:
+    """Resolve many conflict notifications in a single transaction.
+
+    mode is "reassign" (items carry new_empleado_id) or "reschedule" (items carry new_fecha).
+    Notifications, employees and schedule availability are each loaded with one query.
+    """
+    # Reject malformed items before anything is loaded, naming the first bad one
+    required = ["notification_id", "new_empleado_id"] if mode == "reassign" else ["notification_id"]
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=400, detail=f"items[{index}] must be an object")
+        for field in required:
+            value = item.get(field)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise HTTPException(status_code=400, detail=f"items[{index}].{field} must be an integer")
+
+    notification_ids = [item["notification_id"] for item in items]
+    notifications = {
+        notif.id: notif for notif in db.query(ManagerInboxNotification).filter(
+            ManagerInboxNotification.id.in_(notification_ids)
+        ).all()
+    }
+    
+    # Work out the (employee, date) pair each item would create a task for
+    candidates = []
+    conflicts = []
+    seen_ids = set()
+    for item in items:
+        notification_id = item["notification_id"]
+        notification = notifications.get(notification_id)
+        if not notification:
+            conflicts.append({"notification_id": notification_id, "error": "not_found", "message": "Notification not found"})
+            continue
+        if notification.status != "pending" or notification_id in seen_ids:
+            conflicts.append({"notification_id": notification_id, "error": "already_resolved", "message": "Notification already resolved"})
+            continue
+        seen_ids.add(notification_id)
+        
+        notification_data = notification.data or {}
+        if mode == "reassign":
+            empleado_id = item["new_empleado_id"]
+            fecha = parse_fecha_or_none(notification_data.get("fecha"))
+        else:
+            empleado_id = notification_data.get("empleado_id", 0)
+            fecha = parse_fecha_or_none(item.get("new_fecha"))
+        if fecha is None:
+            conflicts.append({"notification_id": notification_id, "error": "invalid_date", "message": "Invalid date: expected YYYY-MM-DD"})
+            continue
+        candidates.append((notification, empleado_id, fecha))
+    
+    # Load every employee involved and check availability for all pairs at once
+    empleado_ids = {empleado_id for _, empleado_id, _ in candidates}
+    fechas = {fecha for _, _, fecha in candidates}
+    employees = {
+        emp.id: emp for emp in db.query(Employee).filter(Employee.id.in_(empleado_ids)).all()
+    } if empleado_ids else {}
+    working_pairs = set(
+        db.query(Schedule.empleado_id, Schedule.fecha).filter(
+            Schedule.empleado_id.in_(empleado_ids),
+            Schedule.fecha.in_(fechas)
+        ).all()
+    ) if candidates else set()
+    
+    resolved = []
+    resolved_at = datetime.now().isoformat()
+    for notification, empleado_id, fecha in candidates:
+        notification_data = notification.data or {}
+        employee = employees.get(empleado_id)
+        if not employee:
+            conflicts.append({"notification_id": notification.id, "error": "employee_not_found", "message": "Employee not found"})
+            continue
+        
+        if (empleado_id, fecha) not in working_pairs:
+            conflicts.append({
+                "notification_id": notification.id,
+                "error": f"{mode}_conflict",
+                "message": f"{employee.nombre} tampoco está programado para trabajar el {fecha}"
+            })
+            continue
+        
+        task_data = notification_data.get("task_data", {})
+        new_task = Task(
+            titulo=task_data.get("titulo", ""),
+            descripcion=task_data.get("descripcion", ""),
+            empleado_id=empleado_id,
+            fecha=fecha,
+            estado="pendiente",
+            prioridad=task_data.get("prioridad", "media"),
+            is_recurring=task_data.get("is_recurring", False),
+            frequency=task_data.get("frequency")
+        )
+        db.add(new_task)
+        
+        # Reassign the dict so the JSON column change is detected
+        resolution = f"Tarea reasignada a {employee.nombre}" if mode == "reassign" else f"Tarea reprogramada para {fecha}"
+        notification.status = "resolved"
+        notification.data = {**notification_data, "resolution": resolution, "resolved_at": resolved_at}
+        resolved.append((notification, new_task, employee))
+    
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error resolving notifications: {str(e)}")
+    
+    results = []
+    for notification, new_task, employee in resolved:
+        notification_dict = {
+            "id": notification.id,
+            "status": notification.status,
+            "data": notification.data
+        }
+        inbox_hub.publish("notification.resolved", notification_dict)
+        
+        results.append({
+            "notification": notification_dict,
+            "task": {
+                "id": new_task.id,
+                "titulo": new_task.titulo,
+                "descripcion": new_task.descripcion,
+                "empleado_id": new_task.empleado_id,
+                "empleado": employee.nombre,
+                "fecha": new_task.fecha,
+                "estado": new_task.estado,
+                "prioridad": new_task.prioridad,
+                "is_recurring": new_task.is_recurring,
+                "frequency": new_task.frequency,
+                "parent_task_id": new_task.parent_task_id
+            }
+        })
+    
+    return {"resolved": results, "conflicts": conflicts}
+
+@router.post("/batch/reassign")
+async def batch_reassign_tasks(
+    batch_data: dict,
+    user: Dict[str, Any] = Depends(require_permission("tasks.assign")),
+    db: Session = Depends(get_db)
+):
+    """Reassign many conflicted tasks in one transaction.
+
+    Body: {"items": [{"notification_id": 1, "new_empleado_id": 2}, ...]}
+    """
+    items = batch_data.get("items", [])
+    if not items or not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="No items provided")
+    
+    result = resolve_notifications_batch(items, "reassign", db)
+    return {
+        "message": f"{len(result['resolved'])} tareas reasignadas, {len(result['conflicts'])} conflictos",
+        **result
+    }
+
+@router.post("/batch/reschedule")
+async def batch_reschedule_tasks(
+    batch_data: dict,
+    user: Dict[str, Any] = Depends(require_permission("tasks.assign")),
+    db: Session = Depends(get_db)
+):
+    """Reschedule many conflicted tasks in one transaction.
+
+    Body: {"items": [{"notification_id": 1, "new_fecha": "2025-09-10"}, ...]}
+    """
+    items = batch_data.get("items", [])
+    if not items or not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="No items provided")
+    
+    result = resolve_notifications_batch(items, "reschedule", db)
+    return {
+        "message": f"{len(result['resolved'])} tareas reprogramadas, {len(result['conflicts'])} conflictos",
+        **result
+    }
+
+@router.post("/{notification_id}/reassign")
+async def reassign_task(notification_id: int, reassignment_data: dict, x_demo_token: str = Header(None), db: Session = Depends(get_db)):
+    """Reassign a conflicted task to another employee"""
+    # Find the notification
+    notification = db.query(ManagerInboxNotification).filter(
+        ManagerInboxNotification.id == notification_id
+    ).first()
+    
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    
+    new_empleado_id = reassignment_data["new_empleado_id"]
+    
+    # Get new employee name
+    new_employee = db.query(Employee).filter(Employee.id == new_empleado_id).first()
+    if not new_employee:
+        raise HTTPException(status_code=404, detail="New employee not found")
+    new_empleado_name = new_employee.nombre
+    
+    # Get task data from notification
+    task_data = notification.data.get("task_data", {})
+    fecha = require_fecha(notification.data.get("fecha"))
+    
+    # Check if new employee is working on that date
+    if not is_employee_working(new_empleado_id, fecha, db):
+        return {
+            "error": "reassignment_conflict",
+            "message": f"{new_empleado_name} tampoco está programado para trabajar el {fecha}"
+        }
+    
+    # Create the task with new assignment
+    new_task = Task(
+        titulo=task_data.get("titulo", ""),
+        descripcion=task_data.get("descripcion", ""),
+        empleado_id=new_empleado_id,
+        fecha=fecha,
+        estado="pendiente",
+        prioridad=task_data.get("prioridad", "media"),
+        is_recurring=task_data.get("is_recurring", False),
+        frequency=task_data.get("frequency")
+    )
+    
+    db.add(new_task)
+    db.commit()
+    db.refresh(new_task)
+    
+    # Mark notification as resolved
+    notification.status = "resolved"
+    notification.data = notification.data or {}
+    notification.data["resolution"] = f"Tarea reasignada a {new_empleado_name}"
+    notification.data["resolved_at"] = datetime.now().isoformat()
+    
+    db.commit()
+    db.refresh(notification)
+    
+    notification_dict = {
+        "id": notification.id,
+        "status": notification.status,
+        "data": notification.data
+    }
+    inbox_hub.publish("notification.resolved", notification_dict)
+    
+    # Convert to dict format for response
+    task_dict = {
+        "id": new_task.id,
+        "titulo": new_task.titulo,
+        "descripcion": new_task.descripcion,
+        "empleado_id": new_task.empleado_id,
+        "empleado": new_empleado_name,
+        "fecha": new_task.fecha,
+        "estado": new_task.estado,
+        "prioridad": new_task.prioridad,
+        "is_recurring": new_task.is_recurring,
+        "frequency": new_task.frequency,
+        "parent_task_id": new_task.parent_task_id
+    }
+    
+    return {
+        "message": f"Tarea reasignada exitosamente a {new_empleado_name}",
+        "task": task_dict,
+        "notification": notification_dict
+    }
+
+@router.post("/{notification_id}/reschedule")
+async def reschedule_task(notification_id: int, reschedule_data: dict, x_demo_token: str = Header(None), db: Session = Depends(get_db)):
+    """Reschedule a conflicted task to a different date"""
+    # Find the notification
+    notification = db.query(ManagerInboxNotification).filter(
+        ManagerInboxNotification.id == notification_id
+    ).first()
+    
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    
+    new_fecha = require_fecha(reschedule_data.get("new_fecha"), "new_fecha")
+    
+    # Get task data from notification
+    task_data = notification.data.get("task_data", {})
+    empleado_id = notification.data.get("empleado_id", 0)
+    empleado_name = notification.data.get("empleado_name", f"Empleado {empleado_id}")
+    
+    # Check if employee is working on the new date
+    if not is_employee_working(empleado_id, new_fecha, db):
+        return {
+            "error": "reschedule_conflict",
+            "message": f"{empleado_name} tampoco está programado para trabajar el {new_fecha}"
+        }
+    
+    # Create rescheduled task
+    new_task = Task(
+        titulo=task_data.get("titulo", ""),
+        descripcion=task_data.get("descripcion", ""),
+        empleado_id=empleado_id,
+        fecha=new_fecha,
+        estado="pendiente",
+        prioridad=task_data.get("prioridad", "media"),
+        is_recurring=task_data.get("is_recurring", False),
+        frequency=task_data.get("frequency")
+    )
+    
+    # Add to database
+    db.add(new_task)
+    db.commit()
+    db.refresh(new_task)
+    
+    # Mark notification as resolved
+    notification.status = "resolved"
+    notification.data = notification.data or {}
+    notification.data["resolution"] = f"Tarea reprogramada para {new_fecha}"
+    notification.data["resolved_at"] = datetime.now().isoformat()
+    
+    db.commit()
+    db.refresh(notification)
+    
+    notification_dict = {
+        "id": notification.id,
+        "status": notification.status,
+        "data": notification.data
+    }
+    inbox_hub.publish("notification.resolved", notification_dict)
+    
+    # Convert to dict format for response
+    task_dict = {
+        "id": new_task.id,
+        "titulo": new_task.titulo,
+        "descripcion": new_task.descripcion,
+        "empleado_id": new_task.empleado_id,
+        "empleado": empleado_name,
+        "fecha": new_task.fecha,
+        "estado": new_task.estado,
+        "prioridad": new_task.prioridad,
+        "is_recurring": new_task.is_recurring,
+        "frequency": new_task.frequency,
+        "parent_task_id": new_task.parent_task_id
+    }
+    
+    return {
+        "message": f"Tarea reprogramada exitosamente para {new_fecha}",
+        "task": task_dict,
+        "notification": notification_dict
+    }
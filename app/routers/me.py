@@ -0,0 +1,131 @@
+"""
+The caller's day in one response: schedule, tasks, assignments and the definitions they reference
+"""
+import asyncio
+import logging
+from datetime import date
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, FastAPI, Request
+from sqlalchemy.orm import Session, joinedload
+
+from app.auth import get_user_from_token
+from app.catalog import catalog_for, days_for
+from app.database import get_db
+from app.models import Schedule, Task, TaskAssignment
+from app.routers.agenda import PRIORITY_ORDER
+from app.routers.schedules import schedule_to_dict
+from app.routers.task_assignments import assignment_to_dict
+from app.routers.tasks import task_to_dict
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/me", tags=["me"])
+
+# Running warm-up tasks; asyncio keeps only weak references to tasks
+_background = set()
+
+def _priority(item: Dict[str, Any]):
+    return PRIORITY_ORDER.get(item["prioridad"], len(PRIORITY_ORDER))
+
+def build_day(db: Session, empleado_id: int, fecha: date) -> Dict[str, Any]:
+    """Employee part of the bundle, with the register and procedure ids it references"""
+    schedules = db.query(Schedule).options(joinedload(Schedule.employee)).filter(
+        Schedule.empleado_id == empleado_id, Schedule.fecha == fecha
+    ).order_by(Schedule.start_at, Schedule.turno).all()
+    tasks = db.query(Task).options(joinedload(Task.employee)).filter(
+        Task.empleado_id == empleado_id, Task.fecha == fecha
+    ).all()
+    assignments = db.query(TaskAssignment).options(
+        joinedload(TaskAssignment.task_definition), joinedload(TaskAssignment.employee)
+    ).filter(TaskAssignment.empleado_id == empleado_id, TaskAssignment.fecha == fecha).all()
+
+    # Same fields as /tasks/{id}/details, so opening a task needs no further request
+    tasks_data = [
+        {
+            **task_to_dict(task),
+            "start_time": task.start_time.isoformat() if task.start_time else None,
+            "actual_duration_minutes": task.actual_duration_minutes,
+            "register_id": task.register_id,
+            "procedure_id": task.procedure_id,
+            "requires_signature": task.requires_signature
+        }
+        for task in tasks
+    ]
+    assignments_data = [
+        {
+            **assignment_to_dict(assignment),
+            "register_id": assignment.task_definition.register_id,
+            "procedure_id": assignment.task_definition.procedure_id,
+            "requires_signature": assignment.task_definition.requires_signature
+        }
+        for assignment in assignments
+    ]
+    tasks_data.sort(key=lambda item: (_priority(item), item["id"]))
+    assignments_data.sort(key=lambda item: (item["planned_start"] is None, item["planned_start"] or "", _priority(item), item["id"]))
+
+    items = tasks_data + assignments_data
+    return {
+        "fecha": fecha,
+        "schedules": [schedule_to_dict(schedule) for schedule in schedules],
+        "tasks": tasks_data,
+        "task_assignments": assignments_data,
+        "register_ids": sorted({item["register_id"] for item in items if item["register_id"]}),
+        "procedure_ids": sorted({item["procedure_id"] for item in items if item["procedure_id"]}),
+    }
+
+def _build_with(session_factory, empleado_id: int, fecha: date) -> Dict[str, Any]:
+    """Build the day in its own session and load the definitions it references into the catalog"""
+    db = session_factory()
+    try:
+        day = build_day(db, empleado_id, fecha)
+        catalog_for(db.get_bind()).definitions(db, day["register_ids"], day["procedure_ids"])
+        return day
+    finally:
+        db.close()
+
+async def _warm(app: FastAPI, empleado_id: int, fecha: date):
+    try:
+        await days_for(app.state.engine).get(
+            (empleado_id, fecha), lambda: _build_with(app.state.session_factory, empleado_id, fecha)
+        )
+    except Exception:
+        logger.warning("Could not prepare the day of employee %s", empleado_id, exc_info=True)
+
+def warm_today(app: FastAPI, user: Dict[str, Any]):
+    """Start building the user's bundle in the background, so /me/today right after login is a cache hit"""
+    routers = app.state.settings.routers
+    if not user.get("id") or (routers is not None and "me" not in routers):
+        return
+    key = (user["id"], date.today())
+    if days_for(app.state.engine).cached(key) is None:
+        task = asyncio.ensure_future(_warm(app, *key))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+@router.get("/today")
+async def get_today(
+    request: Request,
+    fecha: date = None,
+    user: Dict[str, Any] = Depends(get_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """Everything the worker's first screen needs, from cached definitions and a per-day cache warmed at login"""
+    fecha = fecha or date.today()
+    empleado_id = user.get("id")
+    session_factory = request.app.state.session_factory
+    day, cached = await days_for(request.app.state.engine).get(
+        (empleado_id, fecha), lambda: _build_with(session_factory, empleado_id, fecha)
+    )
+
+    registers, procedures = catalog_for(request.app.state.engine).definitions(db, day["register_ids"], day["procedure_ids"])
+    return {
+        "fecha": day["fecha"],
+        "user": user,
+        "schedules": day["schedules"],
+        "tasks": day["tasks"],
+        "task_assignments": day["task_assignments"],
+        "registers": registers,
+        "procedures": procedures,
+        "cached": cached,
+    }
@@ -0,0 +1,27 @@
+"""
+Permission catalog endpoints
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.auth import permissions_db, require_permission
+
+router = APIRouter(prefix="/permissions", tags=["permissions"])
+
+# Permission Management Endpoints
+@router.get("")
+async def get_permissions(user: Dict[str, Any] = Depends(require_permission("system.manage_permissions"))):
+    """Get all available permissions"""
+    return {"permissions": permissions_db}
+
+@router.get("/categories")
+async def get_permission_categories(user: Dict[str, Any] = Depends(require_permission("system.manage_permissions"))):
+    """Get permission categories"""
+    categories = {}
+    for perm in permissions_db:
+        category = perm["category"]
+        if category not in categories:
+            categories[category] = []
+        categories[category].append(perm)
+    return {"categories": categories}
@@ -0,0 +1,871 @@
+"""
+Registers, procedures and signed register entries (in-memory demo data), with PDF export
+"""
+import base64
+import json
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy import Float, String, case, cast, func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.archive import ArchiveUnavailable, read_archived_entries
+from app.attachments import ready_thumbnail_paths
+from app.audit import record_event
+from app.blobs import REFERENCE_PREFIX, InvalidBlob, externalize_signature, signature_store, signature_url
+from app.catalog import procedure_to_dict, register_to_dict
+from app.database import get_db
+from app.metrics import pdf_export_job
+from app.models import Employee, Procedure, Register, RegisterEntry, Task
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/registers", tags=["registers"])
+
+# Query parameters filtering entries on custom field values: campo.<nombre>, campo.<nombre>.min, campo.<nombre>.max
+_CUSTOM_FIELD_FILTER = re.compile(r"^campo\.([A-Za-z0-9_]+)(?:\.(min|max))?$")
+# Text that .min/.max treat as a number; the same pattern works in Python, Postgres (~) and SQLite (REGEXP)
+_NUMERIC_TEXT = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
+
+# In-memory storage for registers and procedures
+registers_db = [
+    {
+        "id": 1,
+        "nombre": "Registro de Tratamientos de Cultivos",
+        "tipo": "treatment",
+        "descripcion": "Registro para documentar todos los tratamientos aplicados a los cultivos",
+        "activo": True,
+        "created_at": "2025-09-07 12:00:00",
+        "campos_personalizados": [
+            {"nombre": "fecha_aplicacion", "tipo": "date", "etiqueta": "Fecha de Aplicación", "requerido": True},
+            {"nombre": "tipo_producto", "tipo": "select", "etiqueta": "Tipo de Producto", "requerido": True, "opciones": ["Fungicida", "Insecticida", "Herbicida", "Fertilizante"]},
+            {"nombre": "ubicacion_finca", "tipo": "text", "etiqueta": "Ubicación en la Finca", "requerido": True},
+            {"nombre": "tipo_cultivo", "tipo": "select", "etiqueta": "Tipo de Cultivo", "requerido": True, "opciones": ["Maíz", "Frijol", "Café", "Tomate", "Lechuga"]},
+            {"nombre": "maquina_utilizada", "tipo": "text", "etiqueta": "Máquina/Equipo Utilizado", "requerido": False},
+            {"nombre": "dosis_aplicada", "tipo": "text", "etiqueta": "Dosis Aplicada", "requerido": True},
+            {"nombre": "condiciones_clima", "tipo": "select", "etiqueta": "Condiciones Climáticas", "requerido": False, "opciones": ["Soleado", "Nublado", "Lluvia ligera", "Viento", "Ideal"]}
+        ]
+    },
+    {
+        "id": 2,
+        "nombre": "Registro de Mantenimiento de Equipos",
+        "tipo": "maintenance", 
+        "descripcion": "Registro para documentar el mantenimiento y revisión de equipos",
+        "activo": True,
+        "created_at": "2025-09-07 12:00:00",
+        "campos_personalizados": [
+            {"nombre": "fecha_mantenimiento", "tipo": "date", "etiqueta": "Fecha de Mantenimiento", "requerido": True},
+            {"nombre": "equipo", "tipo": "select", "etiqueta": "Equipo/Máquina", "requerido": True, "opciones": ["Tractor", "Pulverizador", "Cosechadora", "Arado", "Cultivadora"]},
+            {"nombre": "tipo_mantenimiento", "tipo": "select", "etiqueta": "Tipo de Mantenimiento", "requerido": True, "opciones": ["Preventivo", "Correctivo", "Emergencia"]},
+            {"nombre": "tecnico_responsable", "tipo": "text", "etiqueta": "Técnico Responsable", "requerido": True},
+            {"nombre": "partes_cambiadas", "tipo": "textarea", "etiqueta": "Partes Cambiadas/Reparadas", "requerido": False},
+            {"nombre": "horas_trabajo", "tipo": "number", "etiqueta": "Horas de Trabajo", "requerido": False},
+            {"nombre": "costo_total", "tipo": "number", "etiqueta": "Costo Total (€)", "requerido": False},
+            {"nombre": "proxima_revision", "tipo": "date", "etiqueta": "Próxima Revisión", "requerido": False}
+        ]
+    }
+]
+
+# In-memory storage for recipes/procedures
+procedures_db = [
+    {
+        "id": 1,
+        "register_id": 1,
+        "nombre": "Aplicación de Fungicida",
+        "receta": {
+            "ingredientes": [
+                {"nombre": "Fungicida XYZ", "cantidad": "2 litros", "concentracion": "0.5%"},
+                {"nombre": "Agua", "cantidad": "400 litros", "pureza": "limpia"}
+            ],
+            "proporcion": "0.5% de concentración en agua",
+            "volumen_total": "400 litros"
+        },
+        "procedimiento": [
+            "Usar equipo de protección personal completo (guantes, mascarilla, gafas)",
+            "Mezclar el fungicida con agua en tanque limpio",
+            "Agitar bien la mezcla durante 5 minutos",
+            "Aplicar con pulverizador a presión uniforme",
+            "Cubrir toda la superficie del cultivo de manera homogénea",
+            "Lavar el equipo después del uso"
+        ],
+        "precauciones": [
+            "OBLIGATORIO: Usar equipo de protección personal",
+            "No aplicar con viento fuerte (>15 km/h)",
+            "No aplicar antes de lluvia",
+            "Mantener alejado de fuentes de agua potable",
+            "Lavar manos y cara después del trabajo"
+        ],
+        "tiempo_estimado": "2 horas",
+        "created_at": "2025-09-07 12:00:00"
+    },
+    {
+        "id": 2,
+        "register_id": 2,
+        "nombre": "Revisión de Tractor",
+        "receta": {
+            "materiales": [
+                {"nombre": "Aceite motor", "cantidad": "5 litros", "especificacion": "10W-40"},
+                {"nombre": "Filtro de aceite", "cantidad": "1 unidad", "codigo": "OF-123"},
+                {"nombre": "Filtro de aire", "cantidad": "1 unidad", "codigo": "AF-456"}
+            ]
+        },
+        "procedimiento": [
+            "Apagar el tractor y esperar que se enfríe",
+            "Revisar nivel de aceite con varilla",
+            "Cambiar aceite si está sucio o bajo",
+            "Inspeccionar filtros de aire y aceite",
+            "Revisar presión de neumáticos",
+            "Verificar funcionamiento de luces",
+            "Probar frenos y dirección",
+            "Registrar kilometraje y horas de uso"
+        ],
+        "precauciones": [
+            "Usar guantes para evitar contacto con aceites",
+            "Asegurar que el motor esté frío antes de trabajar",
+            "Disponer correctamente de aceites usados",
+            "No fumar durante la revisión"
+        ],
+        "tiempo_estimado": "1.5 horas",
+        "created_at": "2025-09-07 12:00:00"
+    }
+]
+
+# In-memory storage for register entries (signed completions)
+register_entries_db = []
+
+# Register Management Routes
+@router.get("")
+async def get_registers(
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Get all active registers"""
+    # Query active registers from database
+    registers = session.query(Register).filter(Register.activo == True).all()
+    
+    # Convert to response format
+    registers_data = [register_to_dict(reg) for reg in registers]
+    
+    return {"registers": registers_data}
+
+@router.get("/{register_id}")
+async def get_register(
+    register_id: int, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Get a specific register with its procedures"""
+    # Query register from database
+    register = session.query(Register).filter(Register.id == register_id).first()
+    if not register:
+        raise HTTPException(status_code=404, detail="Register not found")
+    
+    # Query procedures from database
+    procedures = session.query(Procedure).filter(Procedure.register_id == register_id).all()
+    
+    # Convert procedures to response format
+    procedures_data = [procedure_to_dict(proc) for proc in procedures]
+    
+    # Convert register to response format
+    register_data = register_to_dict(register)
+    
+    return {
+        "register": register_data,
+        "procedures": procedures_data
+    }
+
+@router.get("/{register_id}/procedures")
+async def get_register_procedures(
+    register_id: int, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Get all procedures for a specific register"""
+    # Query procedures from database
+    procedures = session.query(Procedure).filter(Procedure.register_id == register_id).all()
+    
+    # Convert to response format
+    procedures_data = [procedure_to_dict(proc) for proc in procedures]
+    
+    return {"procedures": procedures_data}
+
+def _custom_field_text(field: str, dialect: str):
+    """A custom field value as text, the way custom_fields_match sees it: numbers unquoted, booleans as true/false"""
+    # Compare as text so numbers match on both databases (json_extract returns them unquoted)
+    value = cast(RegisterEntry.campos_personalizados[field].as_string(), String)
+    if dialect == "sqlite":
+        # json_extract turns JSON booleans into 1/0; Postgres ->> already gives true/false
+        kind = func.json_type(RegisterEntry.campos_personalizados, f'$."{field}"')
+        value = case((kind.in_(["true", "false"]), kind), else_=value)
+    return value
+
+def apply_custom_field_filters(query, params):
+    """Filter entries on campos_personalizados values (JSON1 json_extract on SQLite, ->> on Postgres)"""
+    dialect = query.session.get_bind().dialect.name
+    for param, value in params.items():
+        match = _CUSTOM_FIELD_FILTER.match(param)
+        if not match:
+            continue
+        field, bound = match.groups()
+        field_text = _custom_field_text(field, dialect)
+        if bound is None:
+            query = query.filter(field_text == value)
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"{param} must be a number")
+        # Only numeric values are cast; a plain CAST fails on Postgres (and gives 0 on SQLite) for other text
+        field_value = case((field_text.regexp_match(_NUMERIC_TEXT), cast(field_text, Float)), else_=None)
+        query = query.filter(field_value >= number if bound == "min" else field_value <= number)
+    return query
+
+def custom_fields_match(campos: Optional[Dict[str, Any]], params) -> bool:
+    """apply_custom_field_filters for rows read from archive files"""
+    campos = campos or {}
+    for param, value in params.items():
+        match = _CUSTOM_FIELD_FILTER.match(param)
+        if not match:
+            continue
+        field, bound = match.groups()
+        field_value = campos.get(field)
+        if bound is None:
+            as_text = field_value if isinstance(field_value, str) else json.dumps(field_value)
+            if field_value is None or as_text != value:
+                return False
+            continue
+        numeric = isinstance(field_value, (int, float)) and not isinstance(field_value, bool)
+        if not (numeric or isinstance(field_value, str) and re.match(_NUMERIC_TEXT, field_value)):
+            return False
+        if not (float(field_value) >= float(value) if bound == "min" else float(field_value) <= float(value)):
+            return False
+    return True
+
+def register_entry_to_dict(entry) -> Dict[str, Any]:
+    """Serialize a RegisterEntry (or an archived row with the same attributes)"""
+    return {
+        "id": entry.id,
+        "register_id": entry.register_id,
+        "task_id": entry.task_id,
+        "procedure_id": entry.procedure_id,
+        "empleado_id": entry.empleado_id,
+        "empleado_name": entry.empleado_name,
+        "fecha_completado": entry.fecha_completado.strftime("%Y-%m-%d %H:%M:%S") if entry.fecha_completado else None,
+        "fecha": entry.fecha,
+        "hora": entry.hora,
+        "observaciones": entry.observaciones,
+        "resultado": entry.resultado,
+        "tiempo_real": entry.tiempo_real,
+        # Drawn signatures are sha256: references; the image is fetched once from the *_url
+        "firma_empleado": entry.firma_empleado,
+        "firma_empleado_url": signature_url(entry.firma_empleado),
+        "firma_supervisor": entry.firma_supervisor,
+        "firma_supervisor_url": signature_url(entry.firma_supervisor),
+        "campos_personalizados": entry.campos_personalizados,
+        "created_at": entry.created_at.strftime("%Y-%m-%d %H:%M:%S") if entry.created_at else None
+    }
+
+def parse_entry_datetime(value: Optional[str]) -> Optional[datetime]:
+    """ISO date/datetime query parameter as an aware datetime; None when missing or invalid"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None  # Skip invalid date format
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+@router.get("/{register_id}/entries")
+async def get_register_entries(
+    register_id: int, 
+    request: Request,
+    fecha_inicio: str = None, 
+    fecha_fin: str = None, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Get register entries with optional date and custom field filtering, including archived months"""
+    # Query database for register entries
+    query = session.query(RegisterEntry).filter(RegisterEntry.register_id == register_id)
+    query = apply_custom_field_filters(query, request.query_params)
+    
+    # Filter by date range if provided
+    fecha_inicio_dt = parse_entry_datetime(fecha_inicio)
+    if fecha_inicio_dt:
+        query = query.filter(RegisterEntry.fecha_completado >= fecha_inicio_dt)
+    fecha_fin_dt = parse_entry_datetime(fecha_fin)
+    if fecha_fin_dt:
+        query = query.filter(RegisterEntry.fecha_completado <= fecha_fin_dt)
+    
+    # Sort by completion date, newest first
+    query = query.order_by(RegisterEntry.fecha_completado.desc())
+    
+    entries_data = [register_entry_to_dict(entry) for entry in query.all()]
+    
+    # Archived months are older than every hot row; the catalog lookup is empty for recent ranges
+    try:
+        entries_data.extend(
+            register_entry_to_dict(entry)
+            for entry in read_archived_entries(session, register_id, fecha_inicio_dt, fecha_fin_dt)
+            if custom_fields_match(entry.campos_personalizados, request.query_params)
+        )
+    except ArchiveUnavailable as error:
+        logger.error("Register %s entries: %s", register_id, error)
+        raise HTTPException(status_code=503, detail="Archived register entries are temporarily unavailable")
+    
+    return {"entries": entries_data}
+
+def validate_custom_fields(register_id: int, custom_field_data: dict):
+    """Validate custom field data against register field definitions"""
+    # Get register
+    register = next((reg for reg in registers_db if reg["id"] == register_id), None)
+    if not register:
+        return False, "Register not found"
+    
+    campos_personalizados = register.get("campos_personalizados", [])
+    errors = []
+    
+    # Check required fields
+    for campo in campos_personalizados:
+        if campo["requerido"] and campo["nombre"] not in custom_field_data:
+            errors.append(f"Campo requerido faltante: {campo['etiqueta']}")
+        
+        # Validate field values if present
+        if campo["nombre"] in custom_field_data:
+            value = custom_field_data[campo["nombre"]]
+            
+            # Check select field options
+            if campo["tipo"] == "select" and "opciones" in campo:
+                if value not in campo["opciones"]:
+                    errors.append(f"Valor inválido para {campo['etiqueta']}: {value}")
+            
+            # Basic type validation
+            if campo["tipo"] == "number":
+                try:
+                    float(value)
+                except (ValueError, TypeError):
+                    errors.append(f"Valor numérico inválido para {campo['etiqueta']}: {value}")
+    
+    return len(errors) == 0, errors
+
+@router.post("/{register_id}/entries")
+async def create_register_entry(
+    register_id: int, 
+    entry_data: dict, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Create a new register entry (employee signature) with custom fields"""
+    # Get employee
+    employee = session.query(Employee).filter(Employee.id == entry_data["empleado_id"]).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Get register to validate custom fields
+    register = session.query(Register).filter(Register.id == register_id).first()
+    if not register:
+        raise HTTPException(status_code=404, detail="Register not found")
+    
+    # Validate custom fields if provided
+    custom_field_data = entry_data.get("campos_personalizados", {})
+    if custom_field_data and register.campos_personalizados:
+        errors = []
+        for campo in register.campos_personalizados:
+            if campo["requerido"] and campo["nombre"] not in custom_field_data:
+                errors.append(f"Campo requerido faltante: {campo['etiqueta']}")
+        
+        if errors:
+            raise HTTPException(status_code=400, detail=f"Errores de validación: {'; '.join(errors)}")
+    
+    # Create new register entry
+    # Handle tiempo_real - convert empty string to None
+    tiempo_real_value = entry_data.get("tiempo_real")
+    if tiempo_real_value == "" or tiempo_real_value is None:
+        tiempo_real_value = None
+    else:
+        try:
+            tiempo_real_value = int(tiempo_real_value)
+        except (ValueError, TypeError):
+            tiempo_real_value = None
+    
+    # Drawn signatures (data URLs) go to the blob store; the row keeps only their sha256: reference
+    try:
+        firma_empleado = await run_in_threadpool(externalize_signature, entry_data.get("firma_empleado", "Firmado digitalmente"))
+        firma_supervisor = await run_in_threadpool(externalize_signature, entry_data.get("firma_supervisor"))
+    except InvalidBlob as error:
+        raise HTTPException(status_code=400, detail=f"Firma inválida: {error}")
+    
+    new_entry = RegisterEntry(
+        register_id=register_id,
+        task_id=entry_data.get("task_id"),
+        procedure_id=entry_data.get("procedure_id"),
+        empleado_id=entry_data["empleado_id"],
+        empleado_name=employee.nombre,
+        fecha_completado=datetime.now(timezone.utc),
+        firma_empleado=firma_empleado,
+        firma_supervisor=firma_supervisor,
+        observaciones=entry_data.get("observaciones", ""),
+        resultado=entry_data.get("resultado", "completado"),
+        tiempo_real=tiempo_real_value,
+        campos_personalizados=custom_field_data
+    )
+    
+    session.add(new_entry)
+    
+    # If task_id is provided and requires_signature is true, mark task as completed
+    if entry_data.get("task_id"):
+        task = session.query(Task).filter(Task.id == entry_data["task_id"]).first()
+        if task and task.requires_signature:
+            task.estado = "completada"
+            session.add(task)
+    
+    session.commit()
+    session.refresh(new_entry)
+    
+    return {
+        "message": "Register entry created", 
+        "entry": {
+            "id": new_entry.id,
+            "register_id": new_entry.register_id,
+            "task_id": new_entry.task_id,
+            "procedure_id": new_entry.procedure_id,
+            "empleado_id": new_entry.empleado_id,
+            "empleado_name": new_entry.empleado_name,
+            "fecha_completado": new_entry.fecha_completado.strftime("%Y-%m-%d %H:%M:%S"),
+            "firma_empleado": new_entry.firma_empleado,
+            "firma_empleado_url": signature_url(new_entry.firma_empleado),
+            "firma_supervisor": new_entry.firma_supervisor,
+            "firma_supervisor_url": signature_url(new_entry.firma_supervisor),
+            "observaciones": new_entry.observaciones,
+            "resultado": new_entry.resultado,
+            "tiempo_real": new_entry.tiempo_real,
+            "campos_personalizados": new_entry.campos_personalizados
+        }
+    }
+
+@router.post("")
+async def create_register(
+    register_data: dict, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Create a new register"""
+    # Create new register in database
+    new_register = Register(
+        nombre=register_data["nombre"],
+        descripcion=register_data.get("descripcion", ""),
+        activo=True,
+        campos_personalizados=register_data.get("campos_personalizados", [])
+    )
+    
+    session.add(new_register)
+    session.commit()
+    session.refresh(new_register)
+    
+    # Return formatted response
+    return {
+        "message": "Register created", 
+        "register": {
+            "id": new_register.id,
+            "nombre": new_register.nombre,
+            "descripcion": new_register.descripcion,
+            "activo": new_register.activo,
+            "campos_personalizados": new_register.campos_personalizados or []
+        }
+    }
+
+@router.post("/{register_id}/procedures")
+async def create_procedure(
+    register_id: int, 
+    procedure_data: dict, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Create a new procedure for a register"""
+    # Verify register exists
+    register = session.query(Register).filter(Register.id == register_id).first()
+    if not register:
+        raise HTTPException(status_code=404, detail="Register not found")
+    
+    # Create new procedure in database
+    new_procedure = Procedure(
+        register_id=register_id,
+        titulo=procedure_data["nombre"],
+        descripcion=procedure_data.get("descripcion", ""),
+        contenido={
+            "receta": procedure_data.get("receta", {}),
+            "procedimiento": procedure_data.get("procedimiento", []),
+            "precauciones": procedure_data.get("precauciones", []),
+            "tiempo_estimado": procedure_data.get("tiempo_estimado", "1 hora")
+        }
+    )
+    
+    session.add(new_procedure)
+    session.commit()
+    session.refresh(new_procedure)
+    
+    # Return formatted response
+    return {
+        "message": "Procedure created", 
+        "procedure": {
+            "id": new_procedure.id,
+            "register_id": new_procedure.register_id,
+            "nombre": new_procedure.titulo,
+            "descripcion": new_procedure.descripcion,
+            "receta": new_procedure.contenido.get("receta", {}),
+            "procedimiento": new_procedure.contenido.get("procedimiento", []),
+            "precauciones": new_procedure.contenido.get("precauciones", []),
+            "tiempo_estimado": new_procedure.contenido.get("tiempo_estimado", "1 hora")
+        }
+    }
+
+@router.put("/{register_id}")
+async def update_register(
+    register_id: int, 
+    register_data: dict, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Update an existing register"""
+    # Find register in database
+    register = session.query(Register).filter(Register.id == register_id).first()
+    if not register:
+        raise HTTPException(status_code=404, detail="Register not found")
+    
+    # Update fields
+    register.nombre = register_data.get("nombre", register.nombre)
+    register.descripcion = register_data.get("descripcion", register.descripcion)
+    register.activo = register_data.get("activo", register.activo)
+    register.campos_personalizados = register_data.get("campos_personalizados", register.campos_personalizados or [])
+    
+    session.commit()
+    session.refresh(register)
+    
+    # Return formatted response
+    return {
+        "message": "Register updated", 
+        "register": {
+            "id": register.id,
+            "nombre": register.nombre,
+            "descripcion": register.descripcion,
+            "activo": register.activo,
+            "campos_personalizados": register.campos_personalizados or []
+        }
+    }
+
+@router.put("/{register_id}/procedures/{procedure_id}")
+async def update_procedure(
+    register_id: int, 
+    procedure_id: int, 
+    procedure_data: dict, 
+    x_demo_token: str = Header(None),
+    session: Session = Depends(get_db)
+):
+    """Update an existing procedure"""
+    # Find procedure in database
+    procedure = session.query(Procedure).filter(
+        Procedure.id == procedure_id, 
+        Procedure.register_id == register_id
+    ).first()
+    
+    if not procedure:
+        raise HTTPException(status_code=404, detail="Procedure not found")
+    
+    # Update fields
+    procedure.titulo = procedure_data.get("nombre", procedure.titulo)
+    procedure.descripcion = procedure_data.get("descripcion", procedure.descripcion)
+    
+    # Update contenido JSON field
+    contenido = procedure.contenido or {}
+    contenido["receta"] = procedure_data.get("receta", contenido.get("receta", {}))
+    contenido["procedimiento"] = procedure_data.get("procedimiento", contenido.get("procedimiento", []))
+    contenido["precauciones"] = procedure_data.get("precauciones", contenido.get("precauciones", []))
+    contenido["tiempo_estimado"] = procedure_data.get("tiempo_estimado", contenido.get("tiempo_estimado", "1 hora"))
+    procedure.contenido = contenido
+    
+    session.commit()
+    session.refresh(procedure)
+    
+    # Return formatted response
+    return {
+        "message": "Procedure updated", 
+        "procedure": {
+            "id": procedure.id,
+            "register_id": procedure.register_id,
+            "nombre": procedure.titulo,
+            "descripcion": procedure.descripcion,
+            "receta": procedure.contenido.get("receta", {}),
+            "procedimiento": procedure.contenido.get("procedimiento", []),
+            "precauciones": procedure.contenido.get("precauciones", []),
+            "tiempo_estimado": procedure.contenido.get("tiempo_estimado", "1 hora")
+        }
+    }
+
+@router.delete("/{register_id}")
+async def delete_register(register_id: int, x_demo_token: str = Header(None)):
+    """Deactivate a register"""
+    register = next((reg for reg in registers_db if reg["id"] == register_id), None)
+    if not register:
+        raise HTTPException(status_code=404, detail="Register not found")
+    
+    register["activo"] = False
+    record_event("update", "registers", register_id, {"activo": [True, False]})
+    return {"message": "Register deactivated", "register": register}
+
+@router.delete("/{register_id}/procedures/{procedure_id}")
+async def delete_procedure(register_id: int, procedure_id: int, x_demo_token: str = Header(None)):
+    """Delete a procedure"""
+    global procedures_db
+    procedure = next((proc for proc in procedures_db if proc["id"] == procedure_id and proc["register_id"] == register_id), None)
+    if not procedure:
+        raise HTTPException(status_code=404, detail="Procedure not found")
+    
+    procedures_db = [proc for proc in procedures_db if not (proc["id"] == procedure_id and proc["register_id"] == register_id)]
+    record_event("delete", "procedures", procedure_id, {"register_id": register_id, "nombre": procedure.get("nombre")})
+    return {"message": "Procedure deleted"}
+
+@router.put("/entries/{entry_id}")
+async def update_register_entry(entry_id: int, entry_data: dict, x_demo_token: str = Header(None)):
+    """Update an existing register entry"""
+    entry = next((ent for ent in register_entries_db if ent["id"] == entry_id), None)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Register entry not found")
+    
+    # Validate custom fields if provided
+    if "campos_personalizados" in entry_data:
+        custom_field_data = entry_data["campos_personalizados"]
+        is_valid, validation_errors = validate_custom_fields(entry["register_id"], custom_field_data)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=f"Errores de validación: {'; '.join(validation_errors)}")
+    
+    # Update fields
+    previous = dict(entry)
+    entry["observaciones"] = entry_data.get("observaciones", entry["observaciones"])
+    entry["resultado"] = entry_data.get("resultado", entry["resultado"])
+    entry["tiempo_real"] = entry_data.get("tiempo_real", entry["tiempo_real"])
+    if "campos_personalizados" in entry_data:
+        entry["campos_personalizados"] = entry_data["campos_personalizados"]
+    record_event("update", "register_entries", entry_id, {
+        key: [previous.get(key), entry.get(key)]
+        for key in ("observaciones", "resultado", "tiempo_real", "campos_personalizados")
+        if previous.get(key) != entry.get(key)
+    })
+    
+    return {"message": "Register entry updated", "entry": entry}
+
+def render_register_pdf(
+    register: Dict[str, Any],
+    entries: List[Dict[str, Any]],
+    procedures: Dict[int, Dict[str, Any]],
+    thumbnails: Dict[int, List[str]],
+    fecha_inicio: Optional[str],
+    fecha_fin: Optional[str]
+) -> bytes:
+    """Lay out the register PDF; CPU-bound, so async callers run it in the threadpool"""
+    # ReportLab is only needed here; importing it lazily keeps it out of application startup
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import Image, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    
+    # Create PDF
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch)
+    
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=12,
+        textColor=colors.darkblue
+    )
+    
+    # Build PDF content
+    story = []
+    
+    # Title
+    story.append(Paragraph(f"📋 {register['nombre']}", title_style))
+    story.append(Paragraph(f"Registro Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Register description
+    story.append(Paragraph("Descripción del Registro:", heading_style))
+    story.append(Paragraph(register['descripcion'] or '', styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Date range info
+    if fecha_inicio or fecha_fin:
+        date_range = f"Período: "
+        if fecha_inicio:
+            date_range += f"Desde {fecha_inicio} "
+        if fecha_fin:
+            date_range += f"Hasta {fecha_fin}"
+        story.append(Paragraph(date_range, styles['Normal']))
+        story.append(Spacer(1, 12))
+    
+    # Entries summary
+    story.append(Paragraph("Resumen de Entradas:", heading_style))
+    story.append(Paragraph(f"Total de entradas registradas: {len(entries)}", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    if entries:
+        # Create entries table
+        table_data = [['Fecha', 'Empleado', 'Procedimiento', 'Resultado', 'Observaciones']]
+        
+        for entry in entries:
+            # Get procedure name
+            procedure_name = "N/A"
+            if entry["procedure_id"] in procedures:
+                procedure_name = procedures[entry["procedure_id"]]["nombre"]
+            observaciones = entry["observaciones"] or ""
+            
+            table_data.append([
+                (entry["fecha_completado"] or "")[:10],  # Date only
+                entry["empleado_name"] or "",
+                procedure_name,
+                (entry["resultado"] or "").title(),
+                observaciones[:50] + "..." if len(observaciones) > 50 else observaciones
+            ])
+        
+        # Create and style table
+        table = Table(table_data, colWidths=[1.2*inch, 1.5*inch, 2*inch, 1*inch, 2*inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]))
+        
+        story.append(table)
+        story.append(Spacer(1, 20))
+        
+        # Detailed entries
+        story.append(Paragraph("Detalles de Entradas:", heading_style))
+        
+        for i, entry in enumerate(entries, 1):
+            # Get procedure details
+            procedure = procedures.get(entry["procedure_id"])
+            
+            story.append(Paragraph(f"Entrada #{i}", styles['Heading3']))
+            story.append(Paragraph(f"<b>Fecha:</b> {entry['fecha_completado'] or ''}", styles['Normal']))
+            story.append(Paragraph(f"<b>Empleado:</b> {entry['empleado_name'] or ''}", styles['Normal']))
+            story.append(Paragraph(f"<b>Resultado:</b> {(entry['resultado'] or '').title()}", styles['Normal']))
+            
+            if procedure:
+                story.append(Paragraph(f"<b>Procedimiento:</b> {procedure['nombre']}", styles['Normal']))
+                story.append(Paragraph(f"<b>Tiempo Estimado:</b> {procedure['tiempo_estimado']}", styles['Normal']))
+            
+            if entry["observaciones"]:
+                story.append(Paragraph(f"<b>Observaciones:</b> {entry['observaciones']}", styles['Normal']))
+            
+            firma = entry["firma_empleado"] or ""
+            if firma.startswith(REFERENCE_PREFIX):
+                # Drawn signatures are blobs; show the image, never its sha256: reference
+                try:
+                    signature = Image(signature_store.path(firma[len(REFERENCE_PREFIX):]))
+                    scale = min(2 * inch / signature.imageWidth, 0.75 * inch / signature.imageHeight)
+                    signature.drawWidth, signature.drawHeight = signature.imageWidth * scale, signature.imageHeight * scale
+                    signature.hAlign = 'LEFT'
+                    story.append(Paragraph("<b>Firma:</b>", styles['Normal']))
+                    story.append(signature)
+                except (OSError, ValueError):
+                    logger.warning("Signature image of register entry %s could not be read", entry["id"], exc_info=True)
+                    story.append(Paragraph("<b>Firma:</b> Firma digital (imagen no disponible)", styles['Normal']))
+            else:
+                story.append(Paragraph(f"<b>Firma:</b> {firma}", styles['Normal']))
+            
+            # Photo thumbnails, four per row, scaled to fit 1.6 inch squares
+            if thumbnails.get(entry["id"]):
+                images = []
+                for path in thumbnails[entry["id"]]:
+                    image = Image(path)
+                    scale = min(1.6 * inch / image.imageWidth, 1.6 * inch / image.imageHeight)
+                    image.drawWidth, image.drawHeight = image.imageWidth * scale, image.imageHeight * scale
+                    images.append(image)
+                story.append(Paragraph("<b>Fotos:</b>", styles['Normal']))
+                story.append(Table([images[start:start + 4] for start in range(0, len(images), 4)], colWidths=[1.75*inch] * min(4, len(images)), hAlign='LEFT'))
+            story.append(Spacer(1, 12))
+    else:
+        story.append(Paragraph("No se encontraron entradas para el período seleccionado.", styles['Normal']))
+    
+    # Build PDF
+    doc.build(story)
+    return buffer.getvalue()
+
+@router.get("/{register_id}/export/pdf")
+@pdf_export_job.timed
+async def export_register_pdf(register_id: int, fecha_inicio: str = None, fecha_fin: str = None, x_demo_token: str = Header(None), session: Session = Depends(get_db)):
+    """Generate PDF export of register entries"""
+    # Get register info; the built-in demo registers remain as a fallback
+    db_register = session.query(Register).filter(Register.id == register_id).first()
+    register = register_to_dict(db_register) if db_register else next((reg for reg in registers_db if reg["id"] == register_id), None)
+    if not register:
+        raise HTTPException(status_code=404, detail="Register not found")
+    
+    # Entries in the date range, hot rows and archived months alike
+    fecha_inicio_dt = parse_entry_datetime(fecha_inicio)
+    fecha_fin_dt = parse_entry_datetime(fecha_fin)
+    if fecha_fin_dt and len(fecha_fin) == 10:
+        # A plain date includes that whole day
+        fecha_fin_dt += timedelta(days=1) - timedelta(microseconds=1)
+    query = session.query(RegisterEntry).filter(RegisterEntry.register_id == register_id)
+    if fecha_inicio_dt:
+        query = query.filter(RegisterEntry.fecha_completado >= fecha_inicio_dt)
+    if fecha_fin_dt:
+        query = query.filter(RegisterEntry.fecha_completado <= fecha_fin_dt)
+    entries = [register_entry_to_dict(entry) for entry in query.all()]
+    try:
+        entries.extend(
+            register_entry_to_dict(entry)
+            for entry in read_archived_entries(session, register_id, fecha_inicio_dt, fecha_fin_dt)
+        )
+    except ArchiveUnavailable as error:
+        logger.error("Register %s PDF export: %s", register_id, error)
+        raise HTTPException(status_code=503, detail="Archived register entries are temporarily unavailable")
+    
+    # Sort by completion date
+    entries = sorted(entries, key=lambda x: x["fecha_completado"] or "")
+    
+    procedures = {
+        proc.id: procedure_to_dict(proc)
+        for proc in session.query(Procedure).filter(Procedure.register_id == register_id)
+    }
+    
+    # Photo thumbnails per entry; attachments whose thumbnail is not rendered yet are left out
+    thumbnails = ready_thumbnail_paths(session, [entry["id"] for entry in entries])
+    session.rollback()
+    
+    # Rendering thousands of entries takes seconds, so it runs in the threadpool
+    pdf_bytes = await run_in_threadpool(render_register_pdf, register, entries, procedures, thumbnails, fecha_inicio, fecha_fin)
+    
+    # Return PDF as base64 encoded string
+    pdf_base64 = base64.b64encode(pdf_bytes).decode()
+    
+    return {
+        "pdf_base64": pdf_base64,
+        "filename": f"registro_{register['nombre'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    }
@@ -0,0 +1,113 @@
+"""
+Role management endpoints
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.audit import record_event
+from app.auth import permissions_db, require_permission, role_permissions_db
+
+router = APIRouter(prefix="/roles", tags=["roles"])
+
+# Role Management Endpoints
+@router.get("")
+async def get_roles(user: Dict[str, Any] = Depends(require_permission("system.manage_roles"))):
+    """Get all roles"""
+    roles = []
+    for role_id, permissions in role_permissions_db.items():
+        role_info = {
+            "id": role_id,
+            "name": role_id.title(),
+            "permissions": permissions,
+            "is_system_role": role_id in ["admin", "encargado", "trabajador"]
+        }
+        roles.append(role_info)
+    return {"roles": roles}
+
+@router.get("/{role_id}/permissions")
+async def get_role_permissions(role_id: str, user: Dict[str, Any] = Depends(require_permission("system.manage_permissions"))):
+    """Get permissions for a specific role"""
+    if role_id not in role_permissions_db:
+        raise HTTPException(status_code=404, detail="Role not found")
+    
+    return {"role": role_id, "permissions": role_permissions_db[role_id]}
+
+@router.put("/{role_id}/permissions")
+async def update_role_permissions(
+    role_id: str, 
+    permission_data: dict, 
+    user: Dict[str, Any] = Depends(require_permission("system.manage_permissions"))
+):
+    """Update permissions for a role"""
+    if role_id not in role_permissions_db:
+        raise HTTPException(status_code=404, detail="Role not found")
+    
+    new_permissions = permission_data.get("permissions", [])
+    
+    # Validate permissions exist
+    valid_permissions = [perm["id"] for perm in permissions_db]
+    for perm in new_permissions:
+        if perm not in valid_permissions:
+            raise HTTPException(status_code=400, detail=f"Invalid permission: {perm}")
+    
+    # Update role permissions
+    previous_permissions = role_permissions_db[role_id]
+    role_permissions_db[role_id] = new_permissions
+    record_event("permissions.update", "roles", role_id, {"permissions": [previous_permissions, new_permissions]})
+    
+    return {"message": "Role permissions updated", "role": role_id, "permissions": new_permissions}
+
+@router.post("")
+async def create_role(
+    role_data: dict, 
+    user: Dict[str, Any] = Depends(require_permission("system.manage_roles"))
+):
+    """Create a new role"""
+    role_id = role_data.get("id", "").lower().replace(" ", "_")
+    role_name = role_data.get("name", "")
+    permissions = role_data.get("permissions", [])
+    
+    if not role_id or not role_name:
+        raise HTTPException(status_code=400, detail="Role ID and name are required")
+    
+    if role_id in role_permissions_db:
+        raise HTTPException(status_code=400, detail="Role already exists")
+    
+    # Validate permissions
+    valid_permissions = [perm["id"] for perm in permissions_db]
+    for perm in permissions:
+        if perm not in valid_permissions:
+            raise HTTPException(status_code=400, detail=f"Invalid permission: {perm}")
+    
+    # Create role
+    role_permissions_db[role_id] = permissions
+    record_event("create", "roles", role_id, {"name": role_name, "permissions": permissions})
+    
+    return {"message": "Role created", "role": role_id, "permissions": permissions}
+
+@router.delete("/{role_id}")
+async def delete_role(
+    role_id: str, 
+    user: Dict[str, Any] = Depends(require_permission("system.manage_roles"))
+):
+    """Delete a role (cannot delete system roles)"""
+    if role_id in ["admin", "encargado", "trabajador"]:
+        raise HTTPException(status_code=400, detail="Cannot delete system roles")
+    
+    if role_id not in role_permissions_db:
+        raise HTTPException(status_code=404, detail="Role not found")
+    
+    # Check if any users have this role
+    users_with_role = [emp for emp in empleados_db if emp["role"] == role_id]
+    if users_with_role:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Cannot delete role. {len(users_with_role)} users are assigned this role"
+        )
+    
+    # Delete role
+    permissions = role_permissions_db.pop(role_id)
+    record_event("delete", "roles", role_id, {"permissions": permissions})
+    
+    return {"message": "Role deleted", "role": role_id}
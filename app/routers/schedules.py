@@ -0,0 +1,264 @@
+"""
+Work schedule endpoints: listing, creation, bulk planning and coverage checks
+"""
+from datetime import date
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth import get_user_from_token, require_permission
+from app.coverage import DEFAULT_MIN_REST_HOURS, check_schedules, load_intervals, schedule_interval
+from app.database import get_db
+from app.dates import require_fecha
+from app.models import Employee, Schedule, ShiftDefinition, Task
+from app.shifts import apply_shift, format_shift_label, get_or_create_shift
+
+router = APIRouter(prefix="/schedules", tags=["schedules"])
+
+# Longest rest period a bulk request may ask for: a week
+MAX_MIN_REST_HOURS = 7 * 24
+
+def schedule_to_dict(schedule: Schedule) -> Dict[str, Any]:
+    """List representation of a schedule, shared with /sync"""
+    return {
+        "id": schedule.id,
+        "fecha": schedule.fecha,
+        "turno": schedule.turno,
+        "empleado_id": schedule.empleado_id,
+        "empleado": schedule.employee.nombre,
+        "shift_definition_id": schedule.shift_definition_id,
+        "start_at": schedule.start_at.isoformat() if schedule.start_at else None,
+        "end_at": schedule.end_at.isoformat() if schedule.end_at else None
+    }
+
+@router.get("")
+async def get_schedules(user: Dict[str, Any] = Depends(require_permission("schedules.view")), db: Session = Depends(get_db)):
+    # Return all schedules sorted by date, then chronologically by shift start
+    schedules = db.query(Schedule).join(Employee).filter(Employee.activo == True).order_by(
+        Schedule.fecha, Schedule.start_at, Schedule.turno
+    ).all()
+    
+    # Convert to dict format with employee names
+    schedules_data = [schedule_to_dict(schedule) for schedule in schedules]
+    
+    return {"schedules": schedules_data}
+
+@router.post("")
+async def create_schedule(schedule: dict, user: Dict[str, Any] = Depends(require_permission("schedules.create")), db: Session = Depends(get_db)):
+    # Validate employee exists
+    employee = db.query(Employee).filter(Employee.id == schedule["empleado_id"], Employee.activo == True).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    fecha = require_fecha(schedule.get("fecha"))
+    
+    # Resolve the shift from its id or from a legacy "Nombre (HH:MM-HH:MM)" label
+    if schedule.get("shift_definition_id"):
+        shift = db.query(ShiftDefinition).filter(ShiftDefinition.id == schedule["shift_definition_id"]).first()
+        if not shift:
+            raise HTTPException(status_code=404, detail="Shift definition not found")
+    else:
+        shift = get_or_create_shift(db, schedule.get("turno", ""))
+    
+    # Check if schedule already exists for this employee on this date and shift
+    duplicate_filter = Schedule.shift_definition_id == shift.id if shift else Schedule.turno == schedule.get("turno")
+    existing_schedule = db.query(Schedule).filter(
+        Schedule.empleado_id == schedule["empleado_id"],
+        Schedule.fecha == fecha,
+        duplicate_filter
+    ).first()
+    if existing_schedule:
+        raise HTTPException(status_code=400, detail="Schedule already exists for this employee on this date and shift")
+    
+    # Create new schedule instance
+    new_schedule = Schedule(
+        fecha=fecha,
+        turno=schedule.get("turno", ""),
+        empleado_id=schedule["empleado_id"]
+    )
+    if shift:
+        apply_shift(new_schedule, shift)
+    
+    # Add to database
+    db.add(new_schedule)
+    db.commit()
+    db.refresh(new_schedule)
+    
+    # Convert to dict format for response
+    schedule_dict = {
+        "id": new_schedule.id,
+        "fecha": new_schedule.fecha,
+        "turno": new_schedule.turno,
+        "empleado_id": new_schedule.empleado_id,
+        "empleado": employee.nombre,
+        "shift_definition_id": new_schedule.shift_definition_id,
+        "start_at": new_schedule.start_at.isoformat() if new_schedule.start_at else None,
+        "end_at": new_schedule.end_at.isoformat() if new_schedule.end_at else None
+    }
+    
+    return {"message": "Schedule created", "schedule": schedule_dict}
+
+@router.get("/coverage")
+async def get_schedule_coverage(
+    fecha_inicio: date,
+    fecha_fin: date,
+    min_staff: int = 1,
+    min_rest_hours: float = DEFAULT_MIN_REST_HOURS,
+    user: Dict[str, Any] = Depends(require_permission("schedules.view")),
+    db: Session = Depends(get_db)
+):
+    """Report uncovered shifts, double-booked employees and rest-period violations for a date range"""
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(status_code=400, detail="fecha_fin must not be before fecha_inicio")
+    
+    shifts = db.query(ShiftDefinition).filter(ShiftDefinition.activo == True).all()
+    intervals = load_intervals(db, fecha_inicio, fecha_fin)
+    report = check_schedules(intervals, shifts, fecha_inicio, fecha_fin, min_staff, min_rest_hours)
+    
+    return {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, **report}
+
+@router.post("/bulk")
+async def create_schedules_bulk(
+    bulk_data: dict,
+    user: Dict[str, Any] = Depends(require_permission("schedules.create")),
+    db: Session = Depends(get_db)
+):
+    """Create many schedules at once, rejecting the batch if it double-books someone or breaks rest periods"""
+    items = bulk_data.get("schedules", [])
+    if not items or not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="No schedules provided")
+    min_rest_hours = bulk_data.get("min_rest_hours", DEFAULT_MIN_REST_HOURS)
+    
+    # Reject malformed input before anything is loaded, naming the first bad item
+    if isinstance(min_rest_hours, bool) or not isinstance(min_rest_hours, (int, float)) or not 0 <= min_rest_hours <= MAX_MIN_REST_HOURS:
+        raise HTTPException(status_code=400, detail=f"min_rest_hours must be a number from 0 to {MAX_MIN_REST_HOURS}")
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=400, detail=f"schedules[{index}] must be an object")
+        empleado_id = item.get("empleado_id")
+        if not isinstance(empleado_id, int) or isinstance(empleado_id, bool):
+            raise HTTPException(status_code=400, detail=f"schedules[{index}].empleado_id must be an integer")
+        shift_definition_id = item.get("shift_definition_id")
+        if shift_definition_id is not None and (not isinstance(shift_definition_id, int) or isinstance(shift_definition_id, bool)):
+            raise HTTPException(status_code=400, detail=f"schedules[{index}].shift_definition_id must be an integer")
+    
+    # Load employees and shift definitions once for the whole batch
+    employees = {
+        emp.id: emp for emp in db.query(Employee).filter(
+            Employee.id.in_({item["empleado_id"] for item in items}),
+            Employee.activo == True
+        ).all()
+    }
+    shifts_by_id = {shift.id: shift for shift in db.query(ShiftDefinition).all()}
+    shifts_by_label = {format_shift_label(shift): shift for shift in shifts_by_id.values()}
+    
+    new_schedules = []
+    for item in items:
+        if item["empleado_id"] not in employees:
+            raise HTTPException(status_code=404, detail=f"Employee {item['empleado_id']} not found")
+        if item.get("shift_definition_id"):
+            shift = shifts_by_id.get(item["shift_definition_id"])
+        else:
+            shift = shifts_by_label.get(item.get("turno")) or get_or_create_shift(db, item.get("turno", ""))
+        if not shift:
+            raise HTTPException(status_code=400, detail=f"Unknown shift: {item.get('turno') or item.get('shift_definition_id')}")
+        shifts_by_label[format_shift_label(shift)] = shift
+        
+        new_schedule = Schedule(fecha=require_fecha(item.get("fecha")), turno="", empleado_id=item["empleado_id"])
+        apply_shift(new_schedule, shift)
+        new_schedules.append(new_schedule)
+    
+    # Validate the new schedules together with what is already planned around them
+    fechas = sorted(schedule.fecha for schedule in new_schedules)
+    intervals = load_intervals(db, fechas[0], fechas[-1])
+    intervals += [schedule_interval(schedule, employees[schedule.empleado_id].nombre) for schedule in new_schedules]
+    report = check_schedules(intervals, [], fechas[0], fechas[-1], min_rest_hours=min_rest_hours)
+    
+    # Only problems involving the new (still unsaved) schedules block the batch
+    def is_new(problem):
+        return problem["first"]["schedule_id"] is None or problem["second"]["schedule_id"] is None
+    
+    overlaps = [problem for problem in report["overlaps"] if is_new(problem)]
+    rest_violations = [problem for problem in report["rest_violations"] if is_new(problem)]
+    problems = overlaps + rest_violations
+    if problems and not bulk_data.get("allow_violations", False):
+        db.rollback()
+        raise HTTPException(status_code=400, detail={
+            "message": "Schedules conflict with existing shifts",
+            "overlaps": overlaps,
+            "rest_violations": rest_violations
+        })
+    
+    db.add_all(new_schedules)
+    db.commit()
+    
+    return {
+        "message": f"{len(new_schedules)} schedules created",
+        "schedules": [{
+            "id": schedule.id,
+            "fecha": schedule.fecha,
+            "turno": schedule.turno,
+            "empleado_id": schedule.empleado_id,
+            "empleado": employees[schedule.empleado_id].nombre,
+            "shift_definition_id": schedule.shift_definition_id,
+            "start_at": schedule.start_at.isoformat(),
+            "end_at": schedule.end_at.isoformat()
+        } for schedule in new_schedules],
+        "warnings": problems
+    }
+
+# Enhanced schedule route to include tasks
+@router.get("/{schedule_id}/tasks")
+async def get_schedule_tasks(schedule_id: int, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """Get all tasks for a specific schedule/date"""
+    # Find the schedule from database
+    schedule = db.query(Schedule).filter(Schedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    
+    # Get employee info
+    employee = db.query(Employee).filter(Employee.id == schedule.empleado_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Find tasks for this employee on this date from database
+    tasks = db.query(Task).filter(
+        Task.empleado_id == schedule.empleado_id,
+        Task.fecha == schedule.fecha
+    ).all()
+    
+    # Convert tasks to dict format
+    schedule_tasks = []
+    for task in tasks:
+        task_dict = {
+            "id": task.id,
+            "titulo": task.titulo,
+            "descripcion": task.descripcion,
+            "empleado_id": task.empleado_id,
+            "empleado": employee.nombre,
+            "fecha": task.fecha,
+            "estado": task.estado,
+            "prioridad": task.prioridad,
+            "is_recurring": task.is_recurring,
+            "frequency": task.frequency,
+            "parent_task_id": task.parent_task_id
+        }
+        schedule_tasks.append(task_dict)
+    
+    # Convert schedule to dict format
+    schedule_dict = {
+        "id": schedule.id,
+        "fecha": schedule.fecha,
+        "turno": schedule.turno,
+        "empleado_id": schedule.empleado_id,
+        "empleado": employee.nombre,
+        "shift_definition_id": schedule.shift_definition_id,
+        "start_at": schedule.start_at.isoformat() if schedule.start_at else None,
+        "end_at": schedule.end_at.isoformat() if schedule.end_at else None
+    }
+    
+    return {
+        "schedule": schedule_dict,
+        "tasks": sorted(schedule_tasks, key=lambda x: x["prioridad"])
+    }
@@ -0,0 +1,78 @@
+"""
+Full-text search across tasks, task definitions, procedures and register entry observations
+"""
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth import get_user_from_token, has_permission
+from app.database import get_db
+from app.models import Procedure, RegisterEntry, Task
+from app.search import SEARCH_TYPES, load_hits, search, snippet
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+MAX_LIMIT = 100
+
+def _hit_to_dict(kind: str, obj, query: str, rank: float) -> Dict[str, Any]:
+    result = {"type": kind, "id": obj.id, "rank": round(rank, 4), "snippet": snippet(obj, query)}
+    if isinstance(obj, Task):
+        result.update({"title": obj.titulo, "empleado_id": obj.empleado_id, "fecha": str(obj.fecha) if obj.fecha else None, "estado": obj.estado})
+    elif isinstance(obj, Procedure):
+        result.update({"title": obj.titulo, "register_id": obj.register_id, "register": obj.register.nombre if obj.register else None})
+    elif isinstance(obj, RegisterEntry):
+        result.update({
+            "title": obj.register.nombre if obj.register else f"Registro {obj.register_id}",
+            "register_id": obj.register_id,
+            "empleado_name": obj.empleado_name,
+            "fecha_completado": obj.fecha_completado.strftime("%Y-%m-%d %H:%M:%S") if obj.fecha_completado else None,
+        })
+    else:
+        result["title"] = obj.titulo
+    return result
+
+@router.get("")
+async def search_all(
+    q: str,
+    types: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    user: Dict[str, Any] = Depends(get_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """Ranked, paginated search; `types` is a comma-separated subset of task, task_definition, procedure, register_entry"""
+    query = q.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="q is required")
+    if not 1 <= limit <= MAX_LIMIT or offset < 0:
+        raise HTTPException(status_code=400, detail=f"limit must be 1-{MAX_LIMIT} and offset 0 or more")
+
+    requested = SEARCH_TYPES
+    if types:
+        requested = tuple(kind.strip() for kind in types.split(",") if kind.strip())
+        unknown = set(requested) - set(SEARCH_TYPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+
+    # Same visibility as the list endpoints: own tasks only without tasks.view_all
+    can_view_all_tasks = has_permission(user, "tasks.view_all", db)
+    can_view_tasks = can_view_all_tasks or has_permission(user, "tasks.view", db)
+    can_view_registers = has_permission(user, "registers.view", db)
+    allowed = {
+        "task": can_view_tasks,
+        "task_definition": can_view_tasks,
+        "procedure": can_view_registers,
+        "register_entry": can_view_registers,
+    }
+    searched = [kind for kind in requested if allowed[kind]]
+    owner = None if can_view_all_tasks else user.get("id")
+
+    hits, total = search(db, query, searched, owner, limit, offset)
+    rows = load_hits(db, hits)
+    results = [
+        _hit_to_dict(kind, rows[(kind, row_id)], query, rank)
+        for kind, row_id, rank in hits if (kind, row_id) in rows
+    ]
+
+    return {"query": query, "types": searched, "total": total, "limit": limit, "offset": offset, "results": results}
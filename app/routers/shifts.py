@@ -0,0 +1,74 @@
+"""
+Shift definition endpoints
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth import require_permission
+from app.database import get_db
+from app.models import ShiftDefinition
+from app.shifts import format_shift_label, parse_time
+
+router = APIRouter(prefix="/shifts", tags=["shifts"])
+
+# Shift definition endpoints
+@router.get("")
+async def get_shifts(user: Dict[str, Any] = Depends(require_permission("schedules.view")), db: Session = Depends(get_db)):
+    """Get active shift definitions in chronological order"""
+    shifts = db.query(ShiftDefinition).filter(ShiftDefinition.activo == True).order_by(
+        ShiftDefinition.orden, ShiftDefinition.start_time
+    ).all()
+    
+    shifts_data = [{
+        "id": shift.id,
+        "nombre": shift.nombre,
+        "start_time": shift.start_time.strftime("%H:%M"),
+        "end_time": shift.end_time.strftime("%H:%M"),
+        "overnight": shift.end_time <= shift.start_time,
+        "label": format_shift_label(shift),
+        "orden": shift.orden
+    } for shift in shifts]
+    
+    return {"shifts": shifts_data}
+
+@router.post("")
+async def create_shift(shift_data: dict, user: Dict[str, Any] = Depends(require_permission("schedules.create")), db: Session = Depends(get_db)):
+    """Create a shift definition; an end_time before start_time makes it an overnight shift"""
+    try:
+        start_time = parse_time(shift_data["start_time"])
+        end_time = parse_time(shift_data["end_time"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="start_time and end_time must use HH:MM format")
+    
+    existing = db.query(ShiftDefinition).filter(
+        ShiftDefinition.nombre == shift_data["nombre"],
+        ShiftDefinition.start_time == start_time,
+        ShiftDefinition.end_time == end_time
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Shift definition already exists")
+    
+    new_shift = ShiftDefinition(
+        nombre=shift_data["nombre"],
+        start_time=start_time,
+        end_time=end_time,
+        orden=shift_data.get("orden", 0)
+    )
+    db.add(new_shift)
+    db.commit()
+    db.refresh(new_shift)
+    
+    return {
+        "message": "Shift created",
+        "shift": {
+            "id": new_shift.id,
+            "nombre": new_shift.nombre,
+            "start_time": new_shift.start_time.strftime("%H:%M"),
+            "end_time": new_shift.end_time.strftime("%H:%M"),
+            "overnight": new_shift.end_time <= new_shift.start_time,
+            "label": format_shift_label(new_shift),
+            "orden": new_shift.orden
+        }
+    }
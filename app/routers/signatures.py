@@ -0,0 +1,54 @@
+"""
+Signature images: upload into the content-addressed blob store and immutable, cacheable downloads
+"""
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from app.auth import get_user_from_token
+from app.blobs import REFERENCE_PREFIX, SIGNATURE_MAX_BYTES, InvalidBlob, is_digest, signature_store, signature_url, sniff_image_type, store_signature_image
+
+router = APIRouter(prefix="/signatures", tags=["signatures"])
+
+# Blobs never change, so recently fetched ones can be served from memory without revalidation
+SIGNATURE_CACHE_ENTRIES = int(os.environ.get("SIGNATURE_CACHE_ENTRIES", "256"))
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+@lru_cache(maxsize=SIGNATURE_CACHE_ENTRIES)
+def _read_signature(digest: str) -> Tuple[bytes, str]:
+    data = signature_store.get(digest)
+    return data, sniff_image_type(data) or "application/octet-stream"
+
+@router.post("")
+async def upload_signature(request: Request, user: Dict[str, Any] = Depends(get_user_from_token)):
+    """Store a PNG, JPEG or WebP signature sent as the raw request body; returns the reference for register entries"""
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > SIGNATURE_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Signature images are limited to {SIGNATURE_MAX_BYTES} bytes")
+    try:
+        digest = await run_in_threadpool(store_signature_image, bytes(body))
+    except InvalidBlob as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    reference = REFERENCE_PREFIX + digest
+    return {"sha256": digest, "reference": reference, "url": signature_url(reference)}
+
+@router.get("/{digest}")
+async def get_signature(digest: str, if_none_match: Optional[str] = Header(None), user: Dict[str, Any] = Depends(get_user_from_token)):
+    """Signature image by SHA-256; the content never changes, so clients may cache it indefinitely"""
+    if not is_digest(digest):
+        raise HTTPException(status_code=404, detail="Signature not found")
+    etag = f'"{digest}"'
+    headers = {"Cache-Control": IMMUTABLE, "ETag": etag}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    try:
+        data, media_type = await run_in_threadpool(_read_signature, digest)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Signature not found")
+    return Response(content=data, media_type=media_type, headers=headers)
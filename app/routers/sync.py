@@ -0,0 +1,72 @@
+"""
+Delta sync for field devices: rows inserted, updated or deleted since a version, per entity
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session, joinedload
+
+from app.auth import get_user_from_token, has_permission
+from app.database import get_db
+from app.models import Employee, Register, Schedule, Task, TaskAssignment
+from app.routers.registers import register_to_dict
+from app.routers.schedules import schedule_to_dict
+from app.routers.task_assignments import assignment_to_dict
+from app.routers.tasks import task_to_dict
+from app.sync import deleted_ids, read_clock
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+def _entity_changes(upserted: List[Dict[str, Any]], deleted: List[int]) -> Dict[str, Any]:
+    # A row reassigned within the caller's view shows up in both lists; the upsert wins
+    upserted_ids = {row["id"] for row in upserted}
+    return {"upserted": upserted, "deleted": [row_id for row_id in deleted if row_id not in upserted_ids]}
+
+@router.get("")
+async def sync_changes(since: Optional[int] = None, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """Changes visible to the current user after `since`; omit it (or send 0) for a full snapshot"""
+    # Read the clock first: every row up to this version is committed (see app/sync.py)
+    clock = read_clock(db)
+    # Devices ahead of the server (restored database) or older than the pruned tombstones start over
+    full = not since or since > clock.version or since < clock.pruned_version
+    since = 0 if full else since
+
+    def changed(query, model):
+        return query if full else query.filter(model.version > since)
+
+    def removed(entity: str, empleado_id: Optional[int] = None) -> List[int]:
+        return [] if full else deleted_ids(db, entity, since, empleado_id)
+
+    changes = {}
+
+    can_view_all_tasks = has_permission(user, "tasks.view_all", db)
+    if can_view_all_tasks or has_permission(user, "tasks.view", db):
+        # Same visibility as GET /tasks and GET /task-assignments
+        owner = None if can_view_all_tasks else user.get("id")
+
+        tasks = changed(db.query(Task).options(joinedload(Task.employee)).join(Employee).filter(Employee.activo == True), Task)
+        assignments = changed(db.query(TaskAssignment).options(
+            joinedload(TaskAssignment.task_definition), joinedload(TaskAssignment.employee)
+        ).join(Employee, TaskAssignment.empleado_id == Employee.id).filter(Employee.activo == True), TaskAssignment)
+        if owner is not None:
+            tasks = tasks.filter(Task.empleado_id == owner)
+            assignments = assignments.filter(TaskAssignment.empleado_id == owner)
+
+        changes["tasks"] = _entity_changes([task_to_dict(task) for task in tasks.all()], removed(Task.__tablename__, owner))
+        changes["task_assignments"] = _entity_changes(
+            [assignment_to_dict(assignment) for assignment in assignments.all()], removed(TaskAssignment.__tablename__, owner)
+        )
+
+    if has_permission(user, "schedules.view", db):
+        schedules = changed(db.query(Schedule).options(joinedload(Schedule.employee)).join(Employee).filter(Employee.activo == True), Schedule)
+        changes["schedules"] = _entity_changes([schedule_to_dict(schedule) for schedule in schedules.all()], removed(Schedule.__tablename__))
+
+    if has_permission(user, "registers.view", db):
+        registers = changed(db.query(Register), Register).all()
+        # Deactivating a register is its delete
+        deactivated = [reg.id for reg in registers if not reg.activo] if not full else []
+        changes["registers"] = _entity_changes(
+            [register_to_dict(reg) for reg in registers if reg.activo], removed(Register.__tablename__) + deactivated
+        )
+
+    return {"version": clock.version, "full": full, "changes": changes}
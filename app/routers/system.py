@@ -0,0 +1,15 @@
+"""
+System reports
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, Request
+
+from app.auth import require_permission
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+@router.get("/query-stats")
+async def get_query_stats(request: Request, user: Dict[str, Any] = Depends(require_permission("system.view_reports"))):
+    """Per-route SQL statement count and timing histograms since startup"""
+    return {"routes": request.app.state.route_stats.snapshot()}
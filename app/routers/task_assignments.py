@@ -0,0 +1,301 @@
+"""
+Task assignment endpoints, including workload-balanced planning
+"""
+from datetime import date
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth import get_user_from_token, has_permission, require_any_permission, require_permission
+from app.database import get_db
+from app.dates import require_fecha
+from app.models import Employee, TaskAssignment, TaskDefinition
+from app.planner import WorkloadPlanner
+
+router = APIRouter(prefix="/task-assignments", tags=["task-assignments"])
+
+def assignment_to_dict(assignment: TaskAssignment) -> Dict[str, Any]:
+    """List representation of a task assignment, shared with /sync"""
+    return {
+        "id": assignment.id,
+        "task_definition_id": assignment.task_definition_id,
+        "titulo": assignment.task_definition.titulo,
+        "descripcion": assignment.task_definition.descripcion,
+        "empleado_id": assignment.empleado_id,
+        "empleado": assignment.employee.nombre,
+        "fecha": assignment.fecha,
+        "schedule_id": assignment.schedule_id,
+        "estado": assignment.estado,
+        "prioridad": assignment.priority_override or assignment.task_definition.prioridad,
+        "planned_start": assignment.planned_start.isoformat() if assignment.planned_start else None,
+        "planned_duration_minutes": assignment.planned_duration_minutes or assignment.task_definition.default_duration_minutes,
+        "actual_duration_minutes": assignment.actual_duration_minutes,
+        "start_time": assignment.start_time.isoformat() if assignment.start_time else None,
+        "notes": assignment.notes,
+        "created_at": assignment.created_at.isoformat() if assignment.created_at else None
+    }
+
+# ============================================
+# TASK ASSIGNMENTS API ENDPOINTS
+# ============================================
+
+@router.get("")
+async def get_task_assignments(
+    empleado_id: int = None,
+    fecha: date = None,
+    schedule_id: int = None,
+    user: Dict[str, Any] = Depends(require_any_permission(["tasks.view", "tasks.view_all"])),
+    db: Session = Depends(get_db)
+):
+    """Get task assignments with filtering"""
+    # Check if user can see all assignments or only their own
+    can_view_all = has_permission(user, "tasks.view_all", db)
+    
+    # Build base query
+    query = db.query(TaskAssignment).join(TaskDefinition).join(Employee).filter(Employee.activo == True)
+    
+    # Apply filters
+    if empleado_id:
+        query = query.filter(TaskAssignment.empleado_id == empleado_id)
+    elif not can_view_all:
+        # Workers can only see their own assignments
+        query = query.filter(TaskAssignment.empleado_id == user["id"])
+    
+    if fecha:
+        query = query.filter(TaskAssignment.fecha == fecha)
+    
+    if schedule_id:
+        query = query.filter(TaskAssignment.schedule_id == schedule_id)
+    
+    assignments = query.all()
+    
+    # Convert to dict format
+    result = [assignment_to_dict(assignment) for assignment in assignments]
+    
+    return result
+
+@router.post("")
+async def create_task_assignment(
+    assignment: dict,
+    user: Dict[str, Any] = Depends(require_permission("tasks.create")),
+    db: Session = Depends(get_db)
+):
+    """Create a new task assignment"""
+    # Validate task definition exists and is active
+    task_definition = db.query(TaskDefinition).filter(
+        TaskDefinition.id == assignment["task_definition_id"],
+        TaskDefinition.active == True
+    ).first()
+    if not task_definition:
+        raise HTTPException(status_code=404, detail="Task definition not found or inactive")
+    
+    # Validate employee exists and is active
+    employee = db.query(Employee).filter(
+        Employee.id == assignment["empleado_id"],
+        Employee.activo == True
+    ).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    fecha = require_fecha(assignment.get("fecha"))
+    
+    # Check for duplicate assignment (same task definition, employee, date)
+    existing = db.query(TaskAssignment).filter(
+        TaskAssignment.task_definition_id == assignment["task_definition_id"],
+        TaskAssignment.empleado_id == assignment["empleado_id"],
+        TaskAssignment.fecha == fecha
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Task already assigned to this employee on this date")
+    
+    # Create new task assignment
+    new_assignment = TaskAssignment(
+        task_definition_id=assignment["task_definition_id"],
+        empleado_id=assignment["empleado_id"],
+        fecha=fecha,
+        schedule_id=assignment.get("schedule_id"),
+        estado="pendiente",
+        priority_override=assignment.get("priority_override"),
+        planned_start=assignment.get("planned_start"),
+        planned_duration_minutes=assignment.get("planned_duration_minutes"),
+        notes=assignment.get("notes"),
+        created_by=user["id"]
+    )
+    
+    db.add(new_assignment)
+    db.commit()
+    db.refresh(new_assignment)
+    
+    return {
+        "id": new_assignment.id,
+        "task_definition_id": new_assignment.task_definition_id,
+        "titulo": task_definition.titulo,
+        "empleado_id": new_assignment.empleado_id,
+        "empleado": employee.nombre,
+        "fecha": new_assignment.fecha,
+        "estado": new_assignment.estado,
+        "message": "Task assigned successfully"
+    }
+
+@router.post("/plan")
+async def plan_task_assignments(
+    plan_request: dict,
+    user: Dict[str, Any] = Depends(require_permission("tasks.assign")),
+    db: Session = Depends(get_db)
+):
+    """Build a balanced assignment plan for task definitions over a date range, optionally committing it"""
+    fecha_inicio = require_fecha(plan_request.get("fecha_inicio"), "fecha_inicio")
+    fecha_fin = require_fecha(plan_request.get("fecha_fin"), "fecha_fin")
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(status_code=400, detail="fecha_fin must not be before fecha_inicio")
+    
+    # Plan the requested definitions, or every active one
+    query = db.query(TaskDefinition).filter(TaskDefinition.active == True)
+    if plan_request.get("task_definition_ids"):
+        query = query.filter(TaskDefinition.id.in_(plan_request["task_definition_ids"]))
+    definitions = query.all()
+    if not definitions:
+        raise HTTPException(status_code=404, detail="No active task definitions to plan")
+    
+    planner = WorkloadPlanner(db, definitions, fecha_inicio, fecha_fin)
+    plan = planner.solve()
+    
+    created = 0
+    if plan_request.get("commit", False):
+        db.add_all([TaskAssignment(
+            task_definition_id=item["task_definition_id"],
+            empleado_id=item["empleado_id"],
+            fecha=item["fecha"],
+            schedule_id=item["schedule_id"],
+            estado="pendiente",
+            planned_start=item["planned_start"],
+            planned_duration_minutes=item["planned_duration_minutes"],
+            created_by=user["id"]
+        ) for item in plan])
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error saving plan: {str(e)}")
+        created = len(plan)
+    
+    loads = planner.employee_loads()
+    return {
+        "plan": [{**item, "planned_start": item["planned_start"].isoformat()} for item in plan],
+        "unassigned": planner.unassigned,
+        "employee_load_minutes": loads,
+        "max_load_minutes": max(loads.values()) if loads else 0,
+        "min_load_minutes": min(loads.values()) if loads else 0,
+        "committed": created,
+        "message": f"{created} task assignments created" if created else "Plan generated (not committed)"
+    }
+
+@router.get("/{assignment_id}")
+async def get_task_assignment(
+    assignment_id: int,
+    user: Dict[str, Any] = Depends(require_any_permission(["tasks.view", "tasks.view_all"])),
+    db: Session = Depends(get_db)
+):
+    """Get a specific task assignment"""
+    assignment = db.query(TaskAssignment).filter(TaskAssignment.id == assignment_id).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Task assignment not found")
+    
+    # Check if user can view this assignment
+    can_view_all = has_permission(user, "tasks.view_all", db)
+    if not can_view_all and assignment.empleado_id != user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view this assignment")
+    
+    return {
+        "id": assignment.id,
+        "task_definition_id": assignment.task_definition_id,
+        "titulo": assignment.task_definition.titulo,
+        "descripcion": assignment.task_definition.descripcion,
+        "empleado_id": assignment.empleado_id,
+        "empleado": assignment.employee.nombre,
+        "fecha": assignment.fecha,
+        "schedule_id": assignment.schedule_id,
+        "estado": assignment.estado,
+        "prioridad": assignment.priority_override or assignment.task_definition.prioridad,
+        "planned_start": assignment.planned_start.isoformat() if assignment.planned_start else None,
+        "planned_duration_minutes": assignment.planned_duration_minutes or assignment.task_definition.default_duration_minutes,
+        "actual_duration_minutes": assignment.actual_duration_minutes,
+        "start_time": assignment.start_time.isoformat() if assignment.start_time else None,
+        "notes": assignment.notes,
+        "created_at": assignment.created_at.isoformat() if assignment.created_at else None
+    }
+
+@router.patch("/{assignment_id}")
+async def update_task_assignment(
+    assignment_id: int,
+    update_data: dict,
+    user: Dict[str, Any] = Depends(get_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """Update a task assignment (status, notes, timing)"""
+    assignment = db.query(TaskAssignment).filter(TaskAssignment.id == assignment_id).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Task assignment not found")
+    
+    # Check permissions: assignee can update status/timing, managers can update everything
+    can_manage = has_permission(user, "tasks.create", db)
+    is_assignee = assignment.empleado_id == user["id"]
+    
+    if not can_manage and not is_assignee:
+        raise HTTPException(status_code=403, detail="Not authorized to update this assignment")
+    
+    # Restrict what workers can update
+    allowed_worker_fields = {"estado", "actual_duration_minutes", "start_time", "notes"}
+    if not can_manage and not all(field in allowed_worker_fields for field in update_data.keys()):
+        raise HTTPException(status_code=403, detail="Workers can only update status, timing, and notes")
+    
+    # Update fields
+    for field, value in update_data.items():
+        if hasattr(assignment, field):
+            # Convert datetime strings for timing fields
+            if field in ["start_time", "planned_start"] and value and isinstance(value, str):
+                from datetime import datetime
+                try:
+                    value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except ValueError:
+                    raise HTTPException(status_code=400, detail=f"Invalid datetime format for {field}")
+            if field == "fecha":
+                value = require_fecha(value)
+            
+            setattr(assignment, field, value)
+    
+    try:
+        db.commit()
+        db.refresh(assignment)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to update assignment")
+    
+    return {
+        "id": assignment.id,
+        "estado": assignment.estado,
+        "actual_duration_minutes": assignment.actual_duration_minutes,
+        "notes": assignment.notes,
+        "message": "Assignment updated successfully"
+    }
+
+@router.delete("/{assignment_id}")
+async def delete_task_assignment(
+    assignment_id: int,
+    user: Dict[str, Any] = Depends(require_permission("tasks.create")),
+    db: Session = Depends(get_db)
+):
+    """Delete a task assignment (only managers can do this)"""
+    assignment = db.query(TaskAssignment).filter(TaskAssignment.id == assignment_id).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Task assignment not found")
+    
+    try:
+        db.delete(assignment)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to delete assignment")
+    
+    return {"message": "Task assignment deleted successfully"}
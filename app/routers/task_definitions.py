@@ -0,0 +1,161 @@
+"""
+Task definition (template) endpoints
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth import require_permission
+from app.database import get_db
+from app.models import TaskDefinition
+
+router = APIRouter(prefix="/task-definitions", tags=["task-definitions"])
+
+# ============================================
+# TASK DEFINITIONS API ENDPOINTS
+# ============================================
+
+@router.get("")
+async def get_task_definitions(
+    active_only: bool = True,
+    user: Dict[str, Any] = Depends(require_permission("tasks.view")),
+    db: Session = Depends(get_db)
+):
+    """Get all task definitions"""
+    query = db.query(TaskDefinition)
+    if active_only:
+        query = query.filter(TaskDefinition.active == True)
+    
+    definitions = query.all()
+    
+    # Convert to dict format
+    result = []
+    for definition in definitions:
+        result.append({
+            "id": definition.id,
+            "titulo": definition.titulo,
+            "descripcion": definition.descripcion,
+            "prioridad": definition.prioridad,
+            "requires_signature": definition.requires_signature,
+            "register_id": definition.register_id,
+            "procedure_id": definition.procedure_id,
+            "default_duration_minutes": definition.default_duration_minutes,
+            "active": definition.active,
+            "is_recurring": definition.is_recurring,
+            "frequency": definition.frequency,
+            "recurrence_params": definition.recurrence_params,
+            "created_at": definition.created_at.isoformat() if definition.created_at else None
+        })
+    
+    return result
+
+@router.post("")
+async def create_task_definition(
+    definition: dict,
+    user: Dict[str, Any] = Depends(require_permission("tasks.create")),
+    db: Session = Depends(get_db)
+):
+    """Create a new task definition"""
+    # Create new task definition
+    new_definition = TaskDefinition(
+        titulo=definition["titulo"],
+        descripcion=definition.get("descripcion"),
+        prioridad=definition.get("prioridad", "media"),
+        requires_signature=definition.get("requires_signature", False),
+        register_id=definition.get("register_id"),
+        procedure_id=definition.get("procedure_id"),
+        default_duration_minutes=definition.get("default_duration_minutes"),
+        active=definition.get("active", True),
+        is_recurring=definition.get("is_recurring", False),
+        frequency=definition.get("frequency"),
+        recurrence_params=definition.get("recurrence_params", {})
+    )
+    
+    db.add(new_definition)
+    db.commit()
+    db.refresh(new_definition)
+    
+    return {
+        "id": new_definition.id,
+        "titulo": new_definition.titulo,
+        "descripcion": new_definition.descripcion,
+        "prioridad": new_definition.prioridad,
+        "active": new_definition.active,
+        "is_recurring": new_definition.is_recurring,
+        "frequency": new_definition.frequency,
+        "message": "Task definition created successfully"
+    }
+
+@router.get("/{definition_id}")
+async def get_task_definition(
+    definition_id: int,
+    user: Dict[str, Any] = Depends(require_permission("tasks.view")),
+    db: Session = Depends(get_db)
+):
+    """Get a specific task definition"""
+    definition = db.query(TaskDefinition).filter(TaskDefinition.id == definition_id).first()
+    if not definition:
+        raise HTTPException(status_code=404, detail="Task definition not found")
+    
+    return {
+        "id": definition.id,
+        "titulo": definition.titulo,
+        "descripcion": definition.descripcion,
+        "prioridad": definition.prioridad,
+        "requires_signature": definition.requires_signature,
+        "register_id": definition.register_id,
+        "procedure_id": definition.procedure_id,
+        "default_duration_minutes": definition.default_duration_minutes,
+        "active": definition.active,
+        "is_recurring": definition.is_recurring,
+        "frequency": definition.frequency,
+        "recurrence_params": definition.recurrence_params,
+        "created_at": definition.created_at.isoformat() if definition.created_at else None
+    }
+
+@router.patch("/{definition_id}")
+async def update_task_definition(
+    definition_id: int,
+    update_data: dict,
+    user: Dict[str, Any] = Depends(require_permission("tasks.create")),
+    db: Session = Depends(get_db)
+):
+    """Update a task definition"""
+    definition = db.query(TaskDefinition).filter(TaskDefinition.id == definition_id).first()
+    if not definition:
+        raise HTTPException(status_code=404, detail="Task definition not found")
+    
+    # Update fields
+    for field, value in update_data.items():
+        if hasattr(definition, field):
+            setattr(definition, field, value)
+    
+    db.commit()
+    db.refresh(definition)
+    
+    return {
+        "id": definition.id,
+        "titulo": definition.titulo,
+        "descripcion": definition.descripcion,
+        "prioridad": definition.prioridad,
+        "active": definition.active,
+        "message": "Task definition updated successfully"
+    }
+
+@router.delete("/{definition_id}")
+async def delete_task_definition(
+    definition_id: int,
+    user: Dict[str, Any] = Depends(require_permission("tasks.create")),
+    db: Session = Depends(get_db)
+):
+    """Delete a task definition (set as inactive)"""
+    definition = db.query(TaskDefinition).filter(TaskDefinition.id == definition_id).first()
+    if not definition:
+        raise HTTPException(status_code=404, detail="Task definition not found")
+    
+    # Set as inactive instead of deleting
+    definition.active = False
+    db.commit()
+    
+    return {"message": "Task definition deactivated successfully"}
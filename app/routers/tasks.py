@@ -0,0 +1,346 @@
+"""
+Task endpoints: listing, creation, status updates and timed completion
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth import get_user_from_token, has_permission, require_any_permission, require_permission
+from app.database import get_db
+from app.dates import require_fecha
+from app.models import Employee, RecurringTask, Schedule, Task
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+def task_to_dict(task: Task) -> Dict[str, Any]:
+    """List representation of a task, shared with /sync"""
+    return {
+        "id": task.id,
+        "titulo": task.titulo,
+        "descripcion": task.descripcion,
+        "empleado_id": task.empleado_id,
+        "empleado": task.employee.nombre,
+        "fecha": task.fecha,
+        "estado": task.estado,
+        "prioridad": task.prioridad,
+        "is_recurring": task.is_recurring,
+        "frequency": task.frequency,
+        "parent_task_id": task.parent_task_id
+    }
+
+@router.get("")
+async def get_tasks(empleado_id: int = None, user: Dict[str, Any] = Depends(require_any_permission(["tasks.view", "tasks.view_all"])), db: Session = Depends(get_db)):
+    # Check if user can see all tasks or only their own
+    can_view_all = has_permission(user, "tasks.view_all", db)
+    
+    # Build base query
+    query = db.query(Task).join(Employee).filter(Employee.activo == True)
+    
+    # If empleado_id is provided, filter tasks for that employee
+    if empleado_id:
+        # Check if user can view this employee's tasks
+        if not can_view_all and user.get("id") != empleado_id:
+            raise HTTPException(status_code=403, detail="Can only view your own tasks")
+        query = query.filter(Task.empleado_id == empleado_id)
+    elif not can_view_all:
+        # If user can't view all tasks, only return their own
+        query = query.filter(Task.empleado_id == user.get("id"))
+    
+    # Execute query and get tasks
+    tasks = query.all()
+    
+    # Convert to dict format
+    tasks_data = [task_to_dict(task) for task in tasks]
+    
+    # Sort tasks by date and priority
+    sorted_tasks = sorted(tasks_data, key=lambda x: (x["fecha"], x["prioridad"]))
+    return {"tasks": sorted_tasks}
+
+@router.post("")
+async def create_task(task: dict, user: Dict[str, Any] = Depends(require_permission("tasks.create")), db: Session = Depends(get_db)):
+    # Validate employee exists and is active
+    employee = db.query(Employee).filter(Employee.id == task["empleado_id"], Employee.activo == True).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    fecha = require_fecha(task.get("fecha"))
+    
+    # Check if employee is working on the task date (check schedule)
+    schedule = db.query(Schedule).filter(
+        Schedule.empleado_id == task["empleado_id"],
+        Schedule.fecha == fecha
+    ).first()
+    
+    if not schedule:
+        # For now, we'll allow task creation even without schedule
+        # In a production environment, you might want to enforce schedule requirements
+        pass
+    
+    # Check if this is a recurring task
+    is_recurring = task.get("is_recurring", False)
+    frequency = task.get("frequency", None)
+    
+    # If it's a recurring task, create the recurring task template first
+    recurring_task_id = None
+    if is_recurring and frequency:
+        recurring_task = RecurringTask(
+            titulo=task["titulo"],
+            descripcion=task.get("descripcion", ""),
+            empleado_id=task["empleado_id"],
+            frequency=frequency,
+            prioridad=task.get("prioridad", "media"),
+            activo=True
+        )
+        db.add(recurring_task)
+        db.commit()
+        db.refresh(recurring_task)
+        recurring_task_id = recurring_task.id
+    
+    # Create new task instance
+    new_task = Task(
+        titulo=task["titulo"],
+        descripcion=task.get("descripcion", ""),
+        empleado_id=task["empleado_id"],
+        fecha=fecha,
+        estado="pendiente",
+        prioridad=task.get("prioridad", "media"),
+        is_recurring=is_recurring,
+        frequency=frequency,
+        parent_task_id=recurring_task_id if is_recurring else None,
+        register_id=task.get("register_id"),
+        procedure_id=task.get("procedure_id"),
+        requires_signature=task.get("requires_signature", False)
+    )
+    
+    # Add to database
+    db.add(new_task)
+    db.commit()
+    db.refresh(new_task)
+    
+    # Convert to dict format for response
+    task_dict = {
+        "id": new_task.id,
+        "titulo": new_task.titulo,
+        "descripcion": new_task.descripcion,
+        "empleado_id": new_task.empleado_id,
+        "empleado": employee.nombre,
+        "fecha": new_task.fecha,
+        "estado": new_task.estado,
+        "prioridad": new_task.prioridad,
+        "is_recurring": new_task.is_recurring,
+        "frequency": new_task.frequency,
+        "parent_task_id": new_task.parent_task_id
+    }
+    
+    message = "Recurring task created" if is_recurring else "Task created"
+    return {"message": message, "task": task_dict}
+
+@router.put("/{task_id}")
+async def update_task_status(task_id: int, update_data: dict, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    # Find task from database
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # Get employee info
+    employee = db.query(Employee).filter(Employee.id == task.empleado_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Update fields if provided
+    if "estado" in update_data:
+        task.estado = update_data["estado"]
+    if "titulo" in update_data:
+        task.titulo = update_data["titulo"]
+    if "descripcion" in update_data:
+        task.descripcion = update_data["descripcion"]
+    if "prioridad" in update_data:
+        task.prioridad = update_data["prioridad"]
+    
+    # Save changes
+    db.commit()
+    db.refresh(task)
+    
+    # Convert to dict format for response
+    task_dict = {
+        "id": task.id,
+        "titulo": task.titulo,
+        "descripcion": task.descripcion,
+        "empleado_id": task.empleado_id,
+        "empleado": employee.nombre,
+        "fecha": task.fecha,
+        "estado": task.estado,
+        "prioridad": task.prioridad,
+        "is_recurring": task.is_recurring,
+        "frequency": task.frequency,
+        "parent_task_id": task.parent_task_id
+    }
+    
+    return {"message": "Task updated", "task": task_dict}
+
+@router.post("/{task_id}/start")
+async def start_task(task_id: int, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """Start task timer"""
+    # Find task from database
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # Get employee info
+    employee = db.query(Employee).filter(Employee.id == task.empleado_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Update task to in_progress with start time
+    task.estado = "en_progreso"
+    task.start_time = datetime.now(timezone.utc)
+    task.actual_duration_minutes = None
+    
+    # Save changes
+    db.commit()
+    db.refresh(task)
+    
+    # Convert to dict format for response
+    task_dict = {
+        "id": task.id,
+        "titulo": task.titulo,
+        "descripcion": task.descripcion,
+        "empleado_id": task.empleado_id,
+        "empleado": employee.nombre,
+        "fecha": task.fecha,
+        "estado": task.estado,
+        "prioridad": task.prioridad,
+        "is_recurring": task.is_recurring,
+        "frequency": task.frequency,
+        "parent_task_id": task.parent_task_id,
+        "start_time": task.start_time.isoformat() if task.start_time else None
+    }
+    
+    return {"message": "Task started", "task": task_dict}
+
+@router.post("/{task_id}/finish")
+async def finish_task(task_id: int, completion_data: dict, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """Finish task and record completion time"""
+    # Find task from database
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # Get employee info
+    employee = db.query(Employee).filter(Employee.id == task.empleado_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Record finish time and calculate duration
+    finish_time = datetime.now(timezone.utc)
+    
+    # Calculate duration if task was started
+    duration_minutes = None
+    if task.start_time:
+        duration_seconds = (finish_time - task.start_time).total_seconds()
+        duration_minutes = int(duration_seconds / 60)
+        task.actual_duration_minutes = duration_minutes
+    
+    # Update task status
+    task.estado = "completada"
+    
+    # Save task changes
+    db.commit()
+    db.refresh(task)
+    
+    # Convert task to dict format for response
+    task_dict = {
+        "id": task.id,
+        "titulo": task.titulo,
+        "descripcion": task.descripcion,
+        "empleado_id": task.empleado_id,
+        "empleado": employee.nombre,
+        "fecha": task.fecha,
+        "estado": task.estado,
+        "prioridad": task.prioridad,
+        "is_recurring": task.is_recurring,
+        "frequency": task.frequency,
+        "parent_task_id": task.parent_task_id,
+        "start_time": task.start_time.isoformat() if task.start_time else None,
+        "actual_duration_minutes": task.actual_duration_minutes,
+        "finish_time": finish_time.isoformat()
+    }
+    
+    # For now, we'll skip the register entry creation since those models need to be updated
+    # In a complete implementation, you would also create RegisterEntry if required
+    
+    return {"message": "Task completed", "task": task_dict, "requires_signature": False}
+
+@router.get("/{task_id}/details")
+async def get_task_details(task_id: int, user: Dict[str, Any] = Depends(get_user_from_token), db: Session = Depends(get_db)):
+    """Get detailed task information including procedure details"""
+    # Find task from database
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # Get employee info
+    employee = db.query(Employee).filter(Employee.id == task.empleado_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Convert task to dict format
+    task_dict = {
+        "id": task.id,
+        "titulo": task.titulo,
+        "descripcion": task.descripcion,
+        "empleado_id": task.empleado_id,
+        "empleado": employee.nombre,
+        "fecha": task.fecha,
+        "estado": task.estado,
+        "prioridad": task.prioridad,
+        "is_recurring": task.is_recurring,
+        "frequency": task.frequency,
+        "parent_task_id": task.parent_task_id,
+        "start_time": task.start_time.isoformat() if task.start_time else None,
+        "actual_duration_minutes": task.actual_duration_minutes,
+        "register_id": task.register_id,
+        "procedure_id": task.procedure_id,
+        "requires_signature": task.requires_signature
+    }
+    
+    # Get procedure and register details from database if available
+    procedure_data = None
+    register_data = None
+    
+    if task.procedure_id:
+        from app.models import Procedure, Register
+        procedure = db.query(Procedure).filter(Procedure.id == task.procedure_id).first()
+        if procedure:
+            # Build procedure data from database
+            procedure_data = {
+                "id": procedure.id,
+                "nombre": procedure.titulo,
+                "descripcion": procedure.descripcion
+            }
+            
+            # Add contenido fields if available
+            if procedure.contenido:
+                contenido = procedure.contenido if isinstance(procedure.contenido, dict) else {}
+                procedure_data["tiempo_estimado"] = contenido.get("tiempo_estimado", "No especificado")
+                procedure_data["procedimiento"] = contenido.get("procedimiento", [])
+                procedure_data["precauciones"] = contenido.get("precauciones", [])
+                procedure_data["receta"] = contenido.get("receta", {})
+    
+    if task.register_id:
+        from app.models import Register
+        register = db.query(Register).filter(Register.id == task.register_id).first()
+        if register:
+            register_data = {
+                "id": register.id,
+                "nombre": register.nombre,
+                "descripcion": register.descripcion
+            }
+    
+    return {
+        "task": task_dict,
+        "procedure": procedure_data,
+        "register": register_data
+    }
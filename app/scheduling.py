@@ -0,0 +1,161 @@
+"""
+Recurring task generation and schedule conflict handling
+"""
+import calendar
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.inbox_events import inbox_hub
+from app.metrics import recurring_generation_job
+from app.models import Employee, ManagerInboxNotification, RecurringTask, Schedule, Task
+
+def calculate_next_date(current_date: date, frequency: str) -> date:
+    """Calculate the next occurrence date based on frequency"""
+    if frequency == "daily":
+        return current_date + timedelta(days=1)
+    if frequency == "weekly":
+        return current_date + timedelta(weeks=1)
+    if frequency == "monthly":
+        # Handle month-end edge cases (e.g., Jan 31 -> Feb 28)
+        year = current_date.year + (1 if current_date.month == 12 else 0)
+        month = 1 if current_date.month == 12 else current_date.month + 1
+        last_day = calendar.monthrange(year, month)[1]
+        return date(year, month, min(current_date.day, last_day))
+    return current_date
+
+def is_employee_working(empleado_id: int, fecha: date, db: Session = None) -> bool:
+    """Check if employee is scheduled to work on a specific date"""
+    if db is None:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        should_close = True
+    else:
+        should_close = False
+    
+    try:
+        schedule = db.query(Schedule).filter(
+            Schedule.empleado_id == empleado_id,
+            Schedule.fecha == fecha
+        ).first()
+        return schedule is not None
+    finally:
+        if should_close:
+            db.close()
+
+def create_conflict_notification(task_data: dict, conflict_type: str, db: Session = None):
+    """Create a conflict notification for managers"""
+    if db is None:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        should_close = True
+    else:
+        should_close = False
+    
+    try:
+        # Get employee name
+        employee = db.query(Employee).filter(Employee.id == task_data["empleado_id"]).first()
+        empleado_name = employee.nombre if employee else f"Empleado {task_data['empleado_id']}"
+        
+        # Create notification
+        notification = ManagerInboxNotification(
+            type=conflict_type,
+            title="Conflicto de Programación",
+            description=f"No se puede asignar tarea '{task_data['titulo']}' a {empleado_name} el {task_data['fecha']} - no está programado para trabajar",
+            status="pending",
+            data={
+                "task_data": task_data,
+                "empleado_id": task_data["empleado_id"],
+                "empleado_name": empleado_name,
+                "fecha": task_data["fecha"]
+            }
+        )
+        
+        db.add(notification)
+        db.commit()
+        db.refresh(notification)
+        
+        notification_dict = {
+            "id": notification.id,
+            "type": notification.type,
+            "title": notification.title,
+            "description": notification.description,
+            "status": notification.status,
+            "data": notification.data,
+            "created_at": notification.created_at.isoformat() if notification.created_at else None
+        }
+        
+        # Push the new conflict to connected managers
+        inbox_hub.publish("notification.created", notification_dict)
+        
+        return notification_dict
+    finally:
+        if should_close:
+            db.close()
+
+@recurring_generation_job.timed
+def generate_recurring_tasks(db: Session = None):
+    """Generate new instances of recurring tasks that are due"""
+    if db is None:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        should_close = True
+    else:
+        should_close = False
+    
+    try:
+        today = date.today()
+        
+        # Get all active recurring tasks
+        recurring_tasks = db.query(RecurringTask).filter(RecurringTask.activo == True).all()
+        
+        for recurring_task in recurring_tasks:
+            # Calculate next generation date if not set
+            if recurring_task.last_generated is None:
+                last_generated = today
+            else:
+                last_generated = recurring_task.last_generated.date()
+            
+            next_generation_date = calculate_next_date(last_generated, str(recurring_task.frequency))
+            
+            # Check if it's time to generate next instance
+            if next_generation_date <= today:
+                # Check if employee is working on that date
+                if is_employee_working(int(recurring_task.empleado_id), next_generation_date, db):
+                    # Create new task instance
+                    new_task = Task(
+                        titulo=recurring_task.titulo,
+                        descripcion=recurring_task.descripcion,
+                        empleado_id=recurring_task.empleado_id,
+                        fecha=next_generation_date,
+                        estado="pendiente",
+                        prioridad=recurring_task.prioridad,
+                        is_recurring=False,
+                        frequency=None,
+                        parent_task_id=recurring_task.id
+                    )
+                    
+                    db.add(new_task)
+                    
+                    # Update last generated date for recurring task
+                    recurring_task.last_generated = datetime.now()
+                else:
+                    # Create conflict notification for recurring task
+                    conflict_data = {
+                        "titulo": recurring_task.titulo,
+                        "descripcion": recurring_task.descripcion,
+                        "empleado_id": recurring_task.empleado_id,
+                        "fecha": next_generation_date.isoformat(),
+                        "prioridad": recurring_task.prioridad,
+                        "frequency": recurring_task.frequency
+                    }
+                    create_conflict_notification(conflict_data, "recurring_conflict", db)
+                    
+                    # Update to next possible date
+                    recurring_task.last_generated = datetime.now()
+        
+        db.commit()
+        
+    finally:
+        if should_close:
+            db.close()
@@ -0,0 +1,316 @@
+"""
+Full-text search over tasks, task definitions, procedures and register entry observations
+
+On Postgres each searched table has a generated `search_vector` tsvector column (Spanish
+configuration, GIN index) that is kept up to date by the database; titles weigh more than
+descriptions. Other databases (the embedded SQLite mode) use an in-process inverted index,
+built from the tables on the first search and updated from ORM commits afterwards.
+"""
+import math
+import re
+import threading
+import unicodedata
+import weakref
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Procedure, RegisterEntry, Task, TaskDefinition
+
+SEARCH_TYPES = ("task", "task_definition", "procedure", "register_entry")
+MODELS = {"task": Task, "task_definition": TaskDefinition, "procedure": Procedure, "register_entry": RegisterEntry}
+TYPE_OF_MODEL = {model: kind for kind, model in MODELS.items()}
+
+# Generated tsvector per table; weights A (title) > B (description) > C (procedure steps)
+POSTGRES_SEARCH_VECTORS = {
+    "tasks": "setweight(to_tsvector('spanish'::regconfig, coalesce(titulo, '')), 'A') || "
+             "setweight(to_tsvector('spanish'::regconfig, coalesce(descripcion, '')), 'B')",
+    "task_definitions": "setweight(to_tsvector('spanish'::regconfig, coalesce(titulo, '')), 'A') || "
+                        "setweight(to_tsvector('spanish'::regconfig, coalesce(descripcion, '')), 'B')",
+    "procedures": "setweight(to_tsvector('spanish'::regconfig, coalesce(titulo, '')), 'A') || "
+                  "setweight(to_tsvector('spanish'::regconfig, coalesce(descripcion, '')), 'B') || "
+                  "setweight(to_tsvector('spanish'::regconfig, coalesce((contenido -> 'procedimiento')::text, '') || ' ' || "
+                  "coalesce((contenido -> 'precauciones')::text, '')), 'C')",
+    "register_entries": "setweight(to_tsvector('spanish'::regconfig, coalesce(observaciones, '')), 'B')",
+}
+POSTGRES_TABLES = {"task": "tasks", "task_definition": "task_definitions", "procedure": "procedures", "register_entry": "register_entries"}
+
+# Fallback index: Spanish stop words and field weights mirroring the tsvector weights
+STOP_WORDS = frozenset("""
+a al algo ante antes como con contra cual cuando de del desde donde durante e el ella ellas ellos en entre era es esa
+ese eso esta este esto estos fue ha hay la las le les lo los mas me mi muy nada ni no nos o os otra otro para pero
+poco por porque que quien se sea segun ser si sin sino sobre son su sus tambien tan te tiene todo tras tu un una uno
+unos y ya
+""".split())
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2}
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(value: str) -> str:
+    """Lowercase and strip accents, so "revisión" matches "revision" """
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """Light Spanish stemming: plural and final gender/number vowel (aceites, aceite -> aceit)"""
+    if len(word) > 3 and word.endswith("s"):
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [stem(word) for word in _WORD.findall(normalize(value)) if word not in STOP_WORDS]
+
+
+def _steps(procedure: Procedure) -> str:
+    contenido = procedure.contenido or {}
+    return " ".join(str(step) for key in ("procedimiento", "precauciones") for step in contenido.get(key) or [])
+
+
+def document_fields(obj) -> List[Tuple[str, str]]:
+    """(weight, text) pairs indexed for a searchable row"""
+    if isinstance(obj, (Task, TaskDefinition)):
+        return [("A", obj.titulo), ("B", obj.descripcion)]
+    if isinstance(obj, Procedure):
+        return [("A", obj.titulo), ("B", obj.descripcion), ("C", _steps(obj))]
+    return [("B", obj.observaciones)]
+
+
+def _owner(obj) -> Optional[int]:
+    # Only tasks are limited to their owner without tasks.view_all
+    return obj.empleado_id if isinstance(obj, Task) else None
+
+
+@dataclass
+class _Document:
+    length: float
+    owner: Optional[int]
+
+
+class InvertedIndex:
+    """term -> {(type, id): weighted term frequency}, with BM25 ranking"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[Tuple[str, int], float]] = defaultdict(dict)
+        self.documents: Dict[Tuple[str, int], _Document] = {}
+        self.terms: Dict[Tuple[str, int], List[str]] = {}
+        self.total_length = 0.0
+        self.built = False
+        self.lock = threading.Lock()
+
+    def _remove(self, key: Tuple[str, int]):
+        for term in self.terms.pop(key, []):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+        document = self.documents.pop(key, None)
+        if document is not None:
+            self.total_length -= document.length
+
+    def _add(self, key: Tuple[str, int], fields: Iterable[Tuple[str, str]], owner: Optional[int]):
+        frequencies: Counter = Counter()
+        for weight, value in fields:
+            for term in tokenize(value):
+                frequencies[term] += WEIGHTS[weight]
+        if not frequencies:
+            return
+        for term, frequency in frequencies.items():
+            self.postings[term][key] = frequency
+        self.terms[key] = list(frequencies)
+        self.documents[key] = _Document(length=sum(frequencies.values()), owner=owner)
+        self.total_length += self.documents[key].length
+
+    def apply(self, changes: Sequence[Tuple[str, int, Optional[List[Tuple[str, str]]], Optional[int]]]):
+        """Replace or (fields None) remove documents"""
+        with self.lock:
+            for kind, row_id, fields, owner in changes:
+                self._remove((kind, row_id))
+                if fields is not None:
+                    self._add((kind, row_id), fields, owner)
+
+    def build(self, db: Session):
+        with self.lock:
+            if self.built:
+                return
+            for kind, model in MODELS.items():
+                for obj in db.query(model).yield_per(1000):
+                    self._add((kind, obj.id), document_fields(obj), _owner(obj))
+            self.built = True
+
+    def search(self, query: str, types: Sequence[str], owner: Optional[int]) -> List[Tuple[str, int, float]]:
+        """Documents containing every query term, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self.lock:
+            postings = [self.postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+            count = len(self.documents)
+            average_length = self.total_length / count
+            candidates = set(min(postings, key=len))
+            for term_postings in postings:
+                candidates &= term_postings.keys()
+
+            hits = []
+            for key in candidates:
+                kind, row_id = key
+                document = self.documents[key]
+                if kind not in types or (owner is not None and kind == "task" and document.owner != owner):
+                    continue
+                score = 0.0
+                for term_postings in postings:
+                    frequency = term_postings[key]
+                    idf = math.log(1 + (count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                    score += idf * frequency * 2.2 / (frequency + 1.2 * (0.25 + 0.75 * document.length / average_length))
+                hits.append((kind, row_id, score))
+        hits.sort(key=lambda hit: (-hit[2], hit[0], hit[1]))
+        return hits
+
+
+# Engine -> fallback index; one per database in this process
+_indexes: "weakref.WeakKeyDictionary[Engine, InvertedIndex]" = weakref.WeakKeyDictionary()
+_PENDING = "search_index_changes"
+
+
+def _index_for(engine: Engine) -> InvertedIndex:
+    index = _indexes.get(engine)
+    if index is None:
+        index = _indexes.setdefault(engine, InvertedIndex())
+    return index
+
+
+def _collect_changes(session: Session, flush_context):
+    changes = session.info.setdefault(_PENDING, [])
+    for obj in list(session.new) + list(session.dirty):
+        kind = TYPE_OF_MODEL.get(type(obj))
+        if kind:
+            changes.append((kind, obj.id, document_fields(obj), _owner(obj)))
+    for obj in session.deleted:
+        kind = TYPE_OF_MODEL.get(type(obj))
+        if kind:
+            changes.append((kind, obj.id, None, None))
+
+
+def _apply_changes(session: Session):
+    changes = session.info.pop(_PENDING, None)
+    if not changes:
+        return
+    index = _indexes.get(session.get_bind())
+    # Not built yet: the first search reads the committed rows anyway
+    if index is not None and index.built:
+        index.apply(changes)
+
+
+def _discard_changes(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+def forget(engine: Engine, kind: str, row_ids: Iterable[int]):
+    """Drop rows removed outside the ORM (archived register entries) from the fallback index"""
+    index = _indexes.get(engine)
+    if index is not None and index.built:
+        index.apply([(kind, row_id, None, None) for row_id in row_ids])
+
+
+def install_search_index_hooks():
+    """Keep the fallback indexes in step with ORM commits; safe to call more than once"""
+    if not event.contains(Session, "after_flush", _collect_changes):
+        event.listen(Session, "after_flush", _collect_changes)
+        event.listen(Session, "after_commit", _apply_changes)
+        event.listen(Session, "after_rollback", _discard_changes)
+
+
+def install_search_columns(engine: Engine):
+    """Add the generated tsvector columns and GIN indexes on Postgres (also done by migration 0005)"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table, expression in POSTGRES_SEARCH_VECTORS.items():
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({expression}) STORED"
+            ))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)"))
+
+
+def _postgres_search(db: Session, query: str, types: Sequence[str], owner: Optional[int], limit: int, offset: int):
+    selects = []
+    for kind in types:
+        owner_clause = " AND empleado_id = :owner" if kind == "task" and owner is not None else ""
+        selects.append(
+            f"SELECT '{kind}' AS kind, id, ts_rank_cd(search_vector, tsq.query, 32) AS rank "
+            f"FROM {POSTGRES_TABLES[kind]}, tsq WHERE search_vector @@ tsq.query{owner_clause}"
+        )
+    statement = text(
+        "WITH tsq AS (SELECT websearch_to_tsquery('spanish', :q) AS query) "
+        f"SELECT kind, id, rank, count(*) OVER () AS total FROM ({' UNION ALL '.join(selects)}) hits "
+        "ORDER BY rank DESC, kind, id LIMIT :limit OFFSET :offset"
+    )
+    rows = db.execute(statement, {"q": query, "owner": owner, "limit": limit, "offset": offset}).all()
+    if rows or not offset:
+        return [(row.kind, row.id, float(row.rank)) for row in rows], rows[0].total if rows else 0
+
+    # Past the last page: count separately so the client still learns the total
+    total = db.execute(text(
+        f"WITH tsq AS (SELECT websearch_to_tsquery('spanish', :q) AS query) SELECT count(*) FROM ({' UNION ALL '.join(selects)}) hits"
+    ), {"q": query, "owner": owner}).scalar()
+    return [], total
+
+
+def search(db: Session, query: str, types: Sequence[str], owner: Optional[int], limit: int, offset: int):
+    """One page of (type, id, rank) hits and the total; `owner` limits tasks to that employee"""
+    if not types:
+        return [], 0
+    engine = db.get_bind()
+    if engine.dialect.name == "postgresql":
+        return _postgres_search(db, query, types, owner, limit, offset)
+
+    index = _index_for(engine)
+    if not index.built:
+        index.build(db)
+    hits = index.search(query, types, owner)
+    return hits[offset:offset + limit], len(hits)
+
+
+def snippet(obj, query: str, width: int = 160) -> str:
+    """The indexed text around the first query term, for display"""
+    terms = set(tokenize(query))
+    fields = [value for _, value in document_fields(obj) if value]
+    for value in fields:
+        words = _WORD.findall(value)
+        for word in words:
+            if stem(normalize(word)) in terms:
+                position = max(0, value.find(word) - width // 3)
+                excerpt = value[position:position + width]
+                return ("…" if position else "") + excerpt + ("…" if position + width < len(value) else "")
+    return fields[0][:width] if fields else ""
+
+
+def load_hits(db: Session, hits: Sequence[Tuple[str, int, float]]) -> Dict[Tuple[str, int], object]:
+    """Fetch the rows of one page of hits, one query per type"""
+    ids: Dict[str, List[int]] = defaultdict(list)
+    for kind, row_id, _ in hits:
+        ids[kind].append(row_id)
+
+    rows = {}
+    for kind, row_ids in ids.items():
+        model = MODELS[kind]
+        query = db.query(model)
+        if model is RegisterEntry:
+            query = query.options(joinedload(RegisterEntry.register))
+        elif model is Procedure:
+            query = query.options(joinedload(Procedure.register))
+        for obj in query.filter(model.id.in_(row_ids)).all():
+            rows[(kind, obj.id)] = obj
+    return rows
@@ -0,0 +1,123 @@
+"""
+Schema creation and default data for new databases; run with `python -m app.cli init-db`
+"""
+from datetime import date
+
+from app import database
+from app.models import Base, Employee, Permission, Role, Schedule, ShiftDefinition, Task
+from app.search import install_search_columns
+from app.shifts import DEFAULT_SHIFTS, backfill_schedule_shifts
+
+
+def create_schema(bind=None):
+    """Create missing tables; existing databases are upgraded with Alembic instead"""
+    bind = bind or database.engine
+    Base.metadata.create_all(bind=bind)
+    # Generated full-text columns are not part of the models (Postgres only)
+    install_search_columns(bind)
+
+
+def init_database(session_factory=None):
+    """Initialize database with default data"""
+    db = (session_factory or database.SessionLocal)()
+    
+    # Initialize permissions if not exist
+    if not db.query(Permission).first():
+        default_permissions = [
+            Permission(id="schedules.view", name="Ver Horarios", description="Puede ver los horarios de trabajo", category="schedules"),
+            Permission(id="schedules.create", name="Crear Horarios", description="Puede crear nuevos horarios", category="schedules"),
+            Permission(id="schedules.edit", name="Editar Horarios", description="Puede modificar horarios existentes", category="schedules"),
+            Permission(id="schedules.delete", name="Eliminar Horarios", description="Puede eliminar horarios", category="schedules"),
+            Permission(id="tasks.view", name="Ver Tareas", description="Puede ver sus tareas asignadas", category="tasks"),
+            Permission(id="tasks.view_all", name="Ver Todas las Tareas", description="Puede ver todas las tareas del sistema", category="tasks"),
+            Permission(id="tasks.create", name="Crear Tareas", description="Puede crear nuevas tareas", category="tasks"),
+            Permission(id="tasks.edit", name="Editar Tareas", description="Puede modificar tareas existentes", category="tasks"),
+            Permission(id="tasks.delete", name="Eliminar Tareas", description="Puede eliminar tareas", category="tasks"),
+            Permission(id="tasks.assign", name="Asignar Tareas", description="Puede asignar tareas a empleados", category="tasks"),
+            Permission(id="employees.view", name="Ver Empleados", description="Puede ver la lista de empleados", category="employees"),
+            Permission(id="employees.create", name="Crear Empleados", description="Puede agregar nuevos empleados", category="employees"),
+            Permission(id="employees.edit", name="Editar Empleados", description="Puede modificar información de empleados", category="employees"),
+            Permission(id="employees.deactivate", name="Desactivar Empleados", description="Puede desactivar empleados", category="employees"),
+            Permission(id="registers.view", name="Ver Registros", description="Puede ver registros de procedimientos", category="registers"),
+            Permission(id="registers.create", name="Crear Registros", description="Puede crear nuevos registros", category="registers"),
+            Permission(id="registers.edit", name="Editar Registros", description="Puede modificar registros existentes", category="registers"),
+            Permission(id="registers.delete", name="Eliminar Registros", description="Puede eliminar registros", category="registers"),
+            Permission(id="registers.fill", name="Llenar Registros", description="Puede completar entradas de registro", category="registers"),
+            Permission(id="system.manage_roles", name="Gestionar Roles", description="Puede crear y modificar roles del sistema", category="system"),
+            Permission(id="system.manage_permissions", name="Gestionar Permisos", description="Puede asignar permisos a roles", category="system"),
+            Permission(id="system.view_reports", name="Ver Reportes", description="Puede ver reportes y estadísticas", category="system"),
+            Permission(id="system.export_data", name="Exportar Datos", description="Puede exportar datos del sistema", category="system")
+        ]
+        
+        for perm in default_permissions:
+            db.add(perm)
+    
+    # Initialize roles if not exist
+    if not db.query(Role).first():
+        default_roles = [
+            Role(id="admin", name="Administrador", description="Acceso completo al sistema", 
+                 permissions=["schedules.view", "schedules.create", "schedules.edit", "schedules.delete", 
+                             "tasks.view", "tasks.view_all", "tasks.create", "tasks.edit", "tasks.delete", "tasks.assign",
+                             "employees.view", "employees.create", "employees.edit", "employees.deactivate",
+                             "registers.view", "registers.create", "registers.edit", "registers.delete", "registers.fill",
+                             "system.manage_roles", "system.manage_permissions", "system.view_reports", "system.export_data"]),
+            Role(id="encargado", name="Encargado", description="Acceso de gestión y supervisión",
+                 permissions=["schedules.view", "schedules.create", "schedules.edit",
+                             "tasks.view", "tasks.view_all", "tasks.create", "tasks.edit", "tasks.assign",
+                             "employees.view", "employees.edit",
+                             "registers.view", "registers.create", "registers.edit", "registers.fill",
+                             "system.view_reports"]),
+            Role(id="trabajador", name="Trabajador", description="Acceso básico para empleados",
+                 permissions=["schedules.view", "tasks.view", "registers.fill"])
+        ]
+        
+        for role in default_roles:
+            db.add(role)
+    
+    # Initialize employees if not exist
+    if not db.query(Employee).first():
+        default_employees = [
+            Employee(id=1, nombre="Juan Pérez", email="juan@example.com", role="trabajador", telefono="+34 123 456 789", activo=True, password="1234"),
+            Employee(id=2, nombre="María García", email="maria@example.com", role="trabajador", telefono="+34 123 456 790", activo=True, password="1234"),
+            Employee(id=3, nombre="Carlos López", email="carlos@example.com", role="trabajador", telefono="+34 123 456 791", activo=True, password="1234"),
+            Employee(id=4, nombre="Ana Martínez", email="ana@example.com", role="encargado", telefono="+34 123 456 792", activo=True, password="1234"),
+            Employee(id=5, nombre="Pedro Sánchez", email="pedro@example.com", role="trabajador", telefono="+34 123 456 793", activo=True, password="1234")
+        ]
+        
+        for emp in default_employees:
+            db.add(emp)
+    
+    # Initialize shift definitions if not exist
+    if not db.query(ShiftDefinition).first():
+        for shift in DEFAULT_SHIFTS:
+            db.add(ShiftDefinition(**shift))
+        db.flush()
+    
+    # Initialize schedules if not exist
+    if not db.query(Schedule).first():
+        default_schedules = [
+            Schedule(id=1, fecha=date.fromisoformat("2025-09-08"), turno="Mañana (08:00-16:00)", empleado_id=1),
+            Schedule(id=2, fecha=date.fromisoformat("2025-09-08"), turno="Tarde (16:00-00:00)", empleado_id=2),
+            Schedule(id=3, fecha=date.fromisoformat("2025-09-09"), turno="Noche (00:00-08:00)", empleado_id=3)
+        ]
+        
+        for sched in default_schedules:
+            db.add(sched)
+    
+    # Initialize tasks if not exist
+    if not db.query(Task).first():
+        default_tasks = [
+            Task(id=1, titulo="Revisar inventario", descripcion="Contar y verificar productos en almacén", empleado_id=1, fecha=date.fromisoformat("2025-09-08"), estado="pendiente", prioridad="media"),
+            Task(id=2, titulo="Limpiar área de trabajo", descripcion="Mantener limpieza en zona de producción", empleado_id=2, fecha=date.fromisoformat("2025-09-08"), estado="en_progreso", prioridad="baja"),
+            Task(id=3, titulo="Revisar maquinaria", descripcion="Inspección rutinaria de equipos", empleado_id=1, fecha=date.fromisoformat("2025-09-09"), estado="pendiente", prioridad="alta")
+        ]
+        
+        for task in default_tasks:
+            db.add(task)
+    
+    # Link schedules created from free-text turno labels to shift definitions
+    db.flush()
+    backfill_schedule_shifts(db)
+    
+    db.commit()
+    db.close()
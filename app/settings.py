@@ -0,0 +1,56 @@
+"""
+Application settings for create_app, read from the environment by default
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str
+    app_env: str = "development"
+    # SQLAlchemy statement logging; slows every query, so turn it off outside development
+    sql_echo: bool = True
+    # Create missing tables and default data on startup; defaults to on in development only
+    db_auto_init: Optional[bool] = None
+    inbox_pg_bridge: bool = False
+    # Seconds between recurring task generation runs; 0 disables the scheduler
+    recurring_generation_interval: int = 0
+    # Seconds between register entry archival runs (app/archive.py); 0 disables it
+    register_archive_interval: int = 0
+    metrics_token: Optional[str] = None
+    cors_origins: Tuple[str, ...] = ("*",)
+    # Router names from app.factory.ROUTER_MODULES to register; None registers all of them
+    routers: Optional[Tuple[str, ...]] = None
+    # Directory holding the React build; None skips the static mount and SPA fallback
+    frontend_dir: Optional[str] = "build"
+
+    def __post_init__(self):
+        if self.db_auto_init is None:
+            object.__setattr__(self, "db_auto_init", self.app_env == "development")
+
+    @classmethod
+    def from_env(cls, **overrides) -> "Settings":
+        """Settings from environment variables; keyword arguments take precedence"""
+        values = {
+            # SQLITE_PATH runs the embedded SQLite mode without spelling out a URL
+            "database_url": os.environ.get("DATABASE_URL") or (
+                f"sqlite:///{os.environ['SQLITE_PATH']}" if os.environ.get("SQLITE_PATH") else None
+            ),
+            "app_env": os.environ.get("APP_ENV", "development").lower(),
+            "sql_echo": _flag("SQL_ECHO", "1"),
+            "db_auto_init": _flag("DB_AUTO_INIT", "1") if "DB_AUTO_INIT" in os.environ else None,
+            "inbox_pg_bridge": _flag("INBOX_PG_BRIDGE", "0"),
+            "recurring_generation_interval": int(os.environ.get("RECURRING_GENERATION_INTERVAL", "0")),
+            "register_archive_interval": int(os.environ.get("REGISTER_ARCHIVE_INTERVAL", "0")),
+            "metrics_token": os.environ.get("METRICS_TOKEN") or None,
+        }
+        values.update(overrides)
+        if not values["database_url"]:
+            raise ValueError("DATABASE_URL (or SQLITE_PATH for the embedded SQLite mode) environment variable is required")
+        return cls(**values)
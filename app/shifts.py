@@ -0,0 +1,85 @@
+"""
+Shift definitions: parsing legacy turno labels and computing concrete shift intervals
+"""
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import ShiftDefinition, Schedule
+
+# Matches labels such as "Mañana (08:00-16:00)"; the name part is optional
+SHIFT_LABEL_PATTERN = re.compile(r"^\s*(?P<nombre>[^(]*?)\s*\(?\s*(?P<start>\d{1,2}:\d{2})\s*-\s*(?P<end>\d{1,2}:\d{2})\s*\)?\s*$")
+
+DEFAULT_SHIFTS = [
+    {"nombre": "Mañana", "start_time": time(8, 0), "end_time": time(16, 0), "orden": 1},
+    {"nombre": "Tarde", "start_time": time(16, 0), "end_time": time(0, 0), "orden": 2},
+    {"nombre": "Noche", "start_time": time(0, 0), "end_time": time(8, 0), "orden": 3},
+]
+
+
+def parse_time(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours) % 24, int(minutes))
+
+
+def parse_shift_label(turno: str) -> Optional[Tuple[str, time, time]]:
+    """Split a legacy turno string into (nombre, start_time, end_time); None if it has no time window"""
+    match = SHIFT_LABEL_PATTERN.match(turno or "")
+    if not match:
+        return None
+    nombre = match.group("nombre") or f"{match.group('start')}-{match.group('end')}"
+    return nombre, parse_time(match.group("start")), parse_time(match.group("end"))
+
+
+def format_shift_label(shift: ShiftDefinition) -> str:
+    return f"{shift.nombre} ({shift.start_time.strftime('%H:%M')}-{shift.end_time.strftime('%H:%M')})"
+
+
+def shift_window(fecha: date, shift: ShiftDefinition) -> Tuple[datetime, datetime]:
+    """Concrete (start_at, end_at) for a shift on a date; overnight shifts end on the next day"""
+    start_at = datetime.combine(fecha, shift.start_time)
+    end_at = datetime.combine(fecha, shift.end_time)
+    if end_at <= start_at:
+        end_at += timedelta(days=1)
+    return start_at, end_at
+
+
+def get_or_create_shift(db: Session, turno: str) -> Optional[ShiftDefinition]:
+    """Find the shift definition matching a turno label, creating it for unseen time windows"""
+    parsed = parse_shift_label(turno)
+    if parsed is None:
+        return db.query(ShiftDefinition).filter(ShiftDefinition.nombre == (turno or "").strip()).first()
+
+    nombre, start_time, end_time = parsed
+    shift = db.query(ShiftDefinition).filter(
+        ShiftDefinition.nombre == nombre,
+        ShiftDefinition.start_time == start_time,
+        ShiftDefinition.end_time == end_time
+    ).first()
+    if shift is None:
+        shift = ShiftDefinition(nombre=nombre, start_time=start_time, end_time=end_time)
+        db.add(shift)
+        db.flush()
+    return shift
+
+
+def apply_shift(schedule: Schedule, shift: ShiftDefinition):
+    """Point a schedule at a shift definition and fill its denormalized interval columns"""
+    schedule.shift_definition_id = shift.id
+    schedule.turno = format_shift_label(shift)
+    schedule.start_at, schedule.end_at = shift_window(schedule.fecha, shift)
+
+
+def backfill_schedule_shifts(db: Session) -> int:
+    """Link schedules still carrying only a free-text turno to shift definitions"""
+    pending = db.query(Schedule).filter(Schedule.shift_definition_id == None).all()
+    updated = 0
+    for schedule in pending:
+        shift = get_or_create_shift(db, schedule.turno)
+        if shift is None:
+            continue
+        apply_shift(schedule, shift)
+        updated += 1
+    return updated
@@ -0,0 +1,105 @@
+"""
+Embedded SQLite mode for single-node sites: connection pragmas and a per-process single-writer queue
+
+SQLite allows one writer at a time. Instead of letting concurrent requests race for the file
+lock (and fail with "database is locked" once busy_timeout runs out), every session that is
+about to write waits for the engine's writer lock before its first INSERT/UPDATE/DELETE and
+holds it until its transaction ends. Readers never wait: with WAL they see the last commit.
+"""
+import os
+import threading
+import weakref
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import URL
+from sqlalchemy.orm import Session
+
+# Safe with WAL: a power cut can lose the last transactions but never corrupts the file
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+# Page cache per connection, in KiB
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "65536"))
+# Bytes of the file read through mmap; 0 disables it
+SQLITE_MMAP_SIZE_BYTES = int(os.environ.get("SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024)))
+# Covers writers in other processes (CLI, migrations) that bypass the in-process queue
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.environ.get("SQLITE_BUSY_TIMEOUT_SECONDS", "30"))
+# How long a session waits in the writer queue before giving up
+SQLITE_WRITE_TIMEOUT_SECONDS = float(os.environ.get("SQLITE_WRITE_TIMEOUT_SECONDS", "30"))
+
+if SQLITE_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise ValueError(f"SQLITE_SYNCHRONOUS must be OFF, NORMAL, FULL or EXTRA, not {SQLITE_SYNCHRONOUS!r}")
+
+# Engine -> lock; an engine from create_sqlite_engine is the only writer gate for its file in this process
+_writer_locks: "weakref.WeakKeyDictionary[Engine, threading.Lock]" = weakref.WeakKeyDictionary()
+_HELD = "sqlite_writer_lock"
+
+
+class WriterQueueTimeout(TimeoutError):
+    """A session waited longer than SQLITE_WRITE_TIMEOUT_SECONDS for the SQLite writer lock"""
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_BYTES}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_SECONDS * 1000)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        # Postgres enforces foreign keys; keep the same behaviour here
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(url: URL, echo: bool = True) -> Engine:
+    """Engine for an embedded SQLite file with tuned pragmas and a writer queue"""
+    engine = create_engine(
+        url,
+        echo=echo,
+        # Sessions move between the event loop and the threadpool; the writer queue serializes writes
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_SECONDS},
+    )
+    event.listen(engine, "connect", _set_pragmas)
+    _writer_locks[engine] = threading.Lock()
+    install_writer_queue()
+    return engine
+
+
+def _acquire_writer(session: Session):
+    if _HELD in session.info:
+        return
+    lock = _writer_locks.get(session.get_bind())
+    if lock is None:
+        return
+    if not lock.acquire(timeout=SQLITE_WRITE_TIMEOUT_SECONDS):
+        raise WriterQueueTimeout(f"Waited more than {SQLITE_WRITE_TIMEOUT_SECONDS}s for the SQLite writer lock")
+    session.info[_HELD] = lock
+
+
+def _before_flush(session: Session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        _acquire_writer(session)
+
+
+def _before_bulk_write(orm_execute_state):
+    # query(...).update()/.delete() and session.execute(insert/update/delete) skip the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _acquire_writer(orm_execute_state.session)
+
+
+def _release_writer(session: Session, transaction):
+    if transaction.parent is None:
+        lock = session.info.pop(_HELD, None)
+        if lock is not None:
+            lock.release()
+
+
+def install_writer_queue():
+    """Hook the writer queue into every Session; runs ahead of the other before_flush listeners"""
+    if not event.contains(Session, "before_flush", _before_flush):
+        # insert=True: the delta sync listener writes sync_clock during before_flush
+        event.listen(Session, "before_flush", _before_flush, insert=True)
+        event.listen(Session, "do_orm_execute", _before_bulk_write)
+        event.listen(Session, "after_transaction_end", _release_writer)
@@ -0,0 +1,86 @@
+"""
+Reassignment suggestions for manager inbox conflicts
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.dates import parse_fecha_or_none
+from app.models import Employee, Schedule, Task, TaskAssignment
+
+# Lower rank is preferred when two candidates have the same load
+ROLE_RANK = {"trabajador": 0, "encargado": 1, "admin": 2}
+
+
+class AvailabilityIndex:
+    """Per-day view of who is scheduled and how busy they are, loaded with a fixed number of queries"""
+
+    def __init__(self, db: Session, fechas: Iterable[date]):
+        self.fechas = {fecha for fecha in fechas if fecha}
+        self.employees: Dict[int, Employee] = {}
+        self.shifts_by_day: Dict[date, Dict[int, List[str]]] = defaultdict(lambda: defaultdict(list))
+        self.load_by_day: Dict[date, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+        if self.fechas:
+            self._load(db)
+
+    def _load(self, db: Session):
+        self.employees = {emp.id: emp for emp in db.query(Employee).filter(Employee.activo == True).all()}
+
+        schedules = db.query(Schedule.empleado_id, Schedule.fecha, Schedule.turno).filter(
+            Schedule.fecha.in_(self.fechas)
+        ).all()
+        for empleado_id, fecha, turno in schedules:
+            self.shifts_by_day[fecha][empleado_id].append(turno)
+
+        # Count open work from both the ad hoc tasks and the task assignments
+        for model in (Task, TaskAssignment):
+            counts = db.query(model.empleado_id, model.fecha, func.count(model.id)).filter(
+                model.fecha.in_(self.fechas),
+                model.estado != "completada"
+            ).group_by(model.empleado_id, model.fecha).all()
+            for empleado_id, fecha, count in counts:
+                self.load_by_day[fecha][empleado_id] += count
+
+    def suggest(self, fecha: date, exclude_empleado_id: int = None, preferred_role: str = None, limit: int = 3) -> List[Dict[str, Any]]:
+        """Rank employees scheduled on fecha: preferred role first, then lowest load"""
+        candidates = []
+        for empleado_id, turnos in self.shifts_by_day.get(fecha, {}).items():
+            employee = self.employees.get(empleado_id)
+            if not employee or empleado_id == exclude_empleado_id:
+                continue
+
+            task_load = self.load_by_day.get(fecha, {}).get(empleado_id, 0)
+            role_rank = 0 if employee.role == preferred_role else 1 + ROLE_RANK.get(employee.role, len(ROLE_RANK))
+            candidates.append(((role_rank, task_load, employee.nombre), {
+                "empleado_id": employee.id,
+                "empleado": employee.nombre,
+                "role": employee.role,
+                "turnos": sorted(turnos),
+                "task_load": task_load
+            }))
+
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [suggestion for _, suggestion in candidates[:limit]]
+
+
+def suggest_for_notifications(notifications: List[Any], db: Session, limit: int = 3) -> Dict[int, List[Dict[str, Any]]]:
+    """Compute reassignment suggestions for every notification in one pass"""
+    notification_data = {notif.id: notif.data or {} for notif in notifications}
+    # Notification payloads are JSON, so their dates are ISO strings
+    fechas = {notification_id: parse_fecha_or_none(data.get("fecha")) for notification_id, data in notification_data.items()}
+    index = AvailabilityIndex(db, fechas.values())
+
+    suggestions = {}
+    for notification_id, data in notification_data.items():
+        original = index.employees.get(data.get("empleado_id"))
+        suggestions[notification_id] = index.suggest(
+            fechas[notification_id],
+            exclude_empleado_id=data.get("empleado_id"),
+            preferred_role=original.role if original else "trabajador",
+            limit=limit
+        )
+    return suggestions
@@ -0,0 +1,98 @@
+"""
+Delta sync: monotonic row versions, tombstones for deleted rows, and change queries for GET /sync
+
+Every ORM flush that inserts, updates or deletes a synced row takes the next value of the
+single-row sync_clock table and stamps it on those rows. The clock row stays locked until the
+transaction commits, so versions become visible in commit order and a device that stored
+version V never misses a later commit with a smaller version.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Register, Schedule, SyncClock, SyncTombstone, Task, TaskAssignment
+
+SYNCED_MODELS: Dict[Type, str] = {
+    Task: Task.__tablename__,
+    TaskAssignment: TaskAssignment.__tablename__,
+    Schedule: Schedule.__tablename__,
+    Register: Register.__tablename__,
+}
+
+
+def _next_version(session: Session) -> int:
+    # Core statements on the flush connection; session.execute could trigger another flush
+    conn = session.connection()
+    result = conn.execute(update(SyncClock).where(SyncClock.id == 1).values(version=SyncClock.version + 1))
+    if result.rowcount == 0:
+        conn.execute(insert(SyncClock).values(id=1, version=1, pruned_version=0))
+    return conn.execute(select(SyncClock.version).where(SyncClock.id == 1)).scalar_one()
+
+
+def _previous_owner(obj) -> Optional[int]:
+    """Former empleado_id when this flush reassigns the row, else None"""
+    if not hasattr(obj, "empleado_id"):
+        return None
+    history = inspect(obj).attrs.empleado_id.history
+    if history.deleted and history.deleted[0] != obj.empleado_id:
+        return history.deleted[0]
+    return None
+
+
+def _stamp_versions(session: Session, flush_context, instances):
+    new = [obj for obj in session.new if type(obj) in SYNCED_MODELS]
+    dirty = [obj for obj in session.dirty if type(obj) in SYNCED_MODELS and session.is_modified(obj, include_collections=False)]
+    deleted = [obj for obj in session.deleted if type(obj) in SYNCED_MODELS]
+    if not (new or dirty or deleted):
+        return
+
+    version = _next_version(session)
+    for obj in new + dirty:
+        obj.version = version
+
+    # A reassigned row disappears from its former owner's device
+    for obj in dirty:
+        previous_owner = _previous_owner(obj)
+        if previous_owner is not None:
+            session.add(SyncTombstone(entity=SYNCED_MODELS[type(obj)], row_id=obj.id, empleado_id=previous_owner, version=version))
+
+    for obj in deleted:
+        session.add(SyncTombstone(
+            entity=SYNCED_MODELS[type(obj)], row_id=obj.id, empleado_id=getattr(obj, "empleado_id", None), version=version
+        ))
+
+
+def install_sync_versioning():
+    """Stamp versions on every Session flush; safe to call more than once"""
+    if not event.contains(Session, "before_flush", _stamp_versions):
+        event.listen(Session, "before_flush", _stamp_versions)
+
+
+def read_clock(db: Session) -> SyncClock:
+    clock = db.query(SyncClock).filter(SyncClock.id == 1).first()
+    return clock or SyncClock(id=1, version=0, pruned_version=0)
+
+
+def deleted_ids(db: Session, entity: str, since: int, empleado_id: Optional[int] = None) -> List[int]:
+    """Ids of rows deleted after `since`; limited to one employee's rows when empleado_id is given"""
+    query = db.query(SyncTombstone.row_id).filter(SyncTombstone.entity == entity, SyncTombstone.version > since)
+    if empleado_id is not None:
+        query = query.filter(SyncTombstone.empleado_id == empleado_id)
+    return sorted({row_id for (row_id,) in query.all()})
+
+
+def prune_tombstones(db: Session, older_than_days: int) -> int:
+    """Delete old tombstones; devices that last synced before them must do a full sync"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    pruned_through = db.query(SyncTombstone.version).filter(SyncTombstone.deleted_at < cutoff).order_by(
+        SyncTombstone.version.desc()
+    ).limit(1).scalar()
+    if pruned_through is None:
+        return 0
+
+    count = db.query(SyncTombstone).filter(SyncTombstone.version <= pruned_through).delete(synchronize_session=False)
+    db.execute(update(SyncClock).where(SyncClock.id == 1).values(pruned_version=pruned_through))
+    db.commit()
+    return count
@@ -0,0 +1,81 @@
+"""
+Thumbnail rendering in a process pool, so decoding large photos never holds the event loop or the GIL
+
+Kept free of application imports: pool workers are spawned and import only this module.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+THUMBNAIL_MAX_SIDE = int(os.environ.get("THUMBNAIL_MAX_SIDE", "320"))
+THUMBNAIL_WORKERS = int(os.environ.get("THUMBNAIL_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class UndecodableImage(ValueError):
+    """The file is not an image Pillow can decode; rendering again will not help"""
+
+
+class ThumbnailPoolError(RuntimeError):
+    """The process pool could not run the render (a worker died or could not start); worth retrying"""
+
+
+def render_thumbnail(path: str, max_side: int = THUMBNAIL_MAX_SIDE) -> Tuple[bytes, int, int]:
+    """JPEG thumbnail of the image at path, upright per its EXIF orientation; also returns the photo's size"""
+    # Pillow ships with reportlab; imported here so the API process does not load it for nothing
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            # JPEG decoders can scale down while decoding, which is far cheaper than resizing afterwards
+            image.draft("RGB", (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.thumbnail((max_side, max_side))
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=80, optimize=True)
+    # UnidentifiedImageError and truncated files are OSErrors; Pillow raises SyntaxError for some corrupt headers
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as error:
+        raise UndecodableImage(f"{type(error).__name__}: {error}")
+    return output.getvalue(), width, height
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs threads (the request threadpool) can copy held locks
+        _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def render_thumbnail_async(path: str, max_side: int = THUMBNAIL_MAX_SIDE) -> Tuple[bytes, int, int]:
+    """render_thumbnail in the pool; raises UndecodableImage from the render, ThumbnailPoolError for pool failures"""
+    global _pool
+    pool = _get_pool()
+    try:
+        # Workers are started on submit, so a failed spawn raises here
+        future = asyncio.get_running_loop().run_in_executor(pool, render_thumbnail, path, max_side)
+    except Exception as error:
+        raise ThumbnailPoolError(f"Could not submit the render: {error}") from error
+    try:
+        return await future
+    except BrokenProcessPool as error:
+        # A worker died (e.g. out of memory on a huge image); start a fresh pool for the next render
+        if _pool is pool:
+            _pool = None
+        raise ThumbnailPoolError("A thumbnail worker died") from error
+
+
+def shutdown_thumbnail_pool():
+    """Stop the workers; a later render starts a new pool"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,143 @@
+"""
+Stateless HMAC-signed access tokens with a short-lived revocation list
+
+Logout revokes a signed token in this worker's list at once and records it in revoked_tokens;
+every worker loads that table every AUTH_REVOCATION_SYNC_SECONDS, so a logged-out token stops
+working everywhere within that interval without a database lookup per request.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import RevokedToken
+
+# "session" keeps tokens in the in-process session_store; "signed" issues self-contained tokens
+AUTH_TOKEN_MODE = os.environ.get("AUTH_TOKEN_MODE", "session").lower()
+AUTH_TOKEN_SECRET = os.environ.get("AUTH_TOKEN_SECRET", "")
+AUTH_TOKEN_TTL_SECONDS = int(os.environ.get("AUTH_TOKEN_TTL_SECONDS", str(12 * 3600)))
+# How often each worker picks up revocations made by the others
+AUTH_REVOCATION_SYNC_SECONDS = float(os.environ.get("AUTH_REVOCATION_SYNC_SECONDS", "5"))
+
+if AUTH_TOKEN_MODE == "signed" and not AUTH_TOKEN_SECRET:
+    raise ValueError("AUTH_TOKEN_SECRET environment variable is required when AUTH_TOKEN_MODE=signed")
+
+TOKEN_VERSION = "v1"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(message: str) -> str:
+    return _b64encode(hmac.new(AUTH_TOKEN_SECRET.encode("utf-8"), message.encode("ascii"), hashlib.sha256).digest())
+
+
+class RevocationList:
+    """Revoked token ids, each kept only until the token would have expired anyway"""
+
+    def __init__(self):
+        self._revoked: Dict[str, int] = {}  # jti -> exp
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, exp: int):
+        with self._lock:
+            self._revoked[jti] = exp
+            self._prune(int(time.time()))
+
+    def merge(self, revoked: Dict[str, int]):
+        """Add revocations made by other workers"""
+        with self._lock:
+            self._revoked.update(revoked)
+            self._prune(int(time.time()))
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def _prune(self, now: int):
+        for jti, exp in list(self._revoked.items()):
+            if exp <= now:
+                del self._revoked[jti]
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revoked_tokens = RevocationList()
+
+
+def store_revocation(db: Session, jti: str, exp: int):
+    """Record a revocation for the other workers, deleting rows whose tokens have expired"""
+    db.query(RevokedToken).filter(RevokedToken.exp <= int(time.time())).delete(synchronize_session=False)
+    db.merge(RevokedToken(jti=jti, exp=exp))
+    db.commit()
+
+
+def sync_revocations(session_factory, revocations: RevocationList = revoked_tokens):
+    """Load the revocations that are still relevant into this worker's list; blocking, run it in the threadpool"""
+    db = session_factory()
+    try:
+        rows = db.query(RevokedToken.jti, RevokedToken.exp).filter(RevokedToken.exp > int(time.time())).all()
+    finally:
+        db.close()
+    revocations.merge({jti: exp for jti, exp in rows})
+
+
+def signing_enabled() -> bool:
+    return bool(AUTH_TOKEN_SECRET)
+
+
+def issue_token(user_data: Dict[str, Any], ttl_seconds: int = None) -> str:
+    """Encode the user context as v1.<payload>.<signature>"""
+    payload = {
+        "id": user_data["id"],
+        "role": user_data["role"],
+        "email": user_data.get("email"),
+        "nombre": user_data.get("nombre"),
+        "exp": int(time.time()) + (ttl_seconds or AUTH_TOKEN_TTL_SECONDS),
+        "jti": uuid.uuid4().hex
+    }
+    body = _b64encode(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    message = f"{TOKEN_VERSION}.{body}"
+    return f"{message}.{_sign(message)}"
+
+
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """Return the token claims, or None if it is malformed, forged, expired or revoked"""
+    # Tokens are base64url text; anything else cannot be signed or compared
+    if not signing_enabled() or not token or not token.isascii() or token.count(".") != 2:
+        return None
+
+    version, body, signature = token.split(".")
+    if version != TOKEN_VERSION or not hmac.compare_digest(signature, _sign(f"{version}.{body}")):
+        return None
+
+    try:
+        claims = json.loads(_b64decode(body))
+    except ValueError:
+        return None
+
+    if claims.get("exp", 0) <= time.time() or revoked_tokens.is_revoked(claims.get("jti", "")):
+        return None
+    return claims
+
+
+def user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """The same user context shape that login stores in session_store"""
+    return {
+        "id": claims["id"],
+        "email": claims.get("email"),
+        "role": claims["role"],
+        "nombre": claims.get("nombre")
+    }
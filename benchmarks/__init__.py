@@ -0,0 +1,3 @@
+"""
+Benchmark suite for the FastAPI backend (not part of the app)
+"""
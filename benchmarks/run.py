@@ -0,0 +1,267 @@
+"""
+API benchmark suite: seeds a synthetic farm and measures key endpoints through an in-process ASGI client
+
+    python -m benchmarks.run --scale small --output bench.json
+    python -m benchmarks.run --database-url postgresql://localhost/gadi_bench --scale full --compare baseline.json
+
+To compare the embedded SQLite mode with Postgres on the same workload, write a report from
+one and pass it to --compare on the other:
+
+    python -m benchmarks.run --database-url postgresql://localhost/gadi_bench --output postgres.json
+    python -m benchmarks.run --database-url sqlite:////var/lib/gadi/bench.db --compare postgres.json
+
+The database is seeded on first use and reused afterwards. Without --database-url a
+fresh SQLite file is created in a temporary directory for every run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the GADIApp API against a synthetic farm")
+    parser.add_argument("--database-url", help="Database to seed and query (default: temporary SQLite file)")
+    parser.add_argument("--scale", choices=["small", "full"], default="small", help="Size of the synthetic farm")
+    parser.add_argument("--requests", type=int, default=20, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=5, help="Requests in flight per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before each scenario")
+    parser.add_argument("--only", nargs="*", help="Run only these scenarios")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed p50/p95 slowdown in percent before --compare fails")
+    parser.add_argument("--echo", action="store_true", help="Keep SQLAlchemy statement logging on (slows every query)")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace):
+    """Must run before the app modules are imported: several read their configuration at import time"""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gadi-bench-'), 'bench.db')}"
+    # Every request comes from one client address; the login limiter would otherwise dominate
+    os.environ.setdefault("LOGIN_RATE_IP_BURST", "1000000")
+    os.environ.setdefault("LOGIN_RATE_EMAIL_BURST", "1000000")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def measure(client, send: Callable[[Any, int], Any], requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """Fire `requests` calls of send(client, index) with at most `concurrency` in flight"""
+    for index in range(warmup):
+        await send(client, index)
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one(index: int):
+        async with slots:
+            started = time.perf_counter()
+            response = await send(client, index)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "status_counts": statuses,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def build_scenarios(farm: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Callable]:
+    from benchmarks.seed import BENCHMARK_PASSWORD
+
+    emails = farm["employee_emails"]
+    employee_ids = farm["employee_ids"]
+    register_id = farm["register_ids"][0]
+    month_start = (farm["fecha_fin"] - timedelta(days=30)).isoformat()
+    month_end = farm["fecha_fin"].isoformat()
+
+    def login(client, index):
+        return client.post("/auth/login", json={"email": emails[index % len(emails)], "password": BENCHMARK_PASSWORD})
+
+    def tasks_all(client, index):
+        return client.get("/tasks", headers=headers)
+
+    def agenda_employee_month(client, index):
+        # Tasks and task assignments of one employee in a single UNION ALL query
+        return client.get("/agenda", params={
+            "empleado_id": employee_ids[index % len(employee_ids)], "desde": month_start, "hasta": month_end,
+        }, headers=headers)
+
+    def me_today(client, index):
+        # Served from the day cache after the first request
+        return client.get("/me/today", headers=headers)
+
+    def schedules(client, index):
+        return client.get("/schedules", headers=headers)
+
+    def register_entries_month(client, index):
+        return client.get(f"/registers/{register_id}/entries", params={"fecha_inicio": month_start, "fecha_fin": month_end}, headers=headers)
+
+    def register_entries_all(client, index):
+        return client.get(f"/registers/{register_id}/entries", headers=headers)
+
+    def register_entries_custom(client, index):
+        # campos_personalizados lookup: JSON1 json_extract on SQLite, ->> on Postgres
+        return client.get(f"/registers/{register_id}/entries", params={"campo.temperatura.min": 25}, headers=headers)
+
+    def register_entry_create(client, index):
+        # Concurrent writes; on SQLite they go through the single-writer queue
+        return client.post(f"/registers/{register_id}/entries", headers=headers, json={
+            "empleado_id": employee_ids[index % len(employee_ids)],
+            "observaciones": "Benchmark",
+            "campos_personalizados": {"temperatura": 20 + index % 10},
+        })
+
+    def register_pdf(client, index):
+        # One month of a seeded register, read from the database (and archives) like the entry listing
+        return client.get(f"/registers/{register_id}/export/pdf", params={"fecha_inicio": month_start, "fecha_fin": month_end}, headers=headers)
+
+    return {
+        "auth_login": login,
+        "tasks_all": tasks_all,
+        "agenda_employee_month": agenda_employee_month,
+        "me_today": me_today,
+        "schedules": schedules,
+        "register_entries_month": register_entries_month,
+        "register_entries_all": register_entries_all,
+        "register_entries_custom": register_entries_custom,
+        "register_entry_create": register_entry_create,
+        "register_pdf": register_pdf,
+    }
+
+
+async def run_scenarios(app, farm: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+        login = await client.post("/auth/login", json={"email": "admin@example.com", "password": "1234"})
+        login.raise_for_status()
+        headers = {"x-demo-token": login.json()["access_token"]}
+
+        results = {}
+        for name, send in build_scenarios(farm, headers).items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await measure(client, send, args.requests, args.concurrency, args.warmup)
+            print(f"{name:<24} p50 {results[name]['p50_ms']:>9.1f} ms   p95 {results[name]['p95_ms']:>9.1f} ms   "
+                  f"{results[name]['throughput_rps']:>7.1f} req/s   errors {results[name]['errors']}")
+        return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-scenario changes and return the scenarios slower than the threshold"""
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('git_revision') or 'baseline'} (threshold {threshold:.0f}%)")
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"{name:<24} new scenario")
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms"):
+            change = (result[metric] - previous[metric]) / previous[metric] * 100 if previous[metric] else 0.0
+            changes.append(f"{metric[:3]} {change:+6.1f}%")
+            if change > threshold and name not in regressions:
+                regressions.append(name)
+        print(f"{name:<24} {'   '.join(changes)}{'   REGRESSION' if name in regressions else ''}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    configure_environment(args)
+
+    # Imported late so the environment above is in place
+    from app.factory import create_app
+    from app.seed import create_schema, init_database
+    from app.settings import Settings
+    from benchmarks.seed import SCALES, load_seeded, seed_farm
+
+    app = create_app(Settings.from_env(sql_echo=args.echo, frontend_dir=None))
+    engine = app.state.engine
+
+    # The in-process client does not run the lifespan, so prepare the schema explicitly
+    create_schema(engine)
+    init_database(app.state.session_factory)
+    db = app.state.session_factory()
+    try:
+        started = time.perf_counter()
+        farm = load_seeded(db)
+        seeded = farm is None
+        if seeded:
+            print(f"Seeding {args.scale} farm into {engine.url.render_as_string(hide_password=True)} ...")
+            farm = seed_farm(db, **SCALES[args.scale])
+        seed_seconds = round(time.perf_counter() - started, 2)
+    finally:
+        db.close()
+    print(f"Farm ready in {seed_seconds}s: {farm['counts']}")
+
+    results = asyncio.run(run_scenarios(app, farm, args))
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "scale": args.scale,
+            "seeded": seeded,
+            "seed_seconds": seed_seconds,
+            "counts": farm["counts"],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare_reports(report, json.load(handle), args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Synthetic farm data for benchmarks: employees, a year of schedules, tasks and register entries
+"""
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.dates import date_range
+from app.models import (
+    Employee, Register, RegisterEntry, Schedule, ShiftDefinition, Task, TaskAssignment, TaskDefinition
+)
+from app.passwords import hash_password
+from app.shifts import format_shift_label, shift_window
+
+BENCHMARK_PASSWORD = "bench-1234"
+BENCHMARK_EMAIL_DOMAIN = "bench.example.com"
+
+SCALES = {
+    "small": {"employees": 50, "days": 90, "tasks": 5000, "assignments": 5000, "entries": 20000, "registers": 5},
+    "full": {"employees": 300, "days": 365, "tasks": 30000, "assignments": 30000, "entries": 300000, "registers": 10},
+}
+
+TASK_TITLES = ["Riego sector", "Poda", "Recogida", "Limpieza de naves", "Revisión de maquinaria", "Fumigación", "Inventario"]
+ESTADOS = ["pendiente", "en_progreso", "completada"]
+PRIORIDADES = ["alta", "media", "baja"]
+RESULTADOS = ["correcto", "incidencia", "pendiente de revisión"]
+CHUNK_SIZE = 5000
+
+
+def _insert(db: Session, model, rows: List[Dict[str, Any]]):
+    """Bulk insert with executemany in chunks, bypassing the ORM unit of work"""
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.execute(model.__table__.insert(), rows[start:start + CHUNK_SIZE])
+
+
+def seed_farm(db: Session, employees: int, days: int, tasks: int, assignments: int, entries: int, registers: int, seed: int = 42) -> Dict[str, Any]:
+    """Populate the database and return ids and counts the benchmark scenarios need"""
+    rng = random.Random(seed)
+    fecha_fin = date.today()
+    fechas = date_range(fecha_fin - timedelta(days=days - 1), fecha_fin)
+
+    # Employees share one precomputed hash; logins still pay the full verify cost
+    password_hash = hash_password(BENCHMARK_PASSWORD)
+    employee_rows = [{
+        "nombre": f"Empleado {index:04d}",
+        "email": f"empleado{index:04d}@{BENCHMARK_EMAIL_DOMAIN}",
+        "role": "encargado" if index % 25 == 0 else "trabajador",
+        "telefono": f"+34 600 {index:06d}",
+        "activo": True,
+        "password": password_hash,
+    } for index in range(employees)]
+    _insert(db, Employee, employee_rows)
+    ids_by_email = dict(db.query(Employee.email, Employee.id).filter(
+        Employee.email.like(f"%@{BENCHMARK_EMAIL_DOMAIN}")
+    ).all())
+    for row in employee_rows:
+        row["id"] = ids_by_email[row["email"]]
+    employee_ids = [row["id"] for row in employee_rows]
+
+    # Five working days a week on a fixed shift per employee
+    shifts = db.query(ShiftDefinition).filter(ShiftDefinition.activo == True).order_by(ShiftDefinition.orden).all()
+    schedule_rows = []
+    for empleado_id in employee_ids:
+        shift = shifts[empleado_id % len(shifts)]
+        rest_days = {empleado_id % 7, (empleado_id + 1) % 7}
+        for fecha in fechas:
+            if fecha.weekday() in rest_days:
+                continue
+            start_at, end_at = shift_window(fecha, shift)
+            schedule_rows.append({
+                "fecha": fecha,
+                "turno": format_shift_label(shift),
+                "empleado_id": empleado_id,
+                "shift_definition_id": shift.id,
+                "start_at": start_at,
+                "end_at": end_at,
+            })
+    _insert(db, Schedule, schedule_rows)
+
+    _insert(db, Task, [{
+        "titulo": rng.choice(TASK_TITLES),
+        "descripcion": "Tarea generada para benchmark",
+        "empleado_id": rng.choice(employee_ids),
+        "fecha": rng.choice(fechas),
+        "estado": rng.choice(ESTADOS),
+        "prioridad": rng.choice(PRIORIDADES),
+        "is_recurring": False,
+        "requires_signature": False,
+    } for _ in range(tasks)])
+
+    definition_rows = [{
+        "titulo": f"{titulo} (plantilla)",
+        "descripcion": "Definición generada para benchmark",
+        "prioridad": rng.choice(PRIORIDADES),
+        "default_duration_minutes": rng.choice([30, 60, 90, 120]),
+        "active": True,
+        "is_recurring": False,
+        "requires_signature": False,
+    } for titulo in TASK_TITLES]
+    _insert(db, TaskDefinition, definition_rows)
+    definition_ids = [row[0] for row in db.query(TaskDefinition.id).order_by(TaskDefinition.id.desc()).limit(len(definition_rows)).all()]
+
+    # (definition, employee, fecha) is unique, so draw until enough distinct triples exist
+    assignment_keys = set()
+    max_keys = len(definition_ids) * len(employee_ids) * len(fechas)
+    while len(assignment_keys) < min(assignments, max_keys):
+        assignment_keys.add((rng.choice(definition_ids), rng.choice(employee_ids), rng.choice(fechas)))
+    _insert(db, TaskAssignment, [{
+        "task_definition_id": definition_id,
+        "empleado_id": empleado_id,
+        "fecha": fecha,
+        "estado": rng.choice(ESTADOS),
+    } for definition_id, empleado_id, fecha in assignment_keys])
+
+    register_rows = [{
+        "nombre": f"Registro benchmark {index + 1}",
+        "descripcion": "Registro generado para benchmark",
+        "activo": True,
+        "requiere_firma": index % 2 == 0,
+        "campos_personalizados": [{"nombre": "temperatura", "etiqueta": "Temperatura", "tipo": "number", "requerido": False}],
+    } for index in range(registers)]
+    _insert(db, Register, register_rows)
+    register_ids = [row[0] for row in db.query(Register.id).order_by(Register.id.desc()).limit(registers).all()]
+
+    names = {row["id"]: row["nombre"] for row in employee_rows}
+    entry_rows = []
+    for _ in range(entries):
+        empleado_id = rng.choice(employee_ids)
+        completed = datetime.combine(rng.choice(fechas), time(rng.randrange(6, 22), rng.randrange(60)), tzinfo=timezone.utc)
+        entry_rows.append({
+            "register_id": rng.choice(register_ids),
+            "empleado_id": empleado_id,
+            "empleado_name": names[empleado_id],
+            "fecha_completado": completed,
+            "fecha": completed.date().isoformat(),
+            "hora": completed.strftime("%H:%M"),
+            "observaciones": "Sin incidencias" if rng.random() < 0.8 else "Revisar mañana",
+            "resultado": rng.choice(RESULTADOS),
+            "tiempo_real": rng.randrange(5, 120),
+            "campos_personalizados": {"temperatura": round(rng.uniform(4, 30), 1)},
+        })
+    _insert(db, RegisterEntry, entry_rows)
+
+    db.commit()
+    return {
+        "employee_ids": employee_ids,
+        "employee_emails": [row["email"] for row in employee_rows],
+        "register_ids": sorted(register_ids),
+        "fecha_inicio": fechas[0],
+        "fecha_fin": fechas[-1],
+        "counts": {
+            "employees": len(employee_rows),
+            "schedules": len(schedule_rows),
+            "tasks": tasks,
+            "task_assignments": len(assignment_keys),
+            "registers": len(register_rows),
+            "register_entries": len(entry_rows),
+        },
+    }
+
+
+def load_seeded(db: Session) -> Dict[str, Any]:
+    """Describe benchmark data already in the database; None if it has not been seeded"""
+    employees = db.query(Employee.id, Employee.email).filter(
+        Employee.email.like(f"%@{BENCHMARK_EMAIL_DOMAIN}")
+    ).order_by(Employee.id).all()
+    if not employees:
+        return None
+    emails = [email for _, email in employees]
+
+    register_ids = [row[0] for row in db.query(Register.id).filter(
+        Register.nombre.like("Registro benchmark %")
+    ).order_by(Register.id).all()]
+    fecha_inicio, fecha_fin = db.query(func.min(Schedule.fecha), func.max(Schedule.fecha)).one()
+    return {
+        "employee_ids": [employee_id for employee_id, _ in employees],
+        "employee_emails": emails,
+        "register_ids": register_ids,
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "counts": {
+            "employees": len(emails),
+            "schedules": db.query(Schedule).count(),
+            "tasks": db.query(Task).count(),
+            "task_assignments": db.query(TaskAssignment).count(),
+            "registers": len(register_ids),
+            "register_entries": db.query(RegisterEntry).count(),
+        },
+    }
@@ -0,0 +1,100 @@
+"""
+Cold start benchmark: time from a fresh interpreter to the first answered request
+
+    python -m benchmarks.startup --runs 5 --target 1.5
+    python -m benchmarks.startup --database-url postgresql://localhost/gadi --app-env development
+
+Each run imports app.main in a new process, runs the startup events and serves
+GET /health/live through an in-process client. Exits non-zero when the median
+time to first request is above --target seconds.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+# Runs inside the child process; prints one JSON line with its own timings
+CHILD_SCRIPT = """
+import time
+started = time.perf_counter()
+import asyncio, json
+from app.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    import httpx
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://startup") as client:
+            (await client.get("/health/live")).raise_for_status()
+
+asyncio.run(first_request())
+print(json.dumps({"import_seconds": imported - started, "ready_seconds": time.perf_counter() - started}))
+"""
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure GADIApp cold start time")
+    parser.add_argument("--database-url", help="Database to start against (default: temporary SQLite file, initialized first)")
+    parser.add_argument("--app-env", default="production", help="APP_ENV for the measured processes (default: production)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to measure")
+    parser.add_argument("--target", type=float, default=2.0, help="Maximum median seconds to first request")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def child_environment(args: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ, APP_ENV=args.app_env, SQL_ECHO="0")
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gadi-startup-'), 'startup.db')}"
+    return env
+
+
+def run_once(env: Dict[str, str]) -> Dict[str, float]:
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD_SCRIPT], env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    # Includes interpreter start-up, which the in-process figures cannot see
+    timings["process_seconds"] = time.perf_counter() - started
+    return timings
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, Any]:
+    summary = {}
+    for metric in ("import_seconds", "ready_seconds", "process_seconds"):
+        values = [run[metric] for run in runs]
+        summary[metric] = {"median": round(statistics.median(values), 3), "max": round(max(values), 3)}
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    env = child_environment(args)
+
+    if not args.database_url:
+        # A fresh SQLite file has no tables; production-mode starts expect init-db to have run
+        subprocess.run([sys.executable, "-m", "app.cli", "init-db"], env=env, capture_output=True, check=True)
+
+    runs = []
+    for index in range(args.runs):
+        runs.append(run_once(env))
+        print(f"run {index + 1}: import {runs[-1]['import_seconds']:.3f}s   first request {runs[-1]['ready_seconds']:.3f}s   "
+              f"process {runs[-1]['process_seconds']:.3f}s")
+
+    summary = summarize(runs)
+    median = summary["ready_seconds"]["median"]
+    print(f"median time to first request {median:.3f}s (target {args.target:.3f}s)")
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"app_env": args.app_env, "target_seconds": args.target, "summary": summary, "runs": runs}, handle, indent=2)
+        print(f"Report written to {args.output}")
+
+    return 0 if median <= args.target else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,44 @@ export async function checkHealth() {
   }
 }
 
+/**
+ * POST with an Idempotency-Key header; network failures are retried with the same key,
+ * so the server replays the first response instead of writing twice
+ * @param {string} url - Request URL
+ * @param {string} token - Authentication token
+ * @param {Object} data - JSON body
+ * @param {number} attempts - Total attempts on network failure
+ * @returns {Promise<Response>} Fetch response
+ */
+async function idempotentPost(url, token, data, attempts = 3) {
+  const key = window.crypto?.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+  for (let attempt = 1; ; attempt++) {
+    try {
+      const response = await fetch(url, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'X-Demo-Token': token,
+          'Idempotency-Key': key
+        },
+        body: JSON.stringify(data)
+      });
+      // 409: the first attempt is still being processed
+      if (response.status !== 409 || attempt >= attempts) {
+        return response;
+      }
+    } catch (error) {
+      if (attempt >= attempts) {
+        throw error;
+      }
+    }
+    await new Promise((resolve) => setTimeout(resolve, 500 * attempt));
+  }
+}
+
 /**
  * Login user with email and password
  * @param {string} email - User email
@@ -252,6 +290,24 @@ export async function getInboxNotifications(token) {
   }
 }
 
+/**
+ * Subscribe to live manager inbox events (new and resolved notifications)
+ * @param {string} token - Authentication token
+ * @param {Function} onEvent - Called with (eventType, notification) for each event
+ * @returns {EventSource} Open event source; call close() to unsubscribe
+ */
+export function subscribeToInboxEvents(token, onEvent) {
+  const source = new EventSource(`${BASE_URL}/inbox/stream?token=${encodeURIComponent(token)}`);
+
+  ['notification.created', 'notification.resolved'].forEach((eventType) => {
+    source.addEventListener(eventType, (event) => {
+      onEvent(eventType, JSON.parse(event.data));
+    });
+  });
+
+  return source;
+}
+
 /**
  * Reassign a conflicted task to another employee
  * @param {string} token - Authentication token
@@ -312,6 +368,36 @@ export async function rescheduleTask(token, notificationId, newDate) {
   }
 }
 
+/**
+ * Resolve many conflict notifications at once
+ * @param {string} token - Authentication token
+ * @param {string} action - 'reassign' or 'reschedule'
+ * @param {Array<Object>} items - [{ notification_id, new_empleado_id }] or [{ notification_id, new_fecha }]
+ * @returns {Promise<Object>} JSON response with resolved items and remaining conflicts
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function resolveInboxBatch(token, action, items) {
+  try {
+    const response = await fetch(`${BASE_URL}/inbox/batch/${action}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Demo-Token': token
+      },
+      body: JSON.stringify({ items })
+    });
+    
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `Failed to resolve notifications: ${response.status} ${response.statusText}`);
+    }
+    
+    return await response.json();
+  } catch (error) {
+    throw new Error(`Failed to resolve notifications: ${error.message}`);
+  }
+}
+
 // Register Management API
 export async function getRegisters(token) {
   try {
@@ -415,16 +501,121 @@ export async function getRegisterEntries(token, registerId, fechaInicio = null,
   }
 }
 
-export async function createRegisterEntry(token, registerId, entryData) {
+/**
+ * Upload a drawn signature image once; pass the returned reference as firma_empleado/firma_supervisor
+ * @param {string} token - Authentication token
+ * @param {Blob} image - PNG, JPEG or WebP image (e.g. from canvas.toBlob)
+ * @returns {Promise<Object>} JSON response {sha256, reference, url}
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function uploadSignature(token, image) {
   try {
-    const response = await fetch(`${BASE_URL}/registers/${registerId}/entries`, {
+    const response = await fetch(`${BASE_URL}/signatures`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
+        'Content-Type': image.type || 'application/octet-stream',
         'X-Demo-Token': token
       },
-      body: JSON.stringify(entryData)
+      body: image
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `Failed to upload signature: ${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    throw new Error(`Failed to upload signature: ${error.message}`);
+  }
+}
+
+/**
+ * Load a signature image from an entry's firma_*_url; the browser caches it permanently
+ * @param {string} token - Authentication token
+ * @param {string} url - firma_empleado_url or firma_supervisor_url of a register entry
+ * @returns {Promise<string>} Object URL usable as an <img> src
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function getSignatureImage(token, url) {
+  try {
+    const response = await fetch(`${BASE_URL}${url}`, {
+      method: 'GET',
+      headers: {
+        'X-Demo-Token': token
+      }
     });
+
+    if (!response.ok) {
+      throw new Error(`${response.status} ${response.statusText}`);
+    }
+
+    return URL.createObjectURL(await response.blob());
+  } catch (error) {
+    throw new Error(`Failed to get signature: ${error.message}`);
+  }
+}
+
+/**
+ * Attach photos to a register entry; thumbnails are generated in the background
+ * @param {string} token - Authentication token
+ * @param {number} entryId - Register entry ID
+ * @param {File[]} files - JPEG, PNG or WebP images
+ * @returns {Promise<Object>} Attachments created, with URLs and thumbnail status
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function uploadEntryPhotos(token, entryId, files) {
+  try {
+    const form = new FormData();
+    files.forEach(file => form.append('files', file, file.name));
+    const response = await fetch(`${BASE_URL}/registers/entries/${entryId}/attachments`, {
+      method: 'POST',
+      headers: {
+        'X-Demo-Token': token
+      },
+      body: form
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `Failed to upload photos: ${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    throw new Error(`Failed to upload photos: ${error.message}`);
+  }
+}
+
+/**
+ * List the photos of a register entry
+ * @param {string} token - Authentication token
+ * @param {number} entryId - Register entry ID
+ * @returns {Promise<Object>} Attachments with url and thumbnail_url (both load with getSignatureImage)
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function getEntryAttachments(token, entryId) {
+  try {
+    const response = await fetch(`${BASE_URL}/registers/entries/${entryId}/attachments`, {
+      method: 'GET',
+      headers: {
+        'X-Demo-Token': token
+      }
+    });
+
+    if (!response.ok) {
+      throw new Error(`${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    throw new Error(`Failed to get entry photos: ${error.message}`);
+  }
+}
+
+export async function createRegisterEntry(token, registerId, entryData) {
+  try {
+    const response = await idempotentPost(`${BASE_URL}/registers/${registerId}/entries`, token, entryData);
     
     if (!response.ok) {
       const errorData = await response.json();
@@ -833,6 +1024,103 @@ export async function deleteTaskDefinition(token, definitionId) {
   }
 }
 
+/**
+ * Get the current user's day in one request: schedules, tasks, task assignments and the registers/procedures they use
+ * @param {string} token - Authentication token
+ * @param {string|null} fecha - Optional date (YYYY-MM-DD); defaults to today on the server
+ * @returns {Promise<Object>} JSON response {fecha, user, schedules, tasks, task_assignments, registers, procedures}
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function getToday(token, fecha = null) {
+  try {
+    const response = await fetch(`${BASE_URL}/me/today${fecha ? `?fecha=${fecha}` : ''}`, {
+      method: 'GET',
+      headers: {
+        'X-Demo-Token': token
+      }
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `Failed to get today: ${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    throw new Error(`Failed to get today: ${error.message}`);
+  }
+}
+
+/**
+ * Get the agenda: tasks and task assignments merged, sorted by date and priority
+ * @param {string} token - Authentication token
+ * @param {Object} params - Optional filters {empleado_id, desde, hasta, estado, limit, offset}
+ * @returns {Promise<Object>} JSON response {items, total, limit, offset}
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function getAgenda(token, params = {}) {
+  try {
+    const searchParams = new URLSearchParams();
+    Object.keys(params).forEach(key => {
+      if (params[key] !== undefined && params[key] !== null) {
+        searchParams.append(key, params[key]);
+      }
+    });
+    const query = searchParams.toString();
+
+    const response = await fetch(`${BASE_URL}/agenda${query ? `?${query}` : ''}`, {
+      method: 'GET',
+      headers: {
+        'X-Demo-Token': token
+      }
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `Failed to get agenda: ${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    throw new Error(`Failed to get agenda: ${error.message}`);
+  }
+}
+
+/**
+ * Get audit events, newest first
+ * @param {string} token - Authentication token
+ * @param {Object} params - Optional filters {entity_type, entity_id, actor_id, action, desde, hasta, limit, offset}
+ * @returns {Promise<Object>} JSON response {events, limit, offset, has_more}
+ * @throws {Error} If fetch fails or response is not ok
+ */
+export async function getAuditEvents(token, params = {}) {
+  try {
+    const searchParams = new URLSearchParams();
+    Object.keys(params).forEach(key => {
+      if (params[key] !== undefined && params[key] !== null) {
+        searchParams.append(key, params[key]);
+      }
+    });
+    const query = searchParams.toString();
+
+    const response = await fetch(`${BASE_URL}/audit/events${query ? `?${query}` : ''}`, {
+      method: 'GET',
+      headers: {
+        'X-Demo-Token': token
+      }
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `Failed to get audit events: ${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    throw new Error(`Failed to get audit events: ${error.message}`);
+  }
+}
+
 /**
  * Get all task assignments with role-based filtering
  * @param {string} token - Authentication token
@@ -868,14 +1156,7 @@ export async function getTaskAssignments(token) {
  */
 export async function createTaskAssignment(token, assignmentData) {
   try {
-    const response = await fetch(`${BASE_URL}/task-assignments`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-        'X-Demo-Token': token
-      },
-      body: JSON.stringify(assignmentData)
-    });
+    const response = await idempotentPost(`${BASE_URL}/task-assignments`, token, assignmentData);
     
     if (!response.ok) {
       const errorData = await response.json();
@@ -988,14 +1269,7 @@ export async function startTask(token, taskId) {
 
 export async function finishTask(token, taskId, completionData = {}) {
   try {
-    const response = await fetch(`${BASE_URL}/tasks/${taskId}/finish`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-        'X-Demo-Token': token
-      },
-      body: JSON.stringify(completionData)
-    });
+    const response = await idempotentPost(`${BASE_URL}/tasks/${taskId}/finish`, token, completionData);
     
     if (!response.ok) {
       const errorData = await response.json();
@@ -40,9 +40,11 @@ export async function me() {
 }
 
 /**
- * Logout user by clearing localStorage
+ * Logout user: invalidate the token on the server and clear localStorage
  */
 export function logout() {
+  // Fire and forget; the local session is cleared regardless of the response
+  request('/auth/logout', { method: 'POST' }).catch(() => {});
   localStorage.removeItem('auth');
 }
 